@@ -6,7 +6,7 @@
     "website": "https://cooperativacredikot.com.ar",
     "category": "CRM",
     "license": "LGPL-3",
-    "depends": ["base", "crm"],
+    "depends": ["base", "crm", "legacy_integration"],
     "data": [
         "security/ckt_security.xml",
         "security/ir.model.access.csv",
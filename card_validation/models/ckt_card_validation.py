@@ -18,8 +18,14 @@ VENDOR_SELECTION = [
 def _only_digits(s):
     return re.sub(r"\D", "", s or "")
 
+def _normalize_solicitud(value):
+    if value is False or value is None:
+        return ""
+    return str(value).strip()
+
 class CktCardValidation(models.Model):
     _name = "ckt.card.validation"
+    _inherit = ["legacy.sync.mixin"]
     _description = "Validación de Tarjeta (CKT)"
     _order = "validation_datetime desc, id desc"
     _rec_name = "display_name"
@@ -129,41 +135,102 @@ class CktCardValidation(models.Model):
                 if rec.expiry_date.year < 1990 or rec.expiry_date.year > date.today().year + 20:
                     raise ValidationError(_("Fecha de vencimiento inválida."))
 
+    @api.model
+    def _resolve_relations(self, vals_list):
+        """
+        Completa partner_id por VAT y lead_id por x_studio_solicitud en ``vals_list``
+        (in place) para todo el lote, con una búsqueda por modelo sobre los
+        VAT y las solicitudes distintos.
+        """
+        vats = {vals["partner_vat"] for vals in vals_list if not vals.get("partner_id") and vals.get("partner_vat")}
+        partner_by_vat = {}
+        if vats:
+            for partner in self.env["res.partner"].search([("vat", "in", list(vats))], order="id"):
+                partner_by_vat.setdefault(partner.vat, partner.id)
+        # La solicitud se compara normalizada (texto sin espacios), sea cual sea el
+        # tipo del campo de Studio
+        solicitudes = {
+            _normalize_solicitud(vals["lead_x_solicitud"])
+            for vals in vals_list if not vals.get("lead_id") and vals.get("lead_x_solicitud")
+        } - {""}
+        lead_by_solicitud = {}
+        if solicitudes:
+            Lead = self.env["crm.lead"]
+            search_values = list(solicitudes)
+            if Lead._fields["x_studio_solicitud"].type == "integer":
+                search_values = [int(value) for value in solicitudes if value.isdigit()]
+            for lead in Lead.search([("x_studio_solicitud", "in", search_values)], order="id"):
+                lead_by_solicitud.setdefault(_normalize_solicitud(lead.x_studio_solicitud), lead.id)
+        for vals in vals_list:
+            if not vals.get("partner_id") and vals.get("partner_vat") in partner_by_vat:
+                vals["partner_id"] = partner_by_vat[vals["partner_vat"]]
+            solicitud = _normalize_solicitud(vals.get("lead_x_solicitud"))
+            if not vals.get("lead_id") and solicitud in lead_by_solicitud:
+                vals["lead_id"] = lead_by_solicitud[solicitud]
+        return vals_list
+
     @api.model_create_multi
     def create(self, vals_list):
         # Resolución automática de partner_id por VAT y lead_id por x_studio_solicitud si vienen informados
-        for vals in vals_list:
-            if not vals.get("partner_id") and vals.get("partner_vat"):
-                partner = self.env["res.partner"].search([("vat", "=", vals["partner_vat"])], limit=1)
-                if partner:
-                    vals["partner_id"] = partner.id
-            if not vals.get("lead_id") and vals.get("lead_x_solicitud"):
-                lead = self.env["crm.lead"].search([("x_studio_solicitud", "=", vals["lead_x_solicitud"])], limit=1)
-                if lead:
-                    vals["lead_id"] = lead.id
+        self._resolve_relations(vals_list)
         return super().create(vals_list)
 
     def write(self, vals):
-        # Si actualizan VAT o x_studio_solicitud, refrescar relaciones
-        res = super().write(vals)
-        for rec in self:
-            if vals.get("partner_vat") and not vals.get("partner_id"):
-                partner = self.env["res.partner"].search([("vat", "=", rec.partner_vat)], limit=1)
-                if partner:
-                    rec.partner_id = partner.id
-            if vals.get("lead_x_solicitud") and not vals.get("lead_id"):
-                lead = self.env["crm.lead"].search([("x_studio_solicitud", "=", rec.lead_x_solicitud)], limit=1)
-                if lead:
-                    rec.lead_id = lead.id
-        return res
-    class ResPartner(models.Model):
-        _inherit = "res.partner"
-        cktc_card_validation_ids = fields.One2many(
-            "ckt.card.validation", "partner_id", string="Validaciones de Tarjeta"
-        )
-
-    class CrmLead(models.Model):
-        _inherit = "crm.lead"
-        cktc_card_validation_ids = fields.One2many(
-            "ckt.card.validation", "lead_id", string="Validaciones de Tarjeta"
-        )
+        # Si actualizan VAT o x_studio_solicitud, resolver las relaciones una vez
+        # (los valores son los mismos para todos los registros) y escribir todo junto
+        if (vals.get("partner_vat") and not vals.get("partner_id")) or (
+            vals.get("lead_x_solicitud") and not vals.get("lead_id")
+        ):
+            vals = self._resolve_relations([dict(vals)])[0]
+        return super().write(vals)
+
+    # ============== Ingesta por lote ==============
+
+    @staticmethod
+    def _ingest_key(pan_obfuscated, validation_datetime, source_system):
+        return (pan_obfuscated or "", fields.Datetime.to_string(validation_datetime) or "", source_system or "")
+
+    @api.model
+    def _ingest(self, vals_list):
+        """
+        Alta/actualización por lote de validaciones, identificadas por
+        (pan_obfuscated, validation_datetime, source_system):
+        - una búsqueda para las existentes de todo el lote;
+        - partner/lead resueltos por lote (ver ``_resolve_relations``);
+        - un único ``create`` para las nuevas;
+        - ``write`` sólo de los registros con cambios, agrupados por valores iguales.
+        Si la clave se repite en el lote, prevalece el último. Devuelve (creados, actualizados).
+        """
+        by_key = {}
+        for vals in vals_list:
+            by_key[self._ingest_key(vals.get("pan_obfuscated"), vals.get("validation_datetime"), vals.get("source_system"))] = vals
+        if not by_key:
+            return self.browse(), self.browse()
+
+        pans, dates, sources = (sorted({key[i] for key in by_key}) for i in range(3))
+        existing = {}
+        for rec in self.search([
+            ("pan_obfuscated", "in", pans),
+            ("validation_datetime", "in", dates),
+            ("source_system", "in", sources),
+        ], order="id"):
+            existing.setdefault(self._ingest_key(rec.pan_obfuscated, rec.validation_datetime, rec.source_system), rec)
+
+        to_create = []
+        to_write = {}
+        for key, vals in by_key.items():
+            rec = existing.get(key)
+            if not rec:
+                to_create.append(vals)
+                continue
+            changed = rec._get_changed_vals(vals)
+            if changed:
+                group = to_write.setdefault(tuple(sorted(changed.items())), [changed, self.browse()])
+                group[1] |= rec
+
+        created = self.create(to_create) if to_create else self.browse()
+        written = self.browse()
+        for changed, records in to_write.values():
+            records.write(changed)
+            written |= records
+        return created, written
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Los tests con pytest cubren sólo los módulos puros (sin Odoo) de cada addon.
+
+El ``__init__.py`` de un addon importa ``odoo``: las carpetas de addons se
+recorren como directorios comunes para que pytest no lo importe al preparar
+los tests. Cada test agrega la carpeta ``models`` del addon a ``sys.path``.
+"""
+import pytest
+
+
+def pytest_collect_directory(path, parent):
+    if (path / "__manifest__.py").is_file():
+        return pytest.Dir.from_parent(parent, path=path)
+    return None
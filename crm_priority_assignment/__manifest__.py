@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+{
+    "name": "Asignación de leads por prioridad",
+    "summary": "Motor de asignación con tope por etapa y estrategias intercambiables para equipos de venta.",
+    "version": "18.0.1.0.0",
+    "author": "Credikot",
+    "website": "https://cooperativacredikot.com.ar",
+    "category": "Sales/CRM",
+    "license": "LGPL-3",
+    "depends": ["crm", "legacy_integration"],
+    "data": [
+        "security/ir.model.access.csv",
+        "data/ir_cron.xml",
+        "views/crm_lead_load_views.xml",
+        "views/crm_team_member_views.xml",
+        "views/res_config_settings_views.xml",
+    ],
+    "installable": True,
+    "application": False,
+    "description": """
+Reemplaza la automatización AsignacionporPrioridad por un motor en crm.team:
+- Carga por usuario y etapa leída de crm.lead.load, sin recorrer crm_lead.
+- Leads pendientes bloqueados con FOR UPDATE SKIP LOCKED.
+- Plan con tope por etapa (x_cc_cap_per_user) calculado en memoria, con estrategia
+  configurable: round-robin, menos cargado o ponderada (peso por miembro del equipo).
+- Prioridad por antigüedad opcional: cada N horas de espera un lead sube una etapa.
+- Escrituras agrupadas por usuario.
+- Cada equipo en su propia transacción con advisory lock (pg_try_advisory_xact_lock):
+  varios crons pueden correr a la vez, repartiendo equipos con
+  model._cron_priority_assignment(team_ids=[...]).
+- Asignación inmediata opcional al crear o mover un lead, contra contadores de
+  carga por (equipo, etapa, usuario) mantenidos en cada alta/escritura/baja y
+  conciliados por cron. Reporte "Carga por usuario" en CRM > Reportes.
+- Simulación sin escribir: crm.team._priority_assignment_dry_run() o, fuera de
+  Odoo, models/assignment_plan.py (simulate snapshot.json / bench).
+""",
+}
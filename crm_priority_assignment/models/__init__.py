@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+from . import crm_lead_load
+from . import crm_lead
+from . import crm_team
+from . import crm_team_member
+from . import res_config_settings
@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+"""
+Plan de asignación con tope por etapa, en memoria.
+
+Funciones puras (sin ORM): reciben ids y contadores y devuelven qué lead va a
+qué usuario. Replican la lógica de la automatización AsignacionporPrioridad:
+- los usuarios se recorren en orden, arrancando después del último asignado;
+- en cada etapa un usuario recibe leads mientras su carga en esa etapa sea
+  menor al tope (``cap``);
+- el total por corrida y por equipo está limitado por ``batch_limit``.
+
+La elección de usuario es intercambiable (round-robin, menos cargado, colas
+ponderadas) y las etapas pueden intercalarse según la antigüedad del lead.
+
+Incluye un simulador que reproduce un snapshot (equipos, etapas, topes,
+cargas y pendientes) sin tocar la base, y un benchmark que escala usuarios y
+leads::
+
+    python3 assignment_plan.py bench [--max-us-per-lead N]
+    python3 assignment_plan.py simulate snapshot.json
+"""
+import heapq
+import json
+import math
+import sys
+import time
+from bisect import bisect_left
+
+# Capacidad "ilimitada" (número muy grande)
+CAP_INF = 10**12
+
+
+class UserRing:
+    """Usuarios en orden round-robin con su posición indexada (sin ``list.index``)."""
+
+    __slots__ = ("user_ids", "_positions")
+
+    def __init__(self, user_ids):
+        self.user_ids = list(user_ids)
+        self._positions = {uid: i for i, uid in enumerate(self.user_ids)}
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def position(self, uid):
+        return self._positions[uid]
+
+    def start_after(self, last_uid):
+        """Posición siguiente al último asignado (0 si no está en el equipo)."""
+        pos = self._positions.get(last_uid)
+        return 0 if pos is None else (pos + 1) % len(self.user_ids)
+
+
+# ============== Estrategias ==============
+#
+# Cada estrategia elige el usuario de cada lead dentro de una etapa, respetando
+# el tope. Guardan su estado por etapa (la carga se actualiza en el ``load``
+# recibido) y el puntero round-robin es común a todas las etapas del equipo.
+# ``pick`` cuesta O(log usuarios).
+
+
+class RoundRobinStrategy:
+    """Round-robin clásico: el siguiente usuario con capacidad después del último asignado."""
+
+    name = "round_robin"
+
+    def __init__(self, ring, last_uid=False, weights=None):
+        self.ring = ring
+        self.last_uid = last_uid
+        self._pos = ring.start_after(last_uid) if len(ring) else 0
+        self._available = {}
+
+    def _stage(self, stage_id, load, cap):
+        available = self._available.get(stage_id)
+        if available is None:
+            # Posiciones (ordenadas) de los usuarios con lugar en la etapa
+            available = self._available[stage_id] = [
+                pos for pos, uid in enumerate(self.ring.user_ids)
+                if cap >= CAP_INF or load.get(uid, 0) < cap
+            ]
+        return available
+
+    def pick(self, stage_id, load, cap):
+        available = self._stage(stage_id, load, cap)
+        if not available:
+            return None
+        i = bisect_left(available, self._pos)
+        if i == len(available):
+            i = 0
+        pos = available[i]
+        uid = self.ring.user_ids[pos]
+        load[uid] = load.get(uid, 0) + 1
+        if cap < CAP_INF and load[uid] >= cap:
+            del available[i]
+        self._pos = (pos + 1) % len(self.ring)
+        self.last_uid = uid
+        return uid
+
+
+class _HeapStrategy(RoundRobinStrategy):
+    """Base de las estrategias con heap por etapa; el desempate sigue el orden round-robin."""
+
+    def _rr_rank(self, pos):
+        return (pos - self._pos) % len(self.ring)
+
+    def _initial_key(self, uid, load):
+        raise NotImplementedError
+
+    def _next_key(self, key, uid, load):
+        raise NotImplementedError
+
+    def _stage(self, stage_id, load, cap):
+        heap = self._available.get(stage_id)
+        if heap is None:
+            heap = [
+                (self._initial_key(uid, load), self._rr_rank(pos), uid)
+                for pos, uid in enumerate(self.ring.user_ids)
+                if (cap >= CAP_INF or load.get(uid, 0) < cap) and self._eligible(uid)
+            ]
+            heapq.heapify(heap)
+            self._available[stage_id] = heap
+        return heap
+
+    def _eligible(self, uid):
+        return True
+
+    def pick(self, stage_id, load, cap):
+        heap = self._stage(stage_id, load, cap)
+        if not heap:
+            return None
+        key, rank, uid = heapq.heappop(heap)
+        load[uid] = load.get(uid, 0) + 1
+        if cap >= CAP_INF or load[uid] < cap:
+            heapq.heappush(heap, (self._next_key(key, uid, load), rank, uid))
+        # El desempate de las etapas siguientes arranca después del último asignado
+        self._pos = (self.ring.position(uid) + 1) % len(self.ring)
+        self.last_uid = uid
+        return uid
+
+
+class LeastLoadedStrategy(_HeapStrategy):
+    """Primero el usuario con menos leads abiertos en la etapa."""
+
+    name = "least_loaded"
+
+    def _initial_key(self, uid, load):
+        return load.get(uid, 0)
+
+    def _next_key(self, key, uid, load):
+        return load[uid]
+
+
+class WeightedFairStrategy(_HeapStrategy):
+    """
+    Weighted fair queueing: cada usuario avanza 1/peso por lead asignado y se
+    elige el de menor tiempo virtual. Arranca desde su carga actual / peso, así
+    un usuario con peso 2 termina con el doble de leads que uno con peso 1.
+    Peso 0 excluye al usuario.
+    """
+
+    name = "weighted"
+
+    def __init__(self, ring, last_uid=False, weights=None):
+        super().__init__(ring, last_uid, weights)
+        self.weights = weights or {}
+
+    def _weight(self, uid):
+        return self.weights.get(uid, 1.0)
+
+    def _eligible(self, uid):
+        return self._weight(uid) > 0
+
+    def _initial_key(self, uid, load):
+        return load.get(uid, 0) / self._weight(uid)
+
+    def _next_key(self, key, uid, load):
+        return key + 1.0 / self._weight(uid)
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (RoundRobinStrategy, LeastLoadedStrategy, WeightedFairStrategy)
+}
+
+
+def get_strategy(name, ring, last_uid=False, weights=None):
+    return STRATEGIES.get(name or "round_robin", RoundRobinStrategy)(ring, last_uid, weights)
+
+
+# ============== Plan ==============
+
+def _lead_id(item):
+    return item[0] if isinstance(item, (list, tuple)) else item
+
+
+def plan_stage(lead_ids, users, last_uid, load, cap, limit=None, strategy="round_robin", weights=None, stage_id=None):
+    """
+    Reparte ``lead_ids`` (ya ordenados por antigüedad) entre ``users``.
+
+    :param users: :class:`UserRing` o lista de ids en orden.
+    :param last_uid: último usuario asignado (puntero round-robin) o False.
+    :param load: dict {uid: leads abiertos en la etapa}; se actualiza en el lugar.
+    :param cap: tope por usuario en la etapa.
+    :param limit: máximo de leads a asignar.
+    :param strategy: nombre de la estrategia (ver ``STRATEGIES``) o una instancia
+        compartida entre etapas (en ese caso pasar ``stage_id``).
+    :return: (plan {uid: [lead_id, ...]}, skipped, last_uid)
+    """
+    ring = users if isinstance(users, UserRing) else UserRing(users)
+    if isinstance(strategy, str):
+        strategy = get_strategy(strategy, ring, last_uid, weights)
+    plan = {}
+    if not len(ring):
+        return plan, 0, last_uid
+
+    if limit is not None:
+        lead_ids = lead_ids[:limit]
+    for i, item in enumerate(lead_ids):
+        uid = strategy.pick(stage_id, load, cap)
+        if uid is None:
+            # Todos alcanzaron el tope: el resto de la etapa queda sin asignar
+            return plan, len(lead_ids) - i, strategy.last_uid
+        plan.setdefault(uid, []).append(_lead_id(item))
+    return plan, 0, strategy.last_uid
+
+
+def _aged_stream(rank, stage_id, pending, aging):
+    for lead_id, age in pending:
+        yield rank - age / aging, stage_id, lead_id
+
+
+def plan_team(stages, user_ids, last_uid, load_by_stage, batch_limit,
+              strategy="round_robin", weights=None, aging_hours=0):
+    """
+    Plan de un equipo recorriendo las etapas en orden de prioridad.
+
+    :param stages: lista de (stage_id, cap, pending) en orden de prioridad;
+        ``pending`` son ids o pares (id, antigüedad en segundos), más antiguos primero.
+    :param user_ids: :class:`UserRing` o lista de ids en orden.
+    :param load_by_stage: dict {stage_id: {uid: carga}}.
+    :param strategy: nombre de la estrategia o una instancia creada con ``get_strategy``.
+    :param aging_hours: 0 = etapas estrictamente en orden. Si es > 0, cada
+        ``aging_hours`` de espera un lead sube un nivel de prioridad: las etapas
+        se intercalan y un lead viejo de una etapa baja pasa antes que uno nuevo
+        de una etapa alta (requiere la antigüedad en ``pending``).
+    :return: (plan {stage_id: {uid: [lead_id, ...]}}, assigned, skipped, last_uid)
+    """
+    ring = user_ids if isinstance(user_ids, UserRing) else UserRing(user_ids)
+    picker = get_strategy(strategy, ring, last_uid, weights) if isinstance(strategy, str) else strategy
+    plan = {}
+    assigned = skipped = 0
+    if not len(ring):
+        return plan, 0, 0, last_uid
+
+    if aging_hours and aging_hours > 0:
+        aging = aging_hours * 3600.0
+        caps = {stage_id: cap for stage_id, cap, _pending in stages}
+        # Prioridad = nivel de la etapa - niveles ganados por antigüedad. Cada
+        # lista ya viene ordenada (más viejo primero), así que el merge es O(log etapas).
+        streams = [
+            _aged_stream(rank, stage_id, pending, aging)
+            for rank, (stage_id, _cap, pending) in enumerate(stages)
+        ]
+        full = set()
+        for _priority, stage_id, lead_id in heapq.merge(*streams):
+            if assigned >= batch_limit:
+                break
+            if stage_id in full:
+                skipped += 1
+                continue
+            uid = picker.pick(stage_id, load_by_stage.setdefault(stage_id, {}), caps[stage_id])
+            if uid is None:
+                full.add(stage_id)
+                skipped += 1
+                continue
+            plan.setdefault(stage_id, {}).setdefault(uid, []).append(lead_id)
+            assigned += 1
+        return plan, assigned, skipped, picker.last_uid
+
+    total_left = batch_limit
+    for stage_id, cap, pending in stages:
+        if total_left <= 0:
+            break
+        load = load_by_stage.setdefault(stage_id, {})
+        stage_plan = {}
+        for i, item in enumerate(pending[:total_left]):
+            uid = picker.pick(stage_id, load, cap)
+            if uid is None:
+                skipped += min(len(pending), total_left) - i
+                break
+            stage_plan.setdefault(uid, []).append(_lead_id(item))
+            assigned += 1
+        if stage_plan:
+            plan[stage_id] = stage_plan
+            total_left -= sum(len(ids) for ids in stage_plan.values())
+    return plan, assigned, skipped, picker.last_uid
+
+
+# ============== Simulador ==============
+
+def fairness_metrics(assigned_by_user, user_ids):
+    """
+    Métricas de reparto de una corrida:
+    mín/máx/media/desvío de leads por usuario, diferencia máx-mín e índice de
+    Jain (1.0 = reparto perfecto, 1/n = todo a un usuario).
+    """
+    counts = [assigned_by_user.get(uid, 0) for uid in user_ids]
+    if not counts:
+        return {"users": 0, "min": 0, "max": 0, "mean": 0.0, "stdev": 0.0, "spread": 0, "jain": 1.0}
+    n = len(counts)
+    total = sum(counts)
+    mean = total / n
+    squares = sum(c * c for c in counts)
+    return {
+        "users": n,
+        "min": min(counts),
+        "max": max(counts),
+        "mean": round(mean, 3),
+        "stdev": round(math.sqrt(sum((c - mean) ** 2 for c in counts) / n), 3),
+        "spread": max(counts) - min(counts),
+        "jain": round(total * total / (n * squares), 4) if squares else 1.0,
+    }
+
+
+def simulate(snapshot):
+    """
+    Reproduce un snapshot y devuelve el plan con métricas y tiempos.
+
+    Formato del snapshot (serializable a JSON)::
+
+        {"batch_limit": 200, "strategy": "round_robin", "aging_hours": 0,
+         "teams": [{"id": 1, "name": "...", "user_ids": [..], "last_uid": 7,
+                    "weights": [[uid, peso], ..],
+                    "stages": [{"id": 1, "cap": 5, "pending": [lead_id | [lead_id, antigüedad_s], ..],
+                                "load": [[uid, count], ..]}, ..]}]}
+
+    No modifica el snapshot.
+    """
+    batch_limit = snapshot.get("batch_limit") or CAP_INF
+    report = {"teams": [], "assigned": 0, "skipped": 0, "seconds": 0.0}
+    started_all = time.perf_counter()
+    for team in snapshot.get("teams", []):
+        user_ids = team.get("user_ids") or []
+        load_by_stage = {stage["id"]: dict(map(tuple, stage.get("load") or [])) for stage in team["stages"]}
+        stages = [
+            (stage["id"], CAP_INF if stage.get("cap") is None else stage["cap"], stage.get("pending") or [])
+            for stage in team["stages"]
+        ]
+        started = time.perf_counter()
+        plan, assigned, skipped, last_uid = plan_team(
+            stages, user_ids, team.get("last_uid") or False, load_by_stage, batch_limit,
+            strategy=snapshot.get("strategy") or "round_robin",
+            weights=dict(map(tuple, team.get("weights") or [])),
+            aging_hours=snapshot.get("aging_hours") or 0,
+        )
+        elapsed = time.perf_counter() - started
+
+        by_user = {}
+        for stage_plan in plan.values():
+            for uid, lead_ids in stage_plan.items():
+                by_user[uid] = by_user.get(uid, 0) + len(lead_ids)
+        stage_reports = []
+        for stage_id, cap, pending in stages:
+            stage_plan = plan.get(stage_id, {})
+            final_load = load_by_stage.get(stage_id, {})
+            stage_reports.append({
+                "id": stage_id,
+                "cap": None if cap >= CAP_INF else cap,
+                "pending": len(pending),
+                "assigned": sum(len(ids) for ids in stage_plan.values()),
+                "users_at_cap": sum(1 for uid in user_ids if cap < CAP_INF and final_load.get(uid, 0) >= cap),
+            })
+        report["teams"].append({
+            "id": team.get("id"),
+            "name": team.get("name", ""),
+            "assigned": assigned,
+            "skipped": skipped,
+            "last_uid": last_uid,
+            "seconds": elapsed,
+            "fairness": fairness_metrics(by_user, user_ids),
+            "stages": stage_reports,
+            "plan": {str(sid): {str(uid): ids for uid, ids in sp.items()} for sid, sp in plan.items()},
+        })
+        report["assigned"] += assigned
+        report["skipped"] += skipped
+    report["seconds"] = time.perf_counter() - started_all
+    return report
+
+
+# ============== Benchmark ==============
+
+def synthetic_snapshot(n_leads, n_users, n_stages=4, cap=None, seed=42, strategy="round_robin", aging_hours=0):
+    """Snapshot de un equipo con leads repartidos al azar entre etapas y carga inicial aleatoria."""
+    import random
+
+    rnd = random.Random(seed)
+    user_ids = list(range(1, n_users + 1))
+    stage_ids = list(range(1, n_stages + 1))
+    if cap is None:
+        cap = n_leads // (n_users * n_stages) + 1
+    pending = {sid: [] for sid in stage_ids}
+    for lead_id in range(1, n_leads + 1):
+        pending[rnd.choice(stage_ids)].append(lead_id)
+    max_age = 72 * 3600
+    return {
+        "batch_limit": n_leads,
+        "strategy": strategy,
+        "aging_hours": aging_hours,
+        "teams": [{
+            "id": 1,
+            "name": "sintético",
+            "user_ids": user_ids,
+            "last_uid": False,
+            "weights": [[uid, rnd.choice((0.5, 1.0, 1.0, 2.0))] for uid in user_ids],
+            "stages": [
+                {
+                    "id": sid,
+                    "cap": cap,
+                    "pending": [[lead_id, max_age - lead_id * max_age // n_leads] for lead_id in pending[sid]],
+                    "load": [[uid, rnd.randint(0, cap // 4)] for uid in user_ids],
+                }
+                for sid in stage_ids
+            ],
+        }],
+    }
+
+
+def benchmark(n_leads=100000, n_users=20, n_stages=4, cap=None, repeat=3, strategy="round_robin", aging_hours=0):
+    """Mejor tiempo de ``repeat`` simulaciones del mismo snapshot sintético."""
+    snapshot = synthetic_snapshot(n_leads, n_users, n_stages, cap, strategy=strategy, aging_hours=aging_hours)
+    best = None
+    for _i in range(repeat):
+        report = simulate(snapshot)
+        team = report["teams"][0]
+        if best is None or team["seconds"] < best["seconds"]:
+            best = team
+    return {
+        "strategy": strategy + (f"+aging{aging_hours}h" if aging_hours else ""),
+        "leads": n_leads,
+        "users": n_users,
+        "stages": n_stages,
+        "assigned": best["assigned"],
+        "skipped": best["skipped"],
+        "seconds": best["seconds"],
+        "us_per_lead": best["seconds"] / max(n_leads, 1) * 1e6,
+        "jain": best["fairness"]["jain"],
+    }
+
+
+def benchmark_scaling(users=(5, 20, 100, 500), leads=(1000, 10000, 100000), n_stages=4, max_us_per_lead=None,
+                      strategies=(("round_robin", 0), ("least_loaded", 0), ("weighted", 0), ("round_robin", 24))):
+    """
+    Matriz estrategia x usuarios x leads. Si se pasa ``max_us_per_lead``
+    devuelve también los casos que lo superan (para cortar un CI ante una regresión).
+    """
+    rows = []
+    for strategy, aging_hours in strategies:
+        for n_users in users:
+            for n_leads in leads:
+                rows.append(benchmark(
+                    n_leads=n_leads, n_users=n_users, n_stages=n_stages,
+                    strategy=strategy, aging_hours=aging_hours,
+                ))
+    print(f"{'estrategia':<18} {'usuarios':>8} {'leads':>8} {'asignados':>9} {'omitidos':>8} {'ms':>9} {'µs/lead':>8} {'jain':>6}")
+    for row in rows:
+        print(
+            f"{row['strategy']:<18} {row['users']:>8} {row['leads']:>8} {row['assigned']:>9} {row['skipped']:>8} "
+            f"{row['seconds'] * 1000:>9.1f} {row['us_per_lead']:>8.2f} {row['jain']:>6.3f}"
+        )
+    slow = [row for row in rows if max_us_per_lead is not None and row["us_per_lead"] > max_us_per_lead]
+    return rows, slow
+
+
+def main(argv):
+    if len(argv) >= 2 and argv[0] == "simulate":
+        with open(argv[1], encoding="utf-8") as fh:
+            report = simulate(json.load(fh))
+        for team in report["teams"]:
+            team.pop("plan")
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+    max_us = None
+    if "--max-us-per-lead" in argv:
+        max_us = float(argv[argv.index("--max-us-per-lead") + 1])
+    _rows, slow = benchmark_scaling(max_us_per_lead=max_us)
+    if slow:
+        print(f"REGRESIÓN: {len(slow)} casos superan {max_us} µs/lead", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
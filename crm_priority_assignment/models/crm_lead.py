@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from collections import Counter
+
+from odoo import api, models
+
+# Campos que cambian la clave (equipo, etapa, usuario) con la que un lead suma carga
+LOAD_FIELDS = frozenset(["team_id", "stage_id", "user_id", "active", "type"])
+
+
+class CrmLead(models.Model):
+    _inherit = "crm.lead"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        leads = super().create(vals_list)
+        self.env["crm.lead.load"]._apply_deltas(self.env["crm.lead.load"]._load_keys(leads))
+        leads._priority_assignment_incremental()
+        return leads
+
+    def write(self, vals):
+        if not LOAD_FIELDS.intersection(vals):
+            return super().write(vals)
+        Load = self.env["crm.lead.load"]
+        deltas = Counter()
+        deltas.subtract(Load._load_keys(self))
+        res = super().write(vals)
+        deltas.update(Load._load_keys(self))
+        Load._apply_deltas(deltas)
+        # Una desasignación explícita (sólo user_id=False) no se reasigna en el acto
+        if not (vals.keys() == {"user_id"} and not vals["user_id"]):
+            self._priority_assignment_incremental()
+        return res
+
+    def unlink(self):
+        Load = self.env["crm.lead.load"]
+        deltas = Counter()
+        deltas.subtract(Load._load_keys(self))
+        res = super().unlink()
+        Load._apply_deltas(deltas)
+        return res
+
+    def _priority_assignment_incremental(self):
+        """Asigna en el momento los leads nuevos o que cambiaron de etapa/equipo y quedaron sin usuario."""
+        if self.env.context.get("crm_priority_assignment_skip"):
+            return
+        Team = self.env["crm.team"]
+        config = Team._priority_assignment_config()
+        if not config["incremental"]:
+            return
+        pending = self.filtered(
+            lambda lead: not lead.user_id and lead.active and lead.type in ("lead", "opportunity")
+            and lead.team_id and lead.stage_id
+            and (not config["team_ids"] or lead.team_id.id in config["team_ids"])
+            and (not config["stage_order"] or lead.stage_id.id in config["stage_order"])
+        )
+        if pending:
+            Team._priority_assignment_assign_leads(pending, config)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import Counter
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+LEAD_TYPES = ("lead", "opportunity")
+UPSERT_CHUNK_SIZE = 500
+
+
+class CrmLeadLoad(models.Model):
+    _name = "crm.lead.load"
+    _description = "Carga de leads abiertos por equipo, etapa y usuario"
+    _log_access = False
+
+    team_id = fields.Many2one("crm.team", string="Equipo", required=True, ondelete="cascade", readonly=True)
+    stage_id = fields.Many2one("crm.stage", string="Etapa", required=True, ondelete="cascade", readonly=True)
+    user_id = fields.Many2one("res.users", string="Usuario", required=True, ondelete="cascade", readonly=True)
+    lead_count = fields.Integer(string="Leads", readonly=True)
+
+    _sql_constraints = [
+        ("team_stage_user_uniq", "unique(team_id, stage_id, user_id)", "Ya existe el contador para ese equipo, etapa y usuario."),
+    ]
+
+    # ============== Mantenimiento ==============
+
+    @api.model
+    def _load_key(self, lead):
+        """Clave (team, stage, user) con la que cuenta el lead, o None si no suma carga."""
+        if not (lead.active and lead.type in LEAD_TYPES and lead.team_id and lead.stage_id and lead.user_id):
+            return None
+        return (lead.team_id.id, lead.stage_id.id, lead.user_id.id)
+
+    @api.model
+    def _load_keys(self, leads):
+        return Counter(key for key in map(self._load_key, leads) if key)
+
+    @api.model
+    def _apply_deltas(self, deltas):
+        """Suma ``deltas`` {(team, stage, user): n} con un UPSERT (en la transacción del cambio)."""
+        # Orden fijo de las claves: dos reasignaciones cruzadas (A→B y B→A) toman los
+        # locks de las mismas filas en el mismo orden y no se bloquean mutuamente
+        rows = sorted(
+            (team_id, stage_id, user_id, delta) for (team_id, stage_id, user_id), delta in deltas.items() if delta
+        )
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+            self.env.cr.execute(
+                "INSERT INTO crm_lead_load (team_id, stage_id, user_id, lead_count)"
+                " VALUES " + ", ".join(["%s"] * len(chunk)) +
+                " ON CONFLICT (team_id, stage_id, user_id)"
+                " DO UPDATE SET lead_count = crm_lead_load.lead_count + EXCLUDED.lead_count",
+                chunk,
+            )
+        if rows:
+            self.invalidate_model(["lead_count"])
+
+    # ============== Lectura ==============
+
+    @api.model
+    def _get_count(self, team_id, stage_id, user_id):
+        """Leads abiertos del usuario en la etapa del equipo (búsqueda por el índice único)."""
+        self.env.cr.execute(
+            "SELECT lead_count FROM crm_lead_load WHERE team_id = %s AND stage_id = %s AND user_id = %s",
+            [team_id, stage_id, user_id],
+        )
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def _get_stage_load(self, team_id, stage_ids, user_ids=None):
+        """Carga {stage_id: {uid: leads}} de un equipo, leída del contador (una consulta)."""
+        load = {sid: {} for sid in stage_ids}
+        if not stage_ids:
+            return load
+        query = "SELECT stage_id, user_id, lead_count FROM crm_lead_load WHERE team_id = %s AND stage_id = ANY(%s)"
+        params = [team_id, list(stage_ids)]
+        if user_ids is not None:
+            query += " AND user_id = ANY(%s)"
+            params.append(list(user_ids))
+        self.env.cr.execute(query, params)
+        for stage_id, user_id, count in self.env.cr.fetchall():
+            load[stage_id][user_id] = count
+        return load
+
+    # ============== Conciliación ==============
+
+    @api.model
+    def _reconcile(self):
+        """
+        Recalcula los contadores desde crm_lead y corrige las diferencias
+        (cambios hechos por SQL, módulos que escriben sin ORM, etc.).
+        Devuelve la cantidad de contadores corregidos.
+
+        La diferencia sale de una sola consulta: leads y contadores se leen de la
+        misma instantánea, y un cambio confirmado en el medio (que mueve ambos en
+        su transacción) no cuenta como desvío. Se aplica como incremento, así que
+        tampoco pisa los cambios confirmados después.
+        """
+        self.env["crm.lead"].flush_model(["team_id", "stage_id", "user_id", "active", "type"])
+        self.env.cr.execute(
+            """
+            WITH actual AS (
+                SELECT team_id, stage_id, user_id, count(*) AS lead_count FROM crm_lead
+                 WHERE active AND type IN %s
+                   AND team_id IS NOT NULL AND stage_id IS NOT NULL AND user_id IS NOT NULL
+                 GROUP BY team_id, stage_id, user_id
+            )
+            SELECT team_id, stage_id, user_id,
+                   coalesce(a.lead_count, 0) - coalesce(l.lead_count, 0)
+              FROM actual a
+              FULL OUTER JOIN crm_lead_load l USING (team_id, stage_id, user_id)
+             WHERE coalesce(a.lead_count, 0) <> coalesce(l.lead_count, 0)
+            """,
+            [LEAD_TYPES],
+        )
+        drift = {(t, s, u): delta for t, s, u, delta in self.env.cr.fetchall()}
+        self._apply_deltas(drift)
+        self.env.cr.execute("DELETE FROM crm_lead_load WHERE lead_count <= 0")
+        if drift:
+            _logger.warning("crm.lead.load: %s contadores corregidos", len(drift))
+            self.env["legacy.log.sink"].log(
+                "crm_priority_assignment",
+                "WARNING",
+                f"Conciliación de carga: {len(drift)} contadores corregidos",
+                func="_reconcile",
+                path=__name__,
+            )
+        return len(drift)
+
+    @api.model
+    def _cron_reconcile(self):
+        return self._reconcile()
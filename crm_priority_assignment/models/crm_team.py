@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import api, models
+
+from .assignment_plan import STRATEGIES, UserRing, get_strategy, plan_stage, plan_team, simulate
+
+_logger = logging.getLogger(__name__)
+
+PARAM_PREFIX = "crm_priority_assignment"
+DEFAULT_TEAM_IDS = "1"
+DEFAULT_STAGE_ORDER = "1,3,2,6"
+DEFAULT_CAP = 5
+DEFAULT_BATCH_LIMIT = 200
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_STRATEGY = "round_robin"
+# Valor de team_ids / stage_order para "todos" (vacío no se puede guardar: vuelve al default)
+ALL_IDS = "*"
+# Primer entero de pg_try_advisory_xact_lock(int, int); el segundo es el id del equipo
+ADVISORY_LOCK_NAMESPACE = 0x43524D41
+LEAD_TYPES = ("lead", "opportunity")
+
+
+def _parse_ids(raw):
+    """IDs separados por coma; ``ALL_IDS`` (o nada reconocible) da [] = todos."""
+    ids = []
+    for part in (raw or "").replace(";", ",").split(","):
+        part = part.strip()
+        if part.isdigit():
+            ids.append(int(part))
+    return ids
+
+
+class CrmTeam(models.Model):
+    _inherit = "crm.team"
+
+    # ============== Configuración y logs ==============
+
+    @api.model
+    def _priority_assignment_config(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+
+        def gp_int(key, default):
+            try:
+                return max(0, int(ICP.get_param(f"{PARAM_PREFIX}.{key}", default)))
+            except (TypeError, ValueError):
+                return default
+
+        def gp_positive(key, default):
+            # 0 no se puede guardar desde los ajustes (borra el parámetro): tampoco vale a mano
+            return gp_int(key, default) or default
+
+        strategy = ICP.get_param(f"{PARAM_PREFIX}.strategy", DEFAULT_STRATEGY)
+        return {
+            "team_ids": _parse_ids(ICP.get_param(f"{PARAM_PREFIX}.team_ids", DEFAULT_TEAM_IDS)),
+            "stage_order": _parse_ids(ICP.get_param(f"{PARAM_PREFIX}.stage_order", DEFAULT_STAGE_ORDER)),
+            "default_cap": gp_positive("default_cap", DEFAULT_CAP),
+            "batch_limit": gp_positive("batch_limit_per_team", DEFAULT_BATCH_LIMIT),
+            "schedule_call": ICP.get_param(f"{PARAM_PREFIX}.schedule_call", "False") in ("True", "1"),
+            "max_workers": gp_int("max_workers", DEFAULT_MAX_WORKERS) or 1,
+            "incremental": ICP.get_param(f"{PARAM_PREFIX}.incremental", "False") in ("True", "1"),
+            "strategy": strategy if strategy in STRATEGIES else DEFAULT_STRATEGY,
+            "aging_hours": gp_int("stage_aging_hours", 0),
+        }
+
+    def _priority_assignment_log(self, level, message, func=""):
+        team = self[:1]
+        prefix = f"[TEAM:{team.name}] " if team else ""
+        _logger.log(logging.getLevelName(level), "%s%s", prefix, message)
+        self.env["legacy.log.sink"].log(
+            "crm_priority_assignment",
+            level,
+            prefix + message,
+            func=func,
+            path=__name__,
+        )
+
+    # ============== Datos del equipo ==============
+
+    @api.model
+    def _priority_assignment_stage_cap(self, stage, default_cap):
+        """Tope por usuario de la etapa (x_cc_cap_per_user); sin campo o sin valor usa ``default_cap``."""
+        if not stage or "x_cc_cap_per_user" not in stage._fields:
+            return default_cap
+        cap = stage.x_cc_cap_per_user
+        if cap is None:
+            return default_cap
+        try:
+            return max(0, int(cap))
+        except (TypeError, ValueError):
+            return default_cap
+
+    def _priority_assignment_users(self):
+        """Miembros activos y disponibles del equipo con peso mayor que 0, ordenados por id."""
+        self.ensure_one()
+        Users = self.env["res.users"].sudo()
+        excluded = {
+            member.user_id.id
+            for member in self.sudo().crm_team_member_ids
+            if member.priority_assignment_weight <= 0
+        }
+        user_ids = [uid for uid in self.member_ids.ids if uid not in excluded]
+        if not user_ids:
+            return Users
+        domain = [("id", "in", user_ids), ("active", "=", True)]
+        # switches opcionales si existen en la BD
+        if "x_studio_x_cc_state" in Users._fields:
+            domain.append(("x_studio_x_cc_state", "=", True))
+        if "x_studio_estado_call" in Users._fields:
+            domain.append(("x_studio_estado_call", "=", "available"))
+        return Users.search(domain, order="id")
+
+    def _priority_assignment_weights(self):
+        """Peso de cada miembro del equipo {uid: peso} para la estrategia ponderada."""
+        self.ensure_one()
+        return {
+            member.user_id.id: member.priority_assignment_weight
+            for member in self.sudo().crm_team_member_ids
+            if member.user_id
+        }
+
+    def _priority_assignment_stage_ids(self, stage_order):
+        self.ensure_one()
+        if stage_order:
+            existing = set(self.env["crm.stage"].sudo().browse(stage_order).exists().ids)
+            return [sid for sid in stage_order if sid in existing]
+        # Sin orden configurado: etapas con pendientes, por id
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT stage_id FROM crm_lead
+             WHERE team_id = %s AND user_id IS NULL AND active AND type IN %s AND stage_id IS NOT NULL
+             ORDER BY stage_id
+            """,
+            [self.id, LEAD_TYPES],
+        )
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def _priority_assignment_load(self, user_ids, stage_ids):
+        """Carga actual {stage_id: {uid: leads abiertos}}, leída de crm.lead.load."""
+        self.ensure_one()
+        if not user_ids:
+            return {sid: {} for sid in stage_ids}
+        return self.env["crm.lead.load"]._get_stage_load(self.id, stage_ids, user_ids)
+
+    def _priority_assignment_lock_pending(self, stage_id, limit, lock=True, with_age=False):
+        """
+        Ids de leads sin asignar de la etapa, más antiguos primero, bloqueados para
+        esta transacción. SKIP LOCKED evita que dos corridas tomen el mismo lead.
+        Con ``lock=False`` sólo se leen (simulación); con ``with_age`` devuelve
+        pares (id, segundos desde la creación).
+        """
+        self.ensure_one()
+        if limit <= 0:
+            return []
+        self.env.cr.execute(
+            """
+            SELECT id, EXTRACT(EPOCH FROM (now() AT TIME ZONE 'UTC' - create_date))::float
+              FROM crm_lead
+             WHERE team_id = %s AND stage_id = %s AND user_id IS NULL
+               AND active AND type IN %s
+             ORDER BY create_date, id
+             LIMIT %s
+            """ + ("FOR UPDATE SKIP LOCKED" if lock else ""),
+            [self.id, stage_id, LEAD_TYPES, limit],
+        )
+        if with_age:
+            return [(lead_id, age or 0.0) for lead_id, age in self.env.cr.fetchall()]
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    # ============== Motor ==============
+
+    def _priority_assignment_apply(self, plan, schedule_call=False):
+        """Escribe el plan {uid: [lead_ids]} con un write por usuario (sin tracking ni mails)."""
+        Lead = self.env["crm.lead"].sudo().with_context(
+            tracking_disable=True, mail_notrack=True, crm_priority_assignment_skip=True
+        )
+        for uid, lead_ids in plan.items():
+            leads = Lead.browse(lead_ids)
+            leads.write({"user_id": uid})
+            if schedule_call:
+                self._priority_assignment_schedule_call(leads, uid)
+
+    def _priority_assignment_schedule_call(self, leads, user_id):
+        try:
+            if self.env.ref("mail.mail_activity_data_call", raise_if_not_found=False):
+                leads.activity_schedule("mail.mail_activity_data_call", user_id=user_id, summary="Llamar lead")
+        except Exception as e:
+            self._priority_assignment_log("ERROR", f"Error al agendar llamada para leads {leads.ids}: {e}")
+
+    def _priority_assignment_run_team(self, config):
+        """Asigna los pendientes del equipo; devuelve (assigned, skipped)."""
+        self.ensure_one()
+        users = self._priority_assignment_users()
+        if not users:
+            self._priority_assignment_log("WARNING", "Sin usuarios disponibles", "_priority_assignment_run_team")
+            return 0, 0
+        user_ids = users.ids
+
+        stage_ids = self._priority_assignment_stage_ids(config["stage_order"])
+        if not stage_ids:
+            self._priority_assignment_log("INFO", "Sin etapas para procesar (no hay pendientes).", "_priority_assignment_run_team")
+            return 0, 0
+
+        has_pointer = "x_studio_ultimo_asignado" in self._fields
+        last_uid = self.x_studio_ultimo_asignado.id if has_pointer else False
+        load = self._priority_assignment_load(user_ids, stage_ids)
+        stages = {stage.id: stage for stage in self.env["crm.stage"].sudo().browse(stage_ids)}
+        caps = {sid: self._priority_assignment_stage_cap(stages[sid], config["default_cap"]) for sid in stage_ids}
+        ring = UserRing(user_ids)
+        strategy = get_strategy(config["strategy"], ring, last_uid, self._priority_assignment_weights())
+
+        assigned = skipped = 0
+        if config["aging_hours"]:
+            # Etapas intercaladas por antigüedad: hacen falta los pendientes de
+            # todas las etapas antes de planificar (se bloquean hasta batch_limit
+            # por etapa; los que no entran se liberan al confirmar).
+            pending = [
+                (sid, caps[sid], self._priority_assignment_lock_pending(sid, config["batch_limit"], with_age=True))
+                for sid in stage_ids
+            ]
+            plan, assigned, skipped, last_uid = plan_team(
+                pending, ring, last_uid, load, config["batch_limit"],
+                strategy=strategy, aging_hours=config["aging_hours"],
+            )
+            for stage_id in stage_ids:
+                stage_plan = plan.get(stage_id)
+                if not stage_plan:
+                    continue
+                self._priority_assignment_apply(stage_plan, schedule_call=config["schedule_call"])
+                self._priority_assignment_log(
+                    "INFO",
+                    f"Etapa {stages[stage_id].name} ({stage_id}) → asignados:{sum(len(ids) for ids in stage_plan.values())} "
+                    f"cap:{caps[stage_id]} (antigüedad {config['aging_hours']}h)",
+                    "_priority_assignment_run_team",
+                )
+        else:
+            total_left = config["batch_limit"]
+            for stage_id in stage_ids:
+                if total_left <= 0:
+                    break
+                pending = self._priority_assignment_lock_pending(stage_id, total_left)
+                if not pending:
+                    continue
+                cap = caps[stage_id]
+                plan, stage_skipped, last_uid = plan_stage(
+                    pending, ring, last_uid, load[stage_id], cap, limit=total_left, strategy=strategy, stage_id=stage_id
+                )
+                self._priority_assignment_apply(plan, schedule_call=config["schedule_call"])
+                count = sum(len(ids) for ids in plan.values())
+                assigned += count
+                skipped += stage_skipped
+                total_left -= count
+                self._priority_assignment_log(
+                    "INFO",
+                    f"Etapa {stages[stage_id].name} ({stage_id}) → asignados:{count} omitidos:{stage_skipped} cap:{cap}",
+                    "_priority_assignment_run_team",
+                )
+
+        if has_pointer and last_uid != self.x_studio_ultimo_asignado.id:
+            self.sudo().write({"x_studio_ultimo_asignado": last_uid or False})
+        return assigned, skipped
+
+    @api.model
+    def _priority_assignment_assign_leads(self, leads, config):
+        """
+        Asignación incremental: reparte ``leads`` (sin usuario) contra los
+        contadores de crm.lead.load, sin recalcular la carga desde crm_lead.
+
+        Si el equipo está tomado por otra corrida, los leads quedan para el
+        barrido del cron.
+        """
+        Load = self.env["crm.lead.load"]
+        stage_rank = {sid: i for i, sid in enumerate(config["stage_order"])}
+        leads = leads.sudo().sorted(lambda lead: (lead.create_date, lead.id))
+        for team in leads.team_id.sudo():
+            team_leads = leads.filtered(lambda lead: lead.team_id == team)
+            if not self._priority_assignment_try_lock(team.id):
+                continue
+            user_ids = team._priority_assignment_users().ids
+            if not user_ids:
+                continue
+            ring = UserRing(user_ids)
+            stages = team_leads.stage_id.sorted(lambda stage: (stage_rank.get(stage.id, len(stage_rank)), stage.id))
+            load = Load._get_stage_load(team.id, stages.ids, user_ids)
+            has_pointer = "x_studio_ultimo_asignado" in team._fields
+            last_uid = team.x_studio_ultimo_asignado.id if has_pointer else False
+            strategy = get_strategy(config["strategy"], ring, last_uid, team._priority_assignment_weights())
+            for stage in stages:
+                cap = self._priority_assignment_stage_cap(stage, config["default_cap"])
+                lead_ids = team_leads.filtered(lambda lead: lead.stage_id == stage).ids
+                plan, skipped, last_uid = plan_stage(
+                    lead_ids, ring, last_uid, load[stage.id], cap, strategy=strategy, stage_id=stage.id
+                )
+                team._priority_assignment_apply(plan, schedule_call=config["schedule_call"])
+                if plan:
+                    team._priority_assignment_log(
+                        "INFO",
+                        f"Incremental etapa {stage.name} ({stage.id}) → asignados:{len(lead_ids) - skipped} omitidos:{skipped}",
+                        "_priority_assignment_assign_leads",
+                    )
+            if has_pointer and last_uid != team.x_studio_ultimo_asignado.id:
+                team.write({"x_studio_ultimo_asignado": last_uid or False})
+
+    # ============== Simulación ==============
+
+    @api.model
+    def _priority_assignment_snapshot(self, team_ids=None):
+        """
+        Foto de lo que procesaría una corrida (equipos, usuarios, etapas, topes,
+        cargas y pendientes), en el formato de ``assignment_plan.simulate``.
+        Sólo lee: no bloquea ni modifica leads.
+        """
+        config = self._priority_assignment_config()
+        Team = self.sudo().with_context(active_test=False)
+        team_ids = team_ids if team_ids is not None else config["team_ids"]
+        teams = Team.browse(team_ids).exists() if team_ids else Team.search([])
+        snapshot = {
+            "batch_limit": config["batch_limit"],
+            "strategy": config["strategy"],
+            "aging_hours": config["aging_hours"],
+            "teams": [],
+        }
+        for team in teams:
+            user_ids = team._priority_assignment_users().ids
+            stage_ids = team._priority_assignment_stage_ids(config["stage_order"])
+            load = team._priority_assignment_load(user_ids, stage_ids)
+            stages = self.env["crm.stage"].sudo().browse(stage_ids)
+            snapshot["teams"].append({
+                "id": team.id,
+                "name": team.name,
+                "user_ids": user_ids,
+                "last_uid": team.x_studio_ultimo_asignado.id if "x_studio_ultimo_asignado" in team._fields else False,
+                "weights": [[uid, weight] for uid, weight in team._priority_assignment_weights().items()],
+                "stages": [
+                    {
+                        "id": stage.id,
+                        "cap": self._priority_assignment_stage_cap(stage, config["default_cap"]),
+                        "pending": team._priority_assignment_lock_pending(
+                            stage.id, config["batch_limit"], lock=False, with_age=bool(config["aging_hours"])
+                        ),
+                        "load": [[uid, count] for uid, count in load[stage.id].items()],
+                    }
+                    for stage in stages
+                ],
+            })
+        return snapshot
+
+    @api.model
+    def _priority_assignment_dry_run(self, team_ids=None):
+        """Plan, métricas de reparto y tiempos de una corrida, sin escribir nada."""
+        report = simulate(self._priority_assignment_snapshot(team_ids=team_ids))
+        for team in report["teams"]:
+            self.browse(team["id"])._priority_assignment_log(
+                "INFO",
+                f"Simulación → asignados:{team['assigned']} omitidos:{team['skipped']} "
+                f"jain:{team['fairness']['jain']} spread:{team['fairness']['spread']} ({team['seconds'] * 1000:.1f} ms)",
+                "_priority_assignment_dry_run",
+            )
+        return report
+
+    @api.model
+    def _priority_assignment_try_lock(self, team_id):
+        """Lock de transacción por equipo: otra corrida sobre el mismo equipo lo saltea."""
+        self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [ADVISORY_LOCK_NAMESPACE, team_id])
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _priority_assignment_run_team_locked(self, team_id, config):
+        """Corre un equipo bajo su advisory lock; devuelve el resultado con su tiempo."""
+        result = {"team_id": team_id, "status": "done", "assigned": 0, "skipped": 0, "seconds": 0.0, "error": ""}
+        started = time.monotonic()
+        if not self._priority_assignment_try_lock(team_id):
+            result["status"] = "locked"
+        else:
+            team = self.sudo().with_context(active_test=False).browse(team_id)
+            result["assigned"], result["skipped"] = team._priority_assignment_run_team(config)
+        result["seconds"] = time.monotonic() - started
+        return result
+
+    @api.model
+    def _priority_assignment_run_team_job(self, team_id, config):
+        """
+        Un equipo en su propio cursor y transacción: se confirma o revierte sin
+        esperar a los demás equipos, y puede correr en otro thread.
+        """
+        try:
+            with self.env.registry.cursor() as cr:
+                env = api.Environment(cr, self.env.uid, self.env.context)
+                return env["crm.team"]._priority_assignment_run_team_locked(team_id, config)
+        except Exception as e:
+            _logger.exception("Asignación por prioridad: error en el equipo %s", team_id)
+            return {"team_id": team_id, "status": "error", "assigned": 0, "skipped": 0, "seconds": 0.0, "error": str(e)}
+
+    @api.model
+    def _run_priority_assignment(self, team_ids=None, max_workers=None):
+        """
+        Corre la asignación para los equipos configurados (o ``team_ids``).
+
+        Cada equipo se procesa en su propia transacción, protegido por un
+        advisory lock con el id del equipo: varias corridas (crons en distintos
+        workers, la acción manual) pueden convivir sin asignar dos veces. Hasta
+        ``max_workers`` equipos corren en paralelo.
+        """
+        config = self._priority_assignment_config()
+        Team = self.sudo().with_context(active_test=False)
+        team_ids = team_ids if team_ids is not None else config["team_ids"]
+        teams = Team.browse(team_ids).exists() if team_ids else Team.search([])
+        if not teams:
+            self._priority_assignment_log("ERROR", "No se encontraron equipos. Revisar equipos configurados.", "_run_priority_assignment")
+            return {"teams": 0, "assigned": 0, "skipped": 0, "results": []}
+
+        started = time.monotonic()
+        if self.env.registry.in_test_mode():
+            # En tests no se abren cursores nuevos: todo en la transacción actual
+            results = [self._priority_assignment_run_team_locked(team_id, config) for team_id in teams.ids]
+        else:
+            workers = max(1, min(max_workers or config["max_workers"], len(teams)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crm_priority_assignment") as executor:
+                results = list(executor.map(lambda team_id: self._priority_assignment_run_team_job(team_id, config), teams.ids))
+
+        names = dict(zip(teams.ids, teams.mapped("name")))
+        total_assigned = total_skipped = 0
+        for result in results:
+            total_assigned += result["assigned"]
+            total_skipped += result["skipped"]
+            if result["status"] == "locked":
+                message, level = "Otra corrida está procesando el equipo; se omite.", "INFO"
+            elif result["status"] == "error":
+                message, level = f"Error: {result['error']}", "ERROR"
+            else:
+                message, level = f"Equipo listo → asignados:{result['assigned']} omitidos:{result['skipped']}", "INFO"
+            self._priority_assignment_log(
+                level,
+                f"[TEAM:{names[result['team_id']]}] {message} ({result['seconds']:.2f}s)",
+                "_run_priority_assignment",
+            )
+        self._priority_assignment_log(
+            "INFO",
+            f"Asignación completada en {time.monotonic() - started:.2f}s - equipos:{len(teams)} "
+            f"asignados:{total_assigned} omitidos:{total_skipped}",
+            "_run_priority_assignment",
+        )
+        return {"teams": len(teams), "assigned": total_assigned, "skipped": total_skipped, "results": results}
+
+    @api.model
+    def _cron_priority_assignment(self, team_ids=None):
+        """Punto de entrada del cron; ``team_ids`` permite repartir equipos entre varios crons."""
+        return self._run_priority_assignment(team_ids=team_ids)
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class CrmTeamMember(models.Model):
+    _inherit = "crm.team.member"
+
+    priority_assignment_weight = fields.Float(
+        string="Peso de asignación",
+        default=1.0,
+        help="Con la estrategia ponderada, un peso 2 recibe el doble de leads que un peso 1. "
+        "0 excluye al usuario de la asignación por prioridad con cualquier estrategia.",
+    )
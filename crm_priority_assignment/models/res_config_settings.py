@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+from .crm_team import (
+    ALL_IDS,
+    DEFAULT_BATCH_LIMIT,
+    DEFAULT_CAP,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_STAGE_ORDER,
+    DEFAULT_STRATEGY,
+    DEFAULT_TEAM_IDS,
+    PARAM_PREFIX,
+)
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    crm_priority_assignment_team_ids = fields.Char(
+        string="Equipos",
+        config_parameter=f"{PARAM_PREFIX}.team_ids",
+        default=DEFAULT_TEAM_IDS,
+        help=f"IDs de equipos de venta separados por coma. {ALL_IDS} = todos (vacío vuelve al valor por defecto).",
+    )
+    crm_priority_assignment_stage_order = fields.Char(
+        string="Orden de etapas",
+        config_parameter=f"{PARAM_PREFIX}.stage_order",
+        default=DEFAULT_STAGE_ORDER,
+        help=f"IDs de etapas en orden de prioridad, separados por coma. {ALL_IDS} = etapas con pendientes, "
+        "por id (vacío vuelve al valor por defecto).",
+    )
+    crm_priority_assignment_default_cap = fields.Integer(
+        string="Tope por defecto",
+        config_parameter=f"{PARAM_PREFIX}.default_cap",
+        default=DEFAULT_CAP,
+        help="Tope por usuario cuando la etapa no define x_cc_cap_per_user. Mayor que 0 "
+        "(0 vuelve al valor por defecto).",
+    )
+    crm_priority_assignment_batch_limit = fields.Integer(
+        string="Leads por corrida y equipo",
+        config_parameter=f"{PARAM_PREFIX}.batch_limit_per_team",
+        default=DEFAULT_BATCH_LIMIT,
+        help="Mayor que 0 (0 vuelve al valor por defecto).",
+    )
+    crm_priority_assignment_max_workers = fields.Integer(
+        string="Equipos en paralelo",
+        config_parameter=f"{PARAM_PREFIX}.max_workers",
+        default=DEFAULT_MAX_WORKERS,
+        help="Cada equipo usa su propia conexión a la base mientras se procesa.",
+    )
+    crm_priority_assignment_strategy = fields.Selection(
+        [
+            ("round_robin", "Round-robin"),
+            ("least_loaded", "Menos cargado"),
+            ("weighted", "Ponderada por peso del miembro"),
+        ],
+        string="Estrategia",
+        config_parameter=f"{PARAM_PREFIX}.strategy",
+        default=DEFAULT_STRATEGY,
+    )
+    crm_priority_assignment_aging_hours = fields.Integer(
+        string="Horas por nivel de antigüedad",
+        config_parameter=f"{PARAM_PREFIX}.stage_aging_hours",
+        help="Cada tantas horas de espera un lead sube una etapa en la prioridad. 0 = etapas estrictamente en orden.",
+    )
+    crm_priority_assignment_incremental = fields.Boolean(
+        string="Asignación inmediata",
+        config_parameter=f"{PARAM_PREFIX}.incremental",
+        help="Asigna cada lead al crearse o al cambiar de etapa/equipo, usando los contadores de carga. "
+        "El cron sigue barriendo lo que quede pendiente.",
+    )
+    crm_priority_assignment_schedule_call = fields.Boolean(
+        string="Agendar llamada al asignar",
+        config_parameter=f"{PARAM_PREFIX}.schedule_call",
+    )
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del planificador puro (models/assignment_plan.py), sin Odoo::
+
+    python3 -m pytest crm_priority_assignment/tests
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "models"))
+
+from assignment_plan import (  # noqa: E402
+    CAP_INF,
+    UserRing,
+    benchmark_scaling,
+    get_strategy,
+    plan_stage,
+    plan_team,
+    simulate,
+    synthetic_snapshot,
+)
+
+# Tope de µs por lead para cortar ante una regresión (holgado: hoy ronda 2 µs)
+MAX_US_PER_LEAD = 50.0
+
+
+def next_user_rr_with_capacity(ordered_user_ids, last_id, load, cap):
+    """Copia de la función de la automatización AsignacionporPrioridad."""
+    if not ordered_user_ids:
+        return False
+
+    if last_id and last_id in ordered_user_ids:
+        start = (ordered_user_ids.index(last_id) + 1) % len(ordered_user_ids)
+    else:
+        start = 0
+
+    if cap >= CAP_INF:
+        return ordered_user_ids[start]
+
+    L = len(ordered_user_ids)
+    for k in range(L):
+        uid = ordered_user_ids[(start + k) % L]
+        if load.get(uid, 0) < cap:
+            return uid
+    return False
+
+
+def legacy_plan_stage(lead_ids, user_ids, last_id, load, cap):
+    """Bucle de process_stage_for_team sin la verificación en vivo."""
+    plan = {}
+    skipped = 0
+    for lead_id in lead_ids:
+        uid = next_user_rr_with_capacity(user_ids, last_id, load, cap)
+        if not uid:
+            skipped += 1
+            continue
+        plan.setdefault(uid, []).append(lead_id)
+        load[uid] = load.get(uid, 0) + 1
+        last_id = uid
+    return plan, skipped, last_id
+
+
+# ============== Round-robin ==============
+
+@pytest.mark.parametrize("seed", range(200))
+def test_round_robin_matches_legacy(seed):
+    rnd = random.Random(seed)
+    user_ids = sorted(rnd.sample(range(1, 60), rnd.randint(1, 12)))
+    cap = rnd.choice((CAP_INF, 0, 1, 2, 3, 5))
+    load = {uid: rnd.randint(0, 4) for uid in user_ids if rnd.random() < 0.7}
+    last_uid = rnd.choice(user_ids + [False, 999])
+    lead_ids = list(range(1000, 1000 + rnd.randint(0, 40)))
+
+    expected_load = dict(load)
+    expected = legacy_plan_stage(lead_ids, user_ids, last_uid, expected_load, cap)
+    plan, skipped, new_last = plan_stage(lead_ids, user_ids, last_uid, load, cap)
+
+    assert (plan, skipped, new_last or False) == (expected[0], expected[1], expected[2] or False)
+    assert load == expected_load
+
+
+def test_round_robin_starts_after_last_assigned():
+    plan, skipped, last_uid = plan_stage([1, 2, 3, 4], [10, 20, 30], 20, {}, CAP_INF)
+    assert plan == {30: [1, 4], 10: [2], 20: [3]}
+    assert (skipped, last_uid) == (0, 30)
+
+
+def test_pointer_is_shared_between_stages():
+    ring = UserRing([1, 2, 3])
+    for name in ("round_robin", "least_loaded", "weighted"):
+        strategy = get_strategy(name, ring, False)
+        first = [strategy.pick(10, {}, CAP_INF) for _i in range(2)]
+        second = [strategy.pick(20, {}, CAP_INF) for _i in range(3)]
+        assert first == [1, 2], name
+        assert second == [3, 1, 2], name
+
+
+def test_empty_team():
+    assert plan_stage([1, 2], [], 5, {}, 3) == ({}, 0, 5)
+    assert plan_team([(1, 3, [1, 2])], [], 5, {}, 10) == ({}, 0, 0, 5)
+
+
+# ============== Topes ==============
+
+def test_cap_is_never_exceeded():
+    load = {1: 2, 2: 0, 3: 1}
+    plan, skipped, _last = plan_stage(list(range(100, 110)), [1, 2, 3], False, load, 3)
+    assert load == {1: 3, 2: 3, 3: 3}
+    assert sum(len(ids) for ids in plan.values()) == 6
+    assert skipped == 4
+
+
+def test_user_at_cap_gets_nothing():
+    plan, _skipped, _last = plan_stage([1, 2, 3], [1, 2], False, {1: 5}, 5)
+    assert plan == {2: [1, 2, 3]}
+
+
+def test_limit_and_batch_limit():
+    plan, skipped, _last = plan_stage(list(range(10)), [1, 2], False, {}, CAP_INF, limit=3)
+    assert sum(len(ids) for ids in plan.values()) == 3
+    assert skipped == 0
+
+    stages = [(1, CAP_INF, list(range(100, 105))), (2, CAP_INF, list(range(200, 205)))]
+    plan, assigned, skipped, _last = plan_team(stages, [1, 2], False, {}, 7)
+    assert assigned == 7
+    assert sum(len(ids) for ids in plan[1].values()) == 5
+    assert sum(len(ids) for ids in plan[2].values()) == 2
+
+
+def test_full_stage_moves_on_to_next():
+    stages = [(1, 1, [100, 101, 102]), (2, CAP_INF, [200])]
+    plan, assigned, skipped, _last = plan_team(stages, [1, 2], False, {}, 10)
+    assert sum(len(ids) for ids in plan[1].values()) == 2
+    assert plan[2]
+    assert (assigned, skipped) == (3, 1)
+
+
+# ============== Estrategias ==============
+
+def test_least_loaded_evens_out_load():
+    load = {1: 4, 2: 0, 3: 2}
+    plan_stage(list(range(6)), [1, 2, 3], False, load, CAP_INF, strategy="least_loaded")
+    assert load == {1: 4, 2: 4, 3: 4}
+
+
+def test_weighted_follows_weights():
+    weights = {1: 2.0, 2: 1.0, 3: 0}
+    plan, _skipped, _last = plan_stage(
+        list(range(30)), [1, 2, 3], False, {}, CAP_INF, strategy="weighted", weights=weights
+    )
+    assert len(plan[1]) == 20
+    assert len(plan[2]) == 10
+    assert 3 not in plan
+
+
+def test_weighted_accounts_for_current_load():
+    load = {1: 4, 2: 0}
+    plan_stage(list(range(8)), [1, 2], False, load, CAP_INF, strategy="weighted", weights={1: 1.0, 2: 1.0})
+    assert load == {1: 6, 2: 6}
+
+
+def test_weighted_respects_cap():
+    load = {}
+    plan, skipped, _last = plan_stage(
+        list(range(10)), [1, 2], False, load, 3, strategy="weighted", weights={1: 5.0, 2: 1.0}
+    )
+    assert load == {1: 3, 2: 3}
+    assert skipped == 4
+
+
+def test_unknown_strategy_falls_back_to_round_robin():
+    assert get_strategy("nope", UserRing([1])).name == "round_robin"
+
+
+# ============== Antigüedad ==============
+
+HOUR = 3600
+
+
+def test_without_aging_stages_go_in_order():
+    stages = [(1, CAP_INF, [(100, 0)]), (2, CAP_INF, [(200, 100 * HOUR)])]
+    plan, assigned, _skipped, _last = plan_team(stages, [1], False, {}, 1)
+    assert plan == {1: {1: [100]}}
+    assert assigned == 1
+
+
+def test_aging_lets_old_leads_jump_stages():
+    stages = [(1, CAP_INF, [(100, 0)]), (2, CAP_INF, [(200, 30 * HOUR)])]
+    plan, _assigned, _skipped, _last = plan_team(stages, [1], False, {}, 1, aging_hours=24)
+    assert plan == {2: {1: [200]}}
+
+    plan, _assigned, _skipped, _last = plan_team(stages, [1], False, {}, 1, aging_hours=48)
+    assert plan == {1: {1: [100]}}
+
+
+def test_aging_skips_full_stages():
+    stages = [(1, 1, [(100, 10 * HOUR), (101, 9 * HOUR), (102, 8 * HOUR)]), (2, CAP_INF, [(200, 0)])]
+    plan, assigned, skipped, _last = plan_team(stages, [1, 2], False, {}, 10, aging_hours=24)
+    assert sum(len(ids) for ids in plan[1].values()) == 2
+    assert plan[2]
+    assert (assigned, skipped) == (3, 1)
+
+
+# ============== Simulador y rendimiento ==============
+
+def test_simulate_does_not_modify_snapshot():
+    snapshot = synthetic_snapshot(500, 5, strategy="weighted", aging_hours=24)
+    stages_before = [dict(stage, load=list(stage["load"])) for stage in snapshot["teams"][0]["stages"]]
+    report = simulate(snapshot)
+    assert snapshot["teams"][0]["stages"] == stages_before
+    team = report["teams"][0]
+    assert team["assigned"] + team["skipped"] <= 500
+    assert 0 < team["fairness"]["jain"] <= 1.0
+
+
+def test_no_performance_regression():
+    _rows, slow = benchmark_scaling(users=(20, 500), leads=(10000,), max_us_per_lead=MAX_US_PER_LEAD)
+    assert not slow, slow
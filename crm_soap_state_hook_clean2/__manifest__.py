@@ -3,9 +3,11 @@
     'version': '18.0.1.0.0',
     'category': 'CRM',
     'summary': 'Hook SOAP en Ganado/Perdido con logging',
-    'depends': ['crm'],
+    'depends': ['crm', 'legacy_integration'],
     'data': [
+        'data/ir_cron.xml',
         'views/res_config_settings_views.xml',
+        'views/crm_soap_outbox_views.xml',
         'views/logging_menu.xml',
         'views/crm_lead_views.xml',
         'wizard/state_confirm_wizard_views.xml',
@@ -1,2 +1,3 @@
 from . import crm_lead
+from . import crm_soap_outbox
 from . import res_config_settings
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
-import html
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from xml.etree import ElementTree as ET
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import UserError, ValidationError
 
 from urllib.parse import urljoin
 
+from .soap_envelopes import build_state_change_envelope, build_ws_e03_envelope
+from .soap_responses import SnippetReader, parse_ws_e03_response
+from .soap_settings import SoapHookSettings
+
 
 _LOGGER_NAME = "odoo.addons.crm_soap_state_hook.models.crm_lead"
 E03_REPORT_BASE_URL = "http://webinterna.eft.ar/"
@@ -22,22 +26,32 @@ class CrmLead(models.Model):
     def _logger(self):
         return logging.getLogger(_LOGGER_NAME)
 
-    def _log_db(self, level: str, message: str, func: str = ""):
-        """Persiste en ir.logging para el menú."""
-        ICP = self.env["ir.config_parameter"].sudo()
-        if ICP.get_param("crm_soap_state_hook.log.db.enable", "True") not in ("True", "1"):
+    def _log_db(self, level: str, message: str, func: str = "", **call):
+        """Encola el log en integration.log para el menú (se inserta al terminar la transacción).
+
+        ``call`` son los datos estructurados de la llamada (``request_ref``,
+        ``response``, ``http_status``...), ver ``legacy.log.sink.log``.
+        """
+        if not self._crm_soap_settings().log_db_enable:
             return
-        vals = {
-            "name": "crm_soap_state_hook",
-            "type": "server",
-            "dbname": self.env.cr.dbname,
-            "level": (level or "INFO").upper(),
-            "message": message or "",
-            "path": __name__,
-            "line": "0",
-            "func": func or "_log_db",
-        }
-        self.env["ir.logging"].sudo().create(vals)
+        self.env["legacy.log.sink"].log(
+            "crm_soap_state_hook",
+            level,
+            message,
+            func=func or "_log_db",
+            path=__name__,
+            lead_id=self.id if len(self) == 1 else None,
+            **call,
+        )
+
+    # ============== Configuración ==============
+
+    @api.model
+    @tools.ormcache()
+    def _crm_soap_settings(self) -> SoapHookSettings:
+        """Parámetros del hook, leídos una vez y cacheados hasta que cambie la configuración."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        return SoapHookSettings.from_params(ICP.get_param)
 
     ws_e03_contract_url = fields.Char(
         string="URL Contrato WS E03",
@@ -151,135 +165,169 @@ class CrmLead(models.Model):
          - Tag 'Logicacambioestado' (con 'c' minúscula)
          - Sin declaración XML inicial
         """
-        usucod_x = html.escape((usucod or "").strip())
-        riepedid_x = html.escape((str(riepedid) or "").strip())
-        riecod_x = html.escape((riepedinfrespcod or "").strip())
-        mensaje_x = html.escape((mensaje or "").strip())
-        logica_u = (logica or "").strip().upper()
-        if logica_u not in ("X", "U", "M"):
-            logica_u = "U"
-        logica_x = html.escape(logica_u)
-
-        envelope = (
-            f'<x:Envelope xmlns:x="http://schemas.xmlsoap.org/soap/envelope/" xmlns:ns1="GX">'
-            f"<x:Header/>"
-            f"<x:Body>"
-            f"<ns1:RiesgoSeguimientoMsgAdd_2_WS.Execute>"
-            f"<ns1:Usucod>{usucod_x}</ns1:Usucod>"
-            f"<ns1:Riepedid>{riepedid_x}</ns1:Riepedid>"
-            f"<ns1:Riepedinfrespcod_nuevo>{riecod_x}</ns1:Riepedinfrespcod_nuevo>"
-            f"<ns1:Riepedsegrmensaje>{mensaje_x}</ns1:Riepedsegrmensaje>"
-            f"<ns1:Logicacambioestado>{logica_x}</ns1:Logicacambioestado>"
-            f"</ns1:RiesgoSeguimientoMsgAdd_2_WS.Execute>"
-            f"</x:Body>"
-            f"</x:Envelope>"
-        )
-        return envelope.encode("utf-8")
+        return build_state_change_envelope(usucod, riepedid, riepedinfrespcod, mensaje, logica)
 
-    def _soap_post(self, url: str, payload: bytes, soap_action: str, timeout: int = 15):
-        import requests
-
-        url = (url or "").strip()
-        if "?" in url:
-            url = url.split("?", 1)[0]
-
-        headers = {
-            "Content-Type": "text/xml; charset=utf-8",
-            "SOAPAction": soap_action,
-            "User-Agent": "Odoo/18 SOAP Hook",
-        }
-        return requests.post(url, data=payload, headers=headers, timeout=timeout)
+    def _soap_post(self, url: str, payload: bytes, soap_action: str, timeout: int = 15, stream: bool = False):
+        return self.env["legacy.client"].soap_post(url, payload, soap_action, timeout=timeout, stream=stream)
 
     def _pick_logica_cambio(self, is_won: bool) -> str:
-        ICP = self.env["ir.config_parameter"].sudo()
-        key = (
-            "crm_soap_state_hook.logica_cambio_won"
-            if is_won
-            else "crm_soap_state_hook.logica_cambio_lost"
-        )
-        raw = ICP.get_param(key) or ICP.get_param("crm_soap_state_hook.logica_cambio", "U")
-        v = (raw or "").strip().upper()
-        return v if v in ("X", "U", "M") else "U"
+        return self._crm_soap_settings().logica(is_won)
 
     def _call_legacy_state_change(self, mensaje: str, is_won: bool) -> bool:
         self.ensure_one()
-        ICP = self.env["ir.config_parameter"].sudo()
+        return self._crm_soap_dispatch_state_change(mensaje, is_won)[0]["ok"]
 
-        if ICP.get_param("crm_soap_state_hook.enable", "True") not in ("True", "1"):
-            return True
+    def _crm_soap_dispatch_state_change(self, mensaje: str, is_won: bool) -> list:
+        """
+        Notifica a RiesgoSeguimientoMsgAdd_2_WS el cambio de estado de todas las
+        oportunidades del recordset. Los envelopes se arman antes de enviar y los
+        POST salen en paralelo (hasta ``dispatch_workers``) por la sesión compartida.
 
-        riepedid = str(self.x_studio_solicitud or "").strip()
-        if not riepedid:
-            self._logger().warning("No hay x_studio_solicitud; se omite SOAP.")
-            self._log_db("WARNING", "No hay x_studio_solicitud; se omite SOAP.", "call_legacy")
-            return True
-
-        url = ICP.get_param("crm_soap_state_hook.url") or ""
-        timeout = int(ICP.get_param("crm_soap_state_hook.timeout", "15") or 15)
-        usucod = ICP.get_param("crm_soap_state_hook.usucod", "") or ""
-        riepedinfrespcod = (
-            ICP.get_param(
-                "crm_soap_state_hook.riepedinfrespcod_won" if is_won else "crm_soap_state_hook.riepedinfrespcod_lost",
-                "",
-            )
-            or ""
-        )
-        logica = self._pick_logica_cambio(is_won=is_won)
+        Devuelve un resultado por lead, en el orden del recordset:
+        {"lead_id", "riepedid", "status": disabled|skipped|sent|error,
+         "http_status", "ok", "error"}
+        """
+        jobs = [
+            {
+                "key": lead.id,
+                "lead": lead,
+                "riepedid": str(lead.x_studio_solicitud or "").strip(),
+                "mensaje": mensaje,
+                "is_won": is_won,
+            }
+            for lead in self
+        ]
+        results = self._crm_soap_send_state_changes(jobs)
+        return [results[lead.id] for lead in self]
 
-        payload = self._build_soap_envelope_exact(
-            usucod=usucod,
-            riepedid=riepedid,
-            riepedinfrespcod=riepedinfrespcod,
-            mensaje=mensaje or "",
-            logica=logica,
-        )
+    @api.model
+    def _crm_soap_send_state_changes(self, jobs: list) -> dict:
+        """
+        Envía un lote de notificaciones de cambio de estado.
 
-        # Logs (archivo y BD)
-        mask = ICP.get_param("crm_soap_state_hook.log.mask_usucod", "True") in ("True", "1")
-        usucod_log = "***" if mask and usucod else usucod
+        Cada job es un dict {"key", "lead", "riepedid", "mensaje", "is_won"}; el
+        resultado se devuelve indexado por ``key``. Sólo los POST corren en threads:
+        envelopes, logs y lectura de configuración quedan en el thread del request.
+        """
+        cfg = self._crm_soap_settings()
+        if not cfg.enable:
+            return {
+                job["key"]: {
+                    "lead_id": job["lead"].id, "riepedid": job["riepedid"], "status": "disabled",
+                    "http_status": None, "ok": True, "error": "",
+                }
+                for job in jobs
+            }
 
-        if ICP.get_param("crm_soap_state_hook.log.enable", "True") in ("True", "1"):
-            self._logger().info(
-                "SOAP request POST | url=%s timeout=%s is_won=%s riepedid=%s riepedinfrespcod=%s logica=%s usucod=%s",
-                url,
-                timeout,
-                is_won,
-                riepedid,
-                riepedinfrespcod,
-                logica,
-                usucod_log,
+        client = self.env["legacy.client"]
+        usucod_log = "***" if cfg.log_mask_usucod and cfg.usucod else cfg.usucod
+        results = {}
+        calls = {}
+        for job in jobs:
+            lead = job["lead"]
+            riepedid = job["riepedid"]
+            is_won = job["is_won"]
+            result = {"lead_id": lead.id, "riepedid": riepedid, "status": "skipped", "http_status": None, "ok": True, "error": ""}
+            results[job["key"]] = result
+            if not riepedid:
+                result["error"] = "No hay x_studio_solicitud; se omite SOAP."
+                self._logger().warning("No hay x_studio_solicitud; se omite SOAP. lead_id=%s", lead.id)
+                lead._log_db("WARNING", "No hay x_studio_solicitud; se omite SOAP.", "call_legacy")
+                continue
+
+            riepedinfrespcod = cfg.riepedinfrespcod(is_won)
+            logica = cfg.logica(is_won)
+            payload = lead._build_soap_envelope_exact(
+                usucod=cfg.usucod,
+                riepedid=riepedid,
+                riepedinfrespcod=riepedinfrespcod,
+                mensaje=job["mensaje"] or "",
+                logica=logica,
             )
 
-        if ICP.get_param("crm_soap_state_hook.log.db.enable", "True") in ("True", "1"):
-            self._log_db(
+            # Logs (archivo y BD)
+            if cfg.log_enable:
+                self._logger().info(
+                    "SOAP request POST | url=%s timeout=%s is_won=%s riepedid=%s riepedinfrespcod=%s logica=%s usucod=%s",
+                    cfg.url,
+                    cfg.timeout,
+                    is_won,
+                    riepedid,
+                    riepedinfrespcod,
+                    logica,
+                    usucod_log,
+                )
+            lead._log_db(
                 "INFO",
-                f"SOAP request POST url={url} is_won={is_won} riepedid={riepedid} riepedinfrespcod={riepedinfrespcod} logica={logica}",
+                f"SOAP request POST url={cfg.url} is_won={is_won} riepedid={riepedid} riepedinfrespcod={riepedinfrespcod} logica={logica}",
                 "call_legacy",
             )
+            if cfg.log_payload:
+                snippet = payload[:cfg.log_snippet_len].decode("utf-8", errors="ignore")
+                self._logger().debug("SOAP payload snippet | %s", snippet)
+                if cfg.log_db_payload:
+                    lead._log_db("DEBUG", f"PAYLOAD: {snippet}", "call_legacy")
+
+            calls[job["key"]] = (lead, client.soap_call(
+                cfg.url,
+                payload,
+                soap_action="GX#RiesgoSeguimientoMsgAdd_2_WS.Execute",
+                timeout=cfg.timeout,
+            ))
+
+        if not calls:
+            return results
+
+        workers = max(1, min(cfg.dispatch_workers, len(calls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crm_soap_dispatch") as executor:
+            futures = {key: (lead, executor.submit(call)) for key, (lead, call) in calls.items()}
+
+        for key, (lead, future) in futures.items():
+            result = results[key]
+            try:
+                resp = future.result()
+            except Exception as exc:
+                result.update(status="error", ok=False, error=str(exc))
+                self._logger().error("SOAP error | lead_id=%s riepedid=%s: %s", lead.id, result["riepedid"], exc)
+                lead._log_db(
+                    "ERROR", f"SOAP error riepedid={result['riepedid']}: {exc}", "call_legacy",
+                    request_ref=result["riepedid"], endpoint=cfg.url,
+                )
+                continue
 
-        if ICP.get_param("crm_soap_state_hook.log.payload", "True") in ("True", "1"):
-            snlen = int(ICP.get_param("crm_soap_state_hook.log.snippet_len", "600") or 600)
-            snippet = payload[:snlen].decode("utf-8", errors="ignore")
-            self._logger().debug("SOAP payload snippet | %s", snippet)
-            if ICP.get_param("crm_soap_state_hook.log.db.payload", "False") in ("True", "1"):
-                self._log_db("DEBUG", f"PAYLOAD: {snippet}", "call_legacy")
-
-        resp = self._soap_post(
-            url,
-            payload,
-            soap_action="GX#RiesgoSeguimientoMsgAdd_2_WS.Execute",
-            timeout=timeout,
-        )
+            if cfg.log_response:
+                body = (resp.text or "")
+                snlen = cfg.log_snippet_len
+                self._logger().debug("SOAP response | status=%s body=%s", resp.status_code, body[:snlen])
+                if cfg.log_db_response:
+                    lead._log_db("DEBUG", f"RESPONSE[{resp.status_code}]: {body[:snlen]}", "call_legacy")
+            lead._log_db(
+                "INFO" if resp.status_code == 200 else "ERROR", f"SOAP response status={resp.status_code}", "call_legacy",
+                request_ref=result["riepedid"], response=resp,
+            )
 
-        if ICP.get_param("crm_soap_state_hook.log.response", "True") in ("True", "1"):
-            body = (resp.text or "")
-            snlen = int(ICP.get_param("crm_soap_state_hook.log.snippet_len", "600") or 600)
-            self._logger().debug("SOAP response | status=%s body=%s", resp.status_code, body[:snlen])
-            if ICP.get_param("crm_soap_state_hook.log.db.response", "False") in ("True", "1"):
-                self._log_db("DEBUG", f"RESPONSE[{resp.status_code}]: {body[:snlen]}", "call_legacy")
+            ok = resp.status_code == 200
+            result.update(
+                status="sent" if ok else "error",
+                http_status=resp.status_code,
+                ok=ok,
+                error="" if ok else f"HTTP {resp.status_code}",
+            )
 
-        self._log_db("INFO", f"SOAP response status={resp.status_code}", "call_legacy")
-        return resp.status_code == 200
+        return results
+
+    def _crm_soap_log_dispatch_report(self, report: list, func: str):
+        """Resume en los logs el resultado de un envío masivo."""
+        counts = {}
+        for result in report:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        summary = " ".join(f"{status}={count}" for status, count in sorted(counts.items()))
+        self._logger().info("SOAP dispatch | leads=%s %s", len(report), summary)
+        self._log_db("INFO", f"SOAP dispatch leads={len(report)} {summary}", func)
+        failed = [r for r in report if r["status"] == "error"]
+        if failed:
+            detail = ", ".join(f"{r['lead_id']}({r['riepedid']}): {r['error']}" for r in failed[:50])
+            self._log_db("ERROR", f"SOAP dispatch con errores ({len(failed)}): {detail}", func)
 
     # ============== Confirmaciones ==============
 
@@ -333,10 +381,16 @@ class CrmLead(models.Model):
             return self._crm_soap_prepare_confirmation("won")
         res = super().action_set_won()
         try:
-            ICP = self.env["ir.config_parameter"].sudo()
-            msg = ICP.get_param("crm_soap_state_hook.msg_won", "Oportunidad Ganada")
-            for lead in self:
-                lead._call_legacy_state_change(msg, is_won=True)
+            cfg = self._crm_soap_settings()
+            if cfg.enable and cfg.outbox_enable:
+                # Se envía desde el cron, después de confirmar la transacción. El
+                # savepoint evita que un error SQL al encolar deje abortada la
+                # transacción del usuario (el error sólo se registra)
+                with self.env.cr.savepoint():
+                    self.env["crm.soap.outbox"].sudo()._enqueue(self, cfg.msg_won, is_won=True)
+            else:
+                report = self._crm_soap_dispatch_state_change(cfg.msg_won, is_won=True)
+                self._crm_soap_log_dispatch_report(report, "action_set_won")
         except Exception as e:
             self._logger().exception("Error en hook SOAP (won): %s", e)
             self._log_db("ERROR", f"Hook SOAP Won: {e}", "action_set_won")
@@ -350,10 +404,16 @@ class CrmLead(models.Model):
             return self._crm_soap_prepare_confirmation("lost", kwargs=kwargs)
         res = super().action_set_lost(**kwargs)
         try:
-            ICP = self.env["ir.config_parameter"].sudo()
-            msg = ICP.get_param("crm_soap_state_hook.msg_lost", "Oportunidad Perdida")
-            for lead in self:
-                lead._call_legacy_state_change(msg, is_won=False)
+            cfg = self._crm_soap_settings()
+            if cfg.enable and cfg.outbox_enable:
+                # Se envía desde el cron, después de confirmar la transacción. El
+                # savepoint evita que un error SQL al encolar deje abortada la
+                # transacción del usuario (el error sólo se registra)
+                with self.env.cr.savepoint():
+                    self.env["crm.soap.outbox"].sudo()._enqueue(self, cfg.msg_lost, is_won=False)
+            else:
+                report = self._crm_soap_dispatch_state_change(cfg.msg_lost, is_won=False)
+                self._crm_soap_log_dispatch_report(report, "action_set_lost")
         except Exception as e:
             self._logger().exception("Error en hook SOAP (lost): %s", e)
             self._log_db("ERROR", f"Hook SOAP Lost: {e}", "action_set_lost")
@@ -363,14 +423,13 @@ class CrmLead(models.Model):
 
     def action_call_ws_e03(self):
         self.ensure_one()
-        ICP = self.env["ir.config_parameter"].sudo()
-        url = (ICP.get_param("crm_soap_state_hook.ws_e03.url") or "").strip()
+        cfg = self._crm_soap_settings()
+        url = cfg.ws_e03_url
         if not url:
             raise UserError(_("Configure la URL del servicio WS E03 en Ajustes."))
 
-        timeout = int(ICP.get_param("crm_soap_state_hook.ws_e03.timeout", "15") or 15)
-        timeout = max(timeout, 60)
-        usucod = (ICP.get_param("crm_soap_state_hook.usucod") or "").strip()
+        timeout = max(cfg.ws_e03_timeout, 60)
+        usucod = cfg.usucod
         if not usucod:
             raise UserError(_("Configure el Usucod en Ajustes."))
 
@@ -389,18 +448,17 @@ class CrmLead(models.Model):
         )
         payload = self._crm_soap_ws_e03_build_envelope(params)
 
-        if ICP.get_param("crm_soap_state_hook.log.enable", "True") in ("True", "1"):
+        if cfg.log_enable:
             self._logger().info(
                 "SOAP WS E03 | url=%s timeout=%s params=%s",
                 url,
                 timeout,
                 {k: v for k, v in params.items() if k not in {"Firma_64"}},
             )
-        if ICP.get_param("crm_soap_state_hook.log.payload", "True") in ("True", "1"):
-            snlen = int(ICP.get_param("crm_soap_state_hook.log.snippet_len", "600") or 600)
-            snippet = payload[:snlen].decode("utf-8", errors="ignore")
+        if cfg.log_payload:
+            snippet = payload[:cfg.log_snippet_len].decode("utf-8", errors="ignore")
             self._logger().debug("SOAP WS E03 payload snippet | %s", snippet)
-            if ICP.get_param("crm_soap_state_hook.log.db.payload", "False") in ("True", "1"):
+            if cfg.log_db_payload:
                 self._log_db("DEBUG", f"E03 PAYLOAD: {snippet}", "action_call_ws_e03")
 
         resp = self._soap_post(
@@ -408,21 +466,30 @@ class CrmLead(models.Model):
             payload,
             soap_action="GX#RiesgoPedido_WS_E03.Execute",
             timeout=timeout,
+            stream=True,
         )
 
-        if ICP.get_param("crm_soap_state_hook.log.response", "True") in ("True", "1"):
-            snlen = int(ICP.get_param("crm_soap_state_hook.log.snippet_len", "600") or 600)
-            body = resp.text or ""
-            self._logger().debug("SOAP WS E03 response | status=%s body=%s", resp.status_code, body[:snlen])
-            if ICP.get_param("crm_soap_state_hook.log.db.response", "False") in ("True", "1"):
-                self._log_db("DEBUG", f"E03 RESPONSE[{resp.status_code}]: {body[:snlen]}", "action_call_ws_e03")
+        # La respuesta se parsea directo del socket; para el log sólo se guarda el snippet
+        with resp:
+            resp.raw.decode_content = True
+            reader = SnippetReader(resp.raw, cfg.log_snippet_len if cfg.log_response else 0)
+            try:
+                if resp.status_code == 200:
+                    result = self._crm_soap_ws_e03_parse_response(reader)
+                elif cfg.log_response:
+                    reader.read(cfg.log_snippet_len)
+            finally:
+                if cfg.log_response:
+                    body = reader.snippet_text()
+                    self._logger().debug("SOAP WS E03 response | status=%s body=%s", resp.status_code, body)
+                    if cfg.log_db_response:
+                        self._log_db("DEBUG", f"E03 RESPONSE[{resp.status_code}]: {body}", "action_call_ws_e03")
 
         if resp.status_code != 200:
-            self._log_db("ERROR", f"WS E03 status={resp.status_code}", "action_call_ws_e03")
+            self._log_db("ERROR", f"WS E03 status={resp.status_code}", "action_call_ws_e03", request_ref=riepedid, response=resp)
             self.write({'ws_e03_contract_url': False})
             raise UserError(_("WS E03 devolvió un código HTTP inesperado (%s).") % resp.status_code)
 
-        result = self._crm_soap_ws_e03_parse_response(resp.content)
         p_ok = (result.get("p_ok") or "").strip().upper()
         if p_ok not in {"SI", "S", "OK", "1", "TRUE"}:
             message = result.get("p_msg") or _("El servicio WS E03 indicó un error.")
@@ -430,7 +497,7 @@ class CrmLead(models.Model):
             self.write({'ws_e03_contract_url': False})
             raise UserError(message)
 
-        self._log_db("INFO", "WS E03 ejecutado correctamente.", "action_call_ws_e03")
+        self._log_db("INFO", "WS E03 ejecutado correctamente.", "action_call_ws_e03", request_ref=riepedid, response=resp)
 
         url_suffix = result.get("contrato_url") or result.get("link_firma") or ""
         if not url_suffix:
@@ -588,82 +655,14 @@ class CrmLead(models.Model):
         return params
 
     def _crm_soap_ws_e03_build_envelope(self, params: dict) -> bytes:
-        pieces = [
-            f"<ns1:{key}>{html.escape(str(params.get(key, '') or ''))}</ns1:{key}>"
-            for key in (
-                "Usucod",
-                "Riepedimportarorigen",
-                "Riepedid",
-                "Ofertarenglon",
-                "Parametros",
-                "Riepedemail_part",
-                "Riepedtelcelddn",
-                "Riepedtelcelnro",
-                "Riepedtelcelnotas",
-                "Riepedbancocobrohaberescbu",
-                "Riepeddompartcalle",
-                "Riepeddompartpuerta",
-                "Riepeddompartpiso",
-                "Riepeddompartdpto",
-                "Riepeddompartbarrio",
-                "Riepeddompartblock",
-                "Riepeddompartdistrito",
-                "Riepeddompartentrec1",
-                "Riepeddompartentrec2",
-                "Riepeddomparthabitacion",
-                "Riepeddompartindicacion",
-                "Riepeddompartempresa",
-                "Riepeddompartcasa",
-                "Riepeddompartmanzana",
-                "Riepeddompartmedidor",
-                "Riepeddompartvivienda",
-                "Provicod",
-                "Riepeddompartlocades",
-                "Firma_64",
-            )
-        ]
-        body = "".join(pieces)
-        envelope = (
-            f'<x:Envelope xmlns:x="http://schemas.xmlsoap.org/soap/envelope/" xmlns:ns1="GX">'
-            f"<x:Header/>"
-            f"<x:Body>"
-            f"<ns1:RiesgoPedido_WS_E03.Execute>"
-            f"{body}"
-            f"</ns1:RiesgoPedido_WS_E03.Execute>"
-            f"</x:Body>"
-            f"</x:Envelope>"
-        )
-        return envelope.encode("utf-8")
+        return build_ws_e03_envelope(params)
 
-    def _crm_soap_ws_e03_parse_response(self, payload: bytes) -> dict:
+    def _crm_soap_ws_e03_parse_response(self, payload) -> dict:
+        """Campos de Riesgopedido_ws_e03_sdt; ``payload`` puede ser bytes o el stream de la respuesta."""
         try:
-            root = ET.fromstring(payload)
+            data = parse_ws_e03_response(payload)
         except ET.ParseError as exc:
             raise UserError(_("La respuesta de WS E03 no es XML válido (%s).") % exc) from exc
-
-        ns = {
-            "soap": "http://schemas.xmlsoap.org/soap/envelope/",
-            "gx": "GX",
-        }
-        result_node = root.find(".//gx:Riesgopedido_ws_e03_sdt", ns)
-        if result_node is None:
+        if data is None:
             raise UserError(_("WS E03 no devolvió el nodo de respuesta esperado."))
-
-        def gx_text(path):
-            node = result_node.find(path, ns)
-            text = node.text if node is not None and node.text is not None else ""
-            return text.strip()
-
-        data = {
-            "riepedid": gx_text("gx:RiePedID"),
-            "p_ok": gx_text("gx:P_OK"),
-            "p_msg": gx_text("gx:P_Msj"),
-            "contrato_resultado": gx_text("gx:Contrato/gx:Resultado"),
-            "contrato_url": gx_text("gx:Contrato/gx:URL"),
-            "contrato_mensaje": gx_text("gx:Contrato/gx:Mensaje"),
-            "contrato_ruta": gx_text("gx:Contrato/gx:Ruta"),
-            "contrato_archivo": gx_text("gx:Contrato/gx:Archivo"),
-            "contrato_formulario": gx_text("gx:Contrato/gx:Formulario_ID"),
-            "link_firma": gx_text("gx:LinkFirma"),
-        }
         return data
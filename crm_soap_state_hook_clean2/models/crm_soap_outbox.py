@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_BACKOFF_BASE = 60  # segundos
+OUTBOX_BACKOFF_MAX = 6 * 3600
+
+
+class CrmSoapOutbox(models.Model):
+    _name = "crm.soap.outbox"
+    _description = "Cola de notificaciones SOAP de cambio de estado"
+    _order = "next_attempt_at, id"
+    _rec_name = "idempotency_key"
+
+    idempotency_key = fields.Char(
+        string="Clave",
+        required=True,
+        readonly=True,
+        help="Solicitud y estado notificado (<solicitud>:<won|lost>).",
+    )
+    lead_id = fields.Many2one("crm.lead", string="Oportunidad", ondelete="set null", index=True)
+    riepedid = fields.Char(string="Solicitud", required=True, index=True)
+    lead_state = fields.Selection(
+        selection=[("won", "Ganada"), ("lost", "Perdida")],
+        string="Estado notificado",
+        required=True,
+    )
+    mensaje = fields.Char(string="Mensaje")
+    state = fields.Selection(
+        selection=[
+            ("pending", "Pendiente"),
+            ("sent", "Enviado"),
+            ("failed", "Fallido"),
+            ("cancelled", "Cancelado"),
+        ],
+        string="Estado",
+        required=True,
+        default="pending",
+        index=True,
+    )
+    attempts = fields.Integer(string="Intentos", default=0, readonly=True)
+    next_attempt_at = fields.Datetime(string="Próximo intento", default=fields.Datetime.now, index=True)
+    sent_at = fields.Datetime(string="Enviado el", readonly=True)
+    last_http_status = fields.Integer(string="Último HTTP", readonly=True)
+    last_error = fields.Text(string="Último error", readonly=True)
+
+    _sql_constraints = [
+        ("idempotency_key_uniq", "unique(idempotency_key)", "Ya existe una notificación para esa solicitud y estado."),
+    ]
+
+    # ============== Encolado ==============
+
+    @api.model
+    def _outbox_key(self, riepedid, lead_state):
+        return f"{riepedid}:{lead_state}"
+
+    @api.model
+    def _enqueue(self, leads, mensaje, is_won):
+        """
+        Encola la notificación de ``leads`` en la transacción actual: si la
+        transacción se revierte, la notificación desaparece con ella.
+
+        Una solicitud tiene a lo sumo un registro por estado. Se reutiliza el
+        existente salvo que ya se haya enviado y el estado opuesto sea posterior
+        (p.ej. ganada → perdida → ganada), en cuyo caso se vuelve a armar.
+        Devuelve los registros pendientes.
+        """
+        lead_state = "won" if is_won else "lost"
+        other_state = "lost" if is_won else "won"
+        by_riepedid = {}
+        for lead in leads:
+            riepedid = str(lead.x_studio_solicitud or "").strip()
+            if not riepedid:
+                lead._logger().warning("No hay x_studio_solicitud; se omite SOAP. lead_id=%s", lead.id)
+                lead._log_db("WARNING", "No hay x_studio_solicitud; se omite SOAP.", "outbox_enqueue")
+                continue
+            by_riepedid[riepedid] = lead
+        if not by_riepedid:
+            return self.browse()
+
+        keys = [self._outbox_key(r, s) for r in by_riepedid for s in (lead_state, other_state)]
+        existing = {item.idempotency_key: item for item in self.search([("idempotency_key", "in", keys)])}
+
+        now = fields.Datetime.now()
+        to_create = []
+        to_rearm = self.browse()
+        to_cancel = self.browse()
+        for riepedid, lead in by_riepedid.items():
+            item = existing.get(self._outbox_key(riepedid, lead_state))
+            other = existing.get(self._outbox_key(riepedid, other_state))
+            if other and other.state in ("pending", "failed"):
+                # El estado opuesto nunca llegó al legacy: ya no corresponde enviarlo
+                to_cancel |= other
+            if not item:
+                to_create.append({
+                    "idempotency_key": self._outbox_key(riepedid, lead_state),
+                    "lead_id": lead.id,
+                    "riepedid": riepedid,
+                    "lead_state": lead_state,
+                    "mensaje": mensaje or "",
+                    "next_attempt_at": now,
+                })
+            elif item.state != "sent" or (
+                other and other.state == "sent" and other.sent_at and (not item.sent_at or other.sent_at > item.sent_at)
+            ):
+                to_rearm |= item
+            # Si ya se envió y no hubo un cambio posterior, la notificación es idempotente
+
+        if to_cancel:
+            to_cancel.write({"state": "cancelled", "next_attempt_at": False})
+        if to_rearm:
+            to_rearm.write({
+                "state": "pending",
+                "mensaje": mensaje or "",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "last_error": False,
+            })
+        created = self.create(to_create) if to_create else self.browse()
+        pending = to_rearm | created
+        if pending:
+            # Despierta al worker apenas se confirme la transacción
+            cron = self.env.ref("crm_soap_state_hook_clean2.ir_cron_crm_soap_outbox", raise_if_not_found=False)
+            if cron:
+                cron._trigger()
+        return pending
+
+    # ============== Worker ==============
+
+    @api.model
+    def _backoff_delay(self, attempts):
+        return timedelta(seconds=min(OUTBOX_BACKOFF_BASE * 2 ** max(attempts - 1, 0), OUTBOX_BACKOFF_MAX))
+
+    @api.model
+    def _lock_due_batch(self, batch_size):
+        """Toma un lote de pendientes vencidos; SKIP LOCKED permite varios workers en paralelo."""
+        self.env.cr.execute(
+            """
+            SELECT id FROM crm_soap_outbox
+             WHERE state = 'pending' AND next_attempt_at <= (now() AT TIME ZONE 'UTC')
+             ORDER BY next_attempt_at, id
+             LIMIT %s
+             FOR UPDATE SKIP LOCKED
+            """,
+            [batch_size],
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _process(self):
+        """
+        Envía los registros por el dispatcher de crm.lead y registra el resultado.
+        Con el hook deshabilitado no se envía nada y los registros quedan pendientes.
+        """
+        Lead = self.env["crm.lead"]
+        cfg = Lead._crm_soap_settings()
+        stats = {"sent": 0, "retry": 0, "failed": 0}
+        if not cfg.enable:
+            return stats
+        jobs = [
+            {
+                "key": item.id,
+                "lead": item.lead_id,
+                "riepedid": item.riepedid,
+                "mensaje": item.mensaje,
+                "is_won": item.lead_state == "won",
+            }
+            for item in self
+        ]
+        results = Lead._crm_soap_send_state_changes(jobs)
+        now = fields.Datetime.now()
+        for item in self:
+            result = results[item.id]
+            if result["status"] == "disabled":
+                # Se deshabilitó durante el envío: no salió nada, sigue pendiente
+                continue
+            attempts = item.attempts + 1
+            if result["ok"]:
+                item.write({
+                    "state": "sent",
+                    "attempts": attempts,
+                    "sent_at": now,
+                    "next_attempt_at": False,
+                    "last_http_status": result["http_status"] or 0,
+                    "last_error": result["error"] or False,
+                })
+                stats["sent"] += 1
+            elif attempts >= cfg.outbox_max_attempts:
+                item.write({
+                    "state": "failed",
+                    "attempts": attempts,
+                    "next_attempt_at": False,
+                    "last_http_status": result["http_status"] or 0,
+                    "last_error": result["error"],
+                })
+                stats["failed"] += 1
+            else:
+                item.write({
+                    "attempts": attempts,
+                    "next_attempt_at": now + self._backoff_delay(attempts),
+                    "last_http_status": result["http_status"] or 0,
+                    "last_error": result["error"],
+                })
+                stats["retry"] += 1
+        return stats
+
+    @api.model
+    def _cron_process_outbox(self, batch_size=OUTBOX_BATCH_SIZE, limit=None):
+        """Vacía la cola por lotes, confirmando después de cada uno (nada si el hook está deshabilitado)."""
+        started = time.monotonic()
+        totals = {"sent": 0, "retry": 0, "failed": 0}
+        processed = 0
+        if not self.env["crm.lead"]._crm_soap_settings().enable:
+            return totals
+        while limit is None or processed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            batch = self._lock_due_batch(size)
+            if not batch:
+                break
+            for key, value in batch._process().items():
+                totals[key] += value
+            processed += len(batch)
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        if processed:
+            message = (
+                f"Outbox SOAP: {processed} notificaciones en {time.monotonic() - started:.1f}s | "
+                f"enviadas={totals['sent']} reintento={totals['retry']} fallidas={totals['failed']}"
+            )
+            _logger.info(message)
+            self.env["crm.lead"]._log_db("INFO", message, "_cron_process_outbox")
+        return totals
+
+    # ============== Acciones del tablero ==============
+
+    def action_retry(self):
+        self.filtered(lambda i: i.state in ("failed", "pending")).write({
+            "state": "pending",
+            "attempts": 0,
+            "next_attempt_at": fields.Datetime.now(),
+        })
+        self.env.ref("crm_soap_state_hook_clean2.ir_cron_crm_soap_outbox")._trigger()
+
+    def action_cancel(self):
+        self.filtered(lambda i: i.state in ("failed", "pending")).write({
+            "state": "cancelled",
+            "next_attempt_at": False,
+        })
+
+    def _lock_selected(self):
+        """Bloquea los pendientes/fallidos del recordset que no esté procesando otro worker (p.ej. el cron)."""
+        if not self:
+            return self.browse()
+        self.env.cr.execute(
+            """
+            SELECT id FROM crm_soap_outbox
+             WHERE id IN %s AND state IN ('pending', 'failed')
+             ORDER BY id
+             FOR UPDATE SKIP LOCKED
+            """,
+            [tuple(self.ids)],
+        )
+        locked = self.browse([row[0] for row in self.env.cr.fetchall()])
+        locked.invalidate_recordset()
+        return locked
+
+    def action_send_now(self):
+        """Envía ya los pendientes/fallidos seleccionados (sin esperar al cron)."""
+        if not self.env["crm.lead"]._crm_soap_settings().enable:
+            raise UserError(_("El hook SOAP está deshabilitado: los registros quedan pendientes hasta habilitarlo."))
+        items = self._lock_selected()
+        items.write({"state": "pending"})
+        stats = items._process()
+        message = _("Enviadas: %(sent)d. Reintento: %(retry)d. Fallidas: %(failed)d.") % stats
+        skipped = len(self.filtered(lambda i: i.state in ("failed", "pending")) - items)
+        if skipped:
+            message += " " + _("En proceso por otro envío (omitidas): %(skipped)d.") % {"skipped": skipped}
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Outbox SOAP"),
+                "message": message,
+                "type": "success" if not (stats["retry"] or stats["failed"]) else "warning",
+                "sticky": False,
+                "next": {"type": "ir.actions.client", "tag": "reload"},
+            },
+        }
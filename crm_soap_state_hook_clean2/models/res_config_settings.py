@@ -20,6 +20,18 @@ class ResConfigSettings(models.TransientModel):
     crm_soap_url = fields.Char(string="URL SOAP", help="Sin ?WSDL")
     crm_soap_timeout = fields.Integer(string="Timeout (s)", default=15)
     crm_soap_usucod = fields.Char(string="Usucod")
+    crm_soap_dispatch_workers = fields.Integer(
+        string="Envíos en paralelo",
+        default=4,
+        help="Cantidad máxima de llamadas SOAP simultáneas al marcar varias oportunidades.",
+    )
+    crm_soap_outbox_enable = fields.Boolean(
+        string="Enviar en segundo plano (outbox)",
+        default=True,
+        help="Encola la notificación al marcar Ganado/Perdido y la envía un cron; "
+        "si está desactivado, se llama al servicio durante la acción.",
+    )
+    crm_soap_outbox_max_attempts = fields.Integer(string="Intentos máximos (outbox)", default=8)
 
     # Nuevo WS E03
     crm_soap_ws_e03_url = fields.Char(string="URL WS E03", help="Sin ?WSDL")
@@ -58,8 +70,8 @@ class ResConfigSettings(models.TransientModel):
     crm_soap_log_snippet_len = fields.Integer(string="Tamaño snippet", default=600)
     crm_soap_log_mask_usucod = fields.Boolean(string="Enmascarar Usucod", default=True)
 
-    # Logging a BD (ir.logging) para el menú
-    crm_soap_log_db_enable = fields.Boolean(string="Log en BD (ir.logging)", default=True)
+    # Logging a BD (integration.log) para el menú
+    crm_soap_log_db_enable = fields.Boolean(string="Log en BD (Logs de integración)", default=True)
     crm_soap_log_db_payload = fields.Boolean(string="Logear payload en BD", default=False)
     crm_soap_log_db_response = fields.Boolean(string="Logear respuesta en BD", default=False)
 
@@ -77,6 +89,9 @@ class ResConfigSettings(models.TransientModel):
             crm_soap_url=gp("crm_soap_state_hook.url", ""),
             crm_soap_timeout=int(gp("crm_soap_state_hook.timeout", "15") or 15),
             crm_soap_usucod=gp("crm_soap_state_hook.usucod", ""),
+            crm_soap_dispatch_workers=int(gp("crm_soap_state_hook.dispatch.max_workers", "4") or 4),
+            crm_soap_outbox_enable=gp("crm_soap_state_hook.outbox.enable", "True") in ("True", "1"),
+            crm_soap_outbox_max_attempts=int(gp("crm_soap_state_hook.outbox.max_attempts", "8") or 8),
             crm_soap_riepedinfrespcod_won=gp(
                 "crm_soap_state_hook.riepedinfrespcod_won", "OP-A-LIQ"
             ),
@@ -130,6 +145,9 @@ class ResConfigSettings(models.TransientModel):
         sp("crm_soap_state_hook.url", self.crm_soap_url or "")
         sp("crm_soap_state_hook.timeout", self.crm_soap_timeout or 15)
         sp("crm_soap_state_hook.usucod", self.crm_soap_usucod or "")
+        sp("crm_soap_state_hook.dispatch.max_workers", self.crm_soap_dispatch_workers or 4)
+        sp("crm_soap_state_hook.outbox.enable", self.crm_soap_outbox_enable)
+        sp("crm_soap_state_hook.outbox.max_attempts", self.crm_soap_outbox_max_attempts or 8)
         sp(
             "crm_soap_state_hook.riepedinfrespcod_won",
             self.crm_soap_riepedinfrespcod_won or "",
@@ -169,3 +187,4 @@ class ResConfigSettings(models.TransientModel):
             sp("crm_soap_state_hook.lost_stage_xmlid", xmlid or "")
         else:
             sp("crm_soap_state_hook.lost_stage_xmlid", "")
+
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Plantillas precompiladas de envelopes SOAP para los servicios GX.
+
+Cada operación se compila una sola vez en segmentos estáticos (apertura del
+envelope, tags de cierre/apertura entre campos y cierre final); generar un
+envelope es intercalar los valores escapados entre esos segmentos y hacer un
+único ``join``. El resultado es byte a byte igual al de los builders con
+f-strings y ``html.escape``.
+
+Módulo sin dependencias de Odoo: ``python3 soap_envelopes.py`` corre el
+micro-benchmark contra los builders anteriores.
+"""
+import html
+
+SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+GX_NS = "GX"
+
+RIESGO_SEGUIMIENTO_FIELDS = (
+    "Usucod",
+    "Riepedid",
+    "Riepedinfrespcod_nuevo",
+    "Riepedsegrmensaje",
+    "Logicacambioestado",
+)
+
+RIESGO_PEDIDO_E03_FIELDS = (
+    "Usucod",
+    "Riepedimportarorigen",
+    "Riepedid",
+    "Ofertarenglon",
+    "Parametros",
+    "Riepedemail_part",
+    "Riepedtelcelddn",
+    "Riepedtelcelnro",
+    "Riepedtelcelnotas",
+    "Riepedbancocobrohaberescbu",
+    "Riepeddompartcalle",
+    "Riepeddompartpuerta",
+    "Riepeddompartpiso",
+    "Riepeddompartdpto",
+    "Riepeddompartbarrio",
+    "Riepeddompartblock",
+    "Riepeddompartdistrito",
+    "Riepeddompartentrec1",
+    "Riepeddompartentrec2",
+    "Riepeddomparthabitacion",
+    "Riepeddompartindicacion",
+    "Riepeddompartempresa",
+    "Riepeddompartcasa",
+    "Riepeddompartmanzana",
+    "Riepeddompartmedidor",
+    "Riepeddompartvivienda",
+    "Provicod",
+    "Riepeddompartlocades",
+    "Firma_64",
+)
+
+
+def xml_escape(value):
+    """Igual a ``html.escape(value)``, sin recorrer el texto cuando no hay nada que escapar."""
+    if "&" in value or "<" in value or ">" in value or '"' in value or "'" in value:
+        return html.escape(value)
+    return value
+
+
+class EnvelopeTemplate:
+    """Envelope ``<x:Envelope>`` de una operación GX con sus campos en orden fijo."""
+
+    __slots__ = ("operation", "fields", "segments", "_parts")
+
+    def __init__(self, operation, fields):
+        self.operation = operation
+        self.fields = tuple(fields)
+        head = (
+            f'<x:Envelope xmlns:x="{SOAP_ENV_NS}" xmlns:ns1="{GX_NS}">'
+            f"<x:Header/>"
+            f"<x:Body>"
+            f"<ns1:{operation}>"
+        )
+        tail = f"</ns1:{operation}></x:Body></x:Envelope>"
+        if not self.fields:
+            self.segments = (head + tail,)
+            self._parts = [head + tail]
+            return
+        # Posiciones pares: segmentos estáticos; impares: valores de cada campo
+        segments = [f"{head}<ns1:{self.fields[0]}>"]
+        for prev, nxt in zip(self.fields, self.fields[1:]):
+            segments.append(f"</ns1:{prev}><ns1:{nxt}>")
+        segments.append(f"</ns1:{self.fields[-1]}>{tail}")
+        self.segments = tuple(segments)
+        parts = [None] * (2 * len(segments) - 1)
+        parts[0::2] = segments
+        self._parts = parts
+
+    def render_values(self, values):
+        """Envelope (bytes UTF-8) con ``values`` en el orden de ``fields``, ya como texto."""
+        parts = self._parts.copy()
+        parts[1::2] = [xml_escape(value) for value in values]
+        return "".join(parts).encode("utf-8")
+
+    def render(self, params):
+        """Envelope a partir de un dict; los faltantes o vacíos van como cadena vacía."""
+        get = params.get
+        return self.render_values([str(get(key, "") or "") for key in self.fields])
+
+
+RIESGO_SEGUIMIENTO_MSG_ADD = EnvelopeTemplate("RiesgoSeguimientoMsgAdd_2_WS.Execute", RIESGO_SEGUIMIENTO_FIELDS)
+RIESGO_PEDIDO_E03 = EnvelopeTemplate("RiesgoPedido_WS_E03.Execute", RIESGO_PEDIDO_E03_FIELDS)
+
+
+_SEG_0, _SEG_1, _SEG_2, _SEG_3, _SEG_4, _SEG_5 = RIESGO_SEGUIMIENTO_MSG_ADD.segments
+
+
+def build_state_change_envelope(usucod, riepedid, riepedinfrespcod, mensaje, logica):
+    """RiesgoSeguimientoMsgAdd_2_WS: valores recortados y lógica normalizada a X/U/M (U por defecto).
+
+    Es el envelope de los envíos masivos: los segmentos se toman desplegados
+    para armar todo con un solo ``join``.
+    """
+    logica_u = (logica or "").strip().upper()
+    if logica_u not in ("X", "U", "M"):
+        logica_u = "U"
+    return "".join((
+        _SEG_0, xml_escape((usucod or "").strip()),
+        _SEG_1, xml_escape((str(riepedid) or "").strip()),
+        _SEG_2, xml_escape((riepedinfrespcod or "").strip()),
+        _SEG_3, xml_escape((mensaje or "").strip()),
+        _SEG_4, logica_u,
+        _SEG_5,
+    )).encode("utf-8")
+
+
+def build_ws_e03_envelope(params):
+    return RIESGO_PEDIDO_E03.render(params)
+
+
+# ============== Micro-benchmark ==============
+
+def _legacy_state_change_envelope(usucod, riepedid, riepedinfrespcod, mensaje, logica):
+    usucod_x = html.escape((usucod or "").strip())
+    riepedid_x = html.escape((str(riepedid) or "").strip())
+    riecod_x = html.escape((riepedinfrespcod or "").strip())
+    mensaje_x = html.escape((mensaje or "").strip())
+    logica_u = (logica or "").strip().upper()
+    if logica_u not in ("X", "U", "M"):
+        logica_u = "U"
+    logica_x = html.escape(logica_u)
+    return (
+        f'<x:Envelope xmlns:x="http://schemas.xmlsoap.org/soap/envelope/" xmlns:ns1="GX">'
+        f"<x:Header/>"
+        f"<x:Body>"
+        f"<ns1:RiesgoSeguimientoMsgAdd_2_WS.Execute>"
+        f"<ns1:Usucod>{usucod_x}</ns1:Usucod>"
+        f"<ns1:Riepedid>{riepedid_x}</ns1:Riepedid>"
+        f"<ns1:Riepedinfrespcod_nuevo>{riecod_x}</ns1:Riepedinfrespcod_nuevo>"
+        f"<ns1:Riepedsegrmensaje>{mensaje_x}</ns1:Riepedsegrmensaje>"
+        f"<ns1:Logicacambioestado>{logica_x}</ns1:Logicacambioestado>"
+        f"</ns1:RiesgoSeguimientoMsgAdd_2_WS.Execute>"
+        f"</x:Body>"
+        f"</x:Envelope>"
+    ).encode("utf-8")
+
+
+def _legacy_ws_e03_envelope(params):
+    body = "".join(
+        f"<ns1:{key}>{html.escape(str(params.get(key, '') or ''))}</ns1:{key}>"
+        for key in RIESGO_PEDIDO_E03_FIELDS
+    )
+    return (
+        f'<x:Envelope xmlns:x="http://schemas.xmlsoap.org/soap/envelope/" xmlns:ns1="GX">'
+        f"<x:Header/>"
+        f"<x:Body>"
+        f"<ns1:RiesgoPedido_WS_E03.Execute>"
+        f"{body}"
+        f"</ns1:RiesgoPedido_WS_E03.Execute>"
+        f"</x:Body>"
+        f"</x:Envelope>"
+    ).encode("utf-8")
+
+
+def benchmark(number=100000):
+    """Compara los builders precompilados con los anteriores; devuelve los tiempos (s)."""
+    import timeit
+
+    state_args = ("USR01", "123456", "OP-A-LIQ", "Oportunidad Ganada", "u")
+    e03_params = {key: f"valor {i}" for i, key in enumerate(RIESGO_PEDIDO_E03_FIELDS)}
+    e03_params.update(Riepeddompartcalle="Av. Belgrano & <Norte>", Riepeddompartpiso=3, Firma_64="A" * 4096)
+
+    assert build_state_change_envelope(*state_args) == _legacy_state_change_envelope(*state_args)
+    assert build_ws_e03_envelope(e03_params) == _legacy_ws_e03_envelope(e03_params)
+
+    cases = (
+        ("RiesgoSeguimientoMsgAdd_2_WS", lambda: _legacy_state_change_envelope(*state_args),
+         lambda: build_state_change_envelope(*state_args)),
+        ("RiesgoPedido_WS_E03", lambda: _legacy_ws_e03_envelope(e03_params),
+         lambda: build_ws_e03_envelope(e03_params)),
+    )
+    results = {}
+    for name, legacy, compiled in cases:
+        t_legacy = min(timeit.repeat(legacy, number=number, repeat=3))
+        t_compiled = min(timeit.repeat(compiled, number=number, repeat=3))
+        results[name] = (t_legacy, t_compiled)
+        print(
+            f"{name:<30} f-string {t_legacy / number * 1e6:7.2f} µs | "
+            f"plantilla {t_compiled / number * 1e6:7.2f} µs | x{t_legacy / t_compiled:.2f}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
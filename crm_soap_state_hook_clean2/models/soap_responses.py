@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura en streaming de respuestas SOAP de los servicios GX.
+
+Las respuestas se recorren una sola vez con ``iterparse`` directamente sobre
+el stream HTTP: los campos se toman al cerrar cada elemento y el elemento se
+libera enseguida, sin armar el DOM completo ni una copia del texto.
+"""
+import io
+from xml.etree import ElementTree as ET
+
+GX_NS = "{GX}"
+
+WS_E03_RESULT_TAG = GX_NS + "Riesgopedido_ws_e03_sdt"
+# Ruta relativa al nodo de resultado -> clave del dict devuelto
+WS_E03_FIELDS = {
+    ("RiePedID",): "riepedid",
+    ("P_OK",): "p_ok",
+    ("P_Msj",): "p_msg",
+    ("Contrato", "Resultado"): "contrato_resultado",
+    ("Contrato", "URL"): "contrato_url",
+    ("Contrato", "Mensaje"): "contrato_mensaje",
+    ("Contrato", "Ruta"): "contrato_ruta",
+    ("Contrato", "Archivo"): "contrato_archivo",
+    ("Contrato", "Formulario_ID"): "contrato_formulario",
+    ("LinkFirma",): "link_firma",
+}
+
+
+class SnippetReader(io.RawIOBase):
+    """Envuelve un stream y guarda los primeros ``limit`` bytes leídos (para los logs)."""
+
+    def __init__(self, stream, limit=0):
+        super().__init__()
+        self._stream = stream
+        self._limit = max(0, limit or 0)
+        self._snippet = bytearray()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunk = self._stream.read(size)
+        missing = self._limit - len(self._snippet)
+        if chunk and missing > 0:
+            self._snippet += chunk[:missing]
+        return chunk
+
+    def readinto(self, buffer):
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    @property
+    def snippet(self):
+        return bytes(self._snippet)
+
+    def snippet_text(self):
+        return self._snippet.decode("utf-8", errors="ignore")
+
+
+def parse_ws_e03_response(source):
+    """
+    Extrae los campos de ``Riesgopedido_ws_e03_sdt`` en una pasada.
+
+    :param source: stream binario (p.ej. ``response.raw``) o bytes.
+    :return: dict con los campos (texto recortado, "" si falta) o ``None`` si
+        la respuesta no trae el nodo de resultado.
+    :raises xml.etree.ElementTree.ParseError: si la respuesta no es XML válido.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    found = None
+    path = []  # tags GX (sin namespace) desde el nodo de resultado; None si es de otro namespace
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if path:
+                tag = elem.tag
+                path.append(tag[len(GX_NS):] if tag.startswith(GX_NS) else None)
+            elif found is None and elem.tag == WS_E03_RESULT_TAG:
+                # Primer nodo de resultado del documento (como ``find(".//...")``)
+                found = {}
+                path.append(WS_E03_RESULT_TAG)
+            continue
+
+        if path:
+            key = WS_E03_FIELDS.get(tuple(path[1:]))
+            if key and key not in found:
+                found[key] = (elem.text or "").strip()
+            path.pop()
+        elem.clear()
+
+    if found is None:
+        return None
+    return {key: found.get(key, "") for key in WS_E03_FIELDS.values()}
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from typing import NamedTuple
+
+PARAM_PREFIX = "crm_soap_state_hook"
+LOGICA_VALUES = ("X", "U", "M")
+
+
+def _as_bool(raw):
+    return raw in ("True", "1")
+
+
+def _as_int(raw, default):
+    try:
+        return int(raw or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_logica(raw):
+    value = (raw or "").strip().upper()
+    return value if value in LOGICA_VALUES else "U"
+
+
+class SoapHookSettings(NamedTuple):
+    """Parámetros del hook SOAP ya tipados (inmutable: se comparte vía ormcache)."""
+
+    enable: bool
+    url: str
+    timeout: int
+    usucod: str
+    riepedinfrespcod_won: str
+    riepedinfrespcod_lost: str
+    msg_won: str
+    msg_lost: str
+    logica_won: str
+    logica_lost: str
+    log_enable: bool
+    log_payload: bool
+    log_response: bool
+    log_snippet_len: int
+    log_mask_usucod: bool
+    log_db_enable: bool
+    log_db_payload: bool
+    log_db_response: bool
+    ws_e03_url: str
+    ws_e03_timeout: int
+    dispatch_workers: int
+    outbox_enable: bool
+    outbox_max_attempts: int
+
+    @classmethod
+    def from_params(cls, get_param):
+        """Arma la configuración con ``get_param(key, default)`` (ir.config_parameter)."""
+
+        def gp(key, default=""):
+            return get_param(f"{PARAM_PREFIX}.{key}", default)
+
+        logica_global = gp("logica_cambio", "U")
+        return cls(
+            enable=_as_bool(gp("enable", "True")),
+            url=(gp("url") or "").strip(),
+            timeout=_as_int(gp("timeout", "15"), 15),
+            usucod=(gp("usucod") or "").strip(),
+            riepedinfrespcod_won=gp("riepedinfrespcod_won") or "",
+            riepedinfrespcod_lost=gp("riepedinfrespcod_lost") or "",
+            msg_won=gp("msg_won", "Oportunidad Ganada"),
+            msg_lost=gp("msg_lost", "Oportunidad Perdida"),
+            logica_won=_as_logica(gp("logica_cambio_won") or logica_global),
+            logica_lost=_as_logica(gp("logica_cambio_lost") or logica_global),
+            log_enable=_as_bool(gp("log.enable", "True")),
+            log_payload=_as_bool(gp("log.payload", "True")),
+            log_response=_as_bool(gp("log.response", "True")),
+            log_snippet_len=_as_int(gp("log.snippet_len", "600"), 600),
+            log_mask_usucod=_as_bool(gp("log.mask_usucod", "True")),
+            log_db_enable=_as_bool(gp("log.db.enable", "True")),
+            log_db_payload=_as_bool(gp("log.db.payload", "False")),
+            log_db_response=_as_bool(gp("log.db.response", "False")),
+            ws_e03_url=(gp("ws_e03.url") or "").strip(),
+            ws_e03_timeout=_as_int(gp("ws_e03.timeout", "15"), 15),
+            dispatch_workers=max(1, _as_int(gp("dispatch.max_workers", "4"), 4)),
+            outbox_enable=_as_bool(gp("outbox.enable", "True")),
+            outbox_max_attempts=max(1, _as_int(gp("outbox.max_attempts", "8"), 8)),
+        )
+
+    def riepedinfrespcod(self, is_won):
+        return self.riepedinfrespcod_won if is_won else self.riepedinfrespcod_lost
+
+    def logica(self, is_won):
+        return self.logica_won if is_won else self.logica_lost
+
+    def mensaje(self, is_won):
+        return self.msg_won if is_won else self.msg_lost
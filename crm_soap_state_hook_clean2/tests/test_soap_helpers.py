@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de los envelopes y de la lectura de respuestas SOAP
+(models/soap_envelopes.py, models/soap_responses.py), sin Odoo::
+
+    python3 -m pytest crm_soap_state_hook_clean2/tests
+"""
+import html
+import io
+import sys
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "models"))
+
+from soap_envelopes import (  # noqa: E402
+    RIESGO_PEDIDO_E03_FIELDS,
+    EnvelopeTemplate,
+    _legacy_state_change_envelope,
+    _legacy_ws_e03_envelope,
+    build_state_change_envelope,
+    build_ws_e03_envelope,
+    xml_escape,
+)
+from soap_responses import WS_E03_FIELDS, SnippetReader, parse_ws_e03_response  # noqa: E402
+
+SOAP = "{http://schemas.xmlsoap.org/soap/envelope/}"
+GX = "{GX}"
+
+
+# ============== Envelopes ==============
+
+@pytest.mark.parametrize("args", [
+    ("USR01", "123456", "OP-A-LIQ", "Oportunidad Ganada", "u"),
+    (" USR01 ", 123456, " OP ", "  Perdida: <motivo> & 'otro' \"x\"  ", "X"),
+    ("", "", "", "", ""),
+    (None, 0, None, None, None),
+    ("USR", "1", "OP", "ñandú", "z"),
+])
+def test_state_change_envelope_matches_legacy(args):
+    assert build_state_change_envelope(*args) == _legacy_state_change_envelope(*args)
+
+
+def test_state_change_envelope_fields():
+    payload = build_state_change_envelope(" USR01 ", 77, "OP-A", "Ganada <ok> & listo", "m")
+    body = ET.fromstring(payload).find(f"{SOAP}Body/{GX}RiesgoSeguimientoMsgAdd_2_WS.Execute")
+    assert [child.tag[len(GX):] for child in body] == [
+        "Usucod", "Riepedid", "Riepedinfrespcod_nuevo", "Riepedsegrmensaje", "Logicacambioestado",
+    ]
+    assert [child.text or "" for child in body] == ["USR01", "77", "OP-A", "Ganada <ok> & listo", "M"]
+
+
+@pytest.mark.parametrize("logica,expected", [("x", "X"), (" m ", "M"), ("U", "U"), ("otra", "U"), (None, "U")])
+def test_state_change_logica_is_normalized(logica, expected):
+    payload = build_state_change_envelope("U", "1", "C", "M", logica)
+    assert f"<ns1:Logicacambioestado>{expected}</ns1:Logicacambioestado>".encode() in payload
+
+
+def test_ws_e03_envelope_matches_legacy():
+    params = {key: f"valor {i}" for i, key in enumerate(RIESGO_PEDIDO_E03_FIELDS)}
+    params.update(Riepeddompartcalle="Av. Belgrano & <Norte>", Riepeddompartpiso=3, Firma_64="A" * 4096)
+    assert build_ws_e03_envelope(params) == _legacy_ws_e03_envelope(params)
+
+
+def test_ws_e03_envelope_missing_and_empty_params():
+    params = {"Usucod": "USR", "Riepedid": 0, "Parametros": None, "Ajeno": "no va"}
+    payload = build_ws_e03_envelope(params)
+    assert payload == _legacy_ws_e03_envelope(params)
+    body = ET.fromstring(payload).find(f"{SOAP}Body/{GX}RiesgoPedido_WS_E03.Execute")
+    values = {child.tag[len(GX):]: child.text or "" for child in body}
+    assert list(values) == list(RIESGO_PEDIDO_E03_FIELDS)
+    assert values["Usucod"] == "USR"
+    assert values["Riepedid"] == ""
+    assert values["Parametros"] == ""
+    assert b"Ajeno" not in payload
+
+
+def test_template_without_fields():
+    payload = EnvelopeTemplate("Ping.Execute", ()).render({"a": 1})
+    assert ET.fromstring(payload).find(f"{SOAP}Body/{GX}Ping.Execute") is not None
+
+
+@pytest.mark.parametrize("value", ["", "sin nada", "a & b", "<x>", "\"'", "ñ"])
+def test_xml_escape(value):
+    assert xml_escape(value) == html.escape(value)
+
+
+# ============== Respuestas ==============
+
+def _ws_e03_response():
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/">'
+        "<SOAP-ENV:Body>"
+        '<RiesgoPedido_WS_E03.ExecuteResponse xmlns="GX">'
+        "<Riesgopedido_ws_e03_sdt>"
+        "<RiePedID> 4567 </RiePedID>"
+        "<P_OK>S</P_OK>"
+        "<P_Msj>Contrato generado &amp; enviado</P_Msj>"
+        "<Contrato>"
+        "<Resultado>OK</Resultado>"
+        "<URL>https://example.com/c.pdf</URL>"
+        "<Mensaje/>"
+        "<Ruta>/contratos</Ruta>"
+        "<Archivo>c.pdf</Archivo>"
+        "<Formulario_ID>99</Formulario_ID>"
+        "</Contrato>"
+        "<LinkFirma>https://example.com/firma</LinkFirma>"
+        "</Riesgopedido_ws_e03_sdt>"
+        "</RiesgoPedido_WS_E03.ExecuteResponse>"
+        "</SOAP-ENV:Body>"
+        "</SOAP-ENV:Envelope>"
+    ).encode("utf-8")
+
+
+EXPECTED = {
+    "riepedid": "4567",
+    "p_ok": "S",
+    "p_msg": "Contrato generado & enviado",
+    "contrato_resultado": "OK",
+    "contrato_url": "https://example.com/c.pdf",
+    "contrato_mensaje": "",
+    "contrato_ruta": "/contratos",
+    "contrato_archivo": "c.pdf",
+    "contrato_formulario": "99",
+    "link_firma": "https://example.com/firma",
+}
+
+
+def test_parse_ws_e03_response_bytes_and_stream():
+    body = _ws_e03_response()
+    assert parse_ws_e03_response(body) == EXPECTED
+    assert parse_ws_e03_response(io.BytesIO(body)) == EXPECTED
+
+
+def test_parse_ws_e03_response_missing_fields():
+    body = (
+        '<Envelope><Body><R xmlns="GX"><Riesgopedido_ws_e03_sdt>'
+        "<P_OK>N</P_OK>"
+        "</Riesgopedido_ws_e03_sdt></R></Body></Envelope>"
+    ).encode("utf-8")
+    result = parse_ws_e03_response(body)
+    assert set(result) == set(WS_E03_FIELDS.values())
+    assert result["p_ok"] == "N"
+    assert all(value == "" for key, value in result.items() if key != "p_ok")
+
+
+def test_parse_ws_e03_response_first_node_and_namespaces():
+    body = (
+        '<Envelope xmlns:o="otro"><R xmlns="GX">'
+        "<Riesgopedido_ws_e03_sdt><RiePedID>1</RiePedID><o:P_OK>X</o:P_OK>"
+        "<Otro><P_OK>anidado</P_OK></Otro><P_OK>S</P_OK><P_OK>repetido</P_OK>"
+        "</Riesgopedido_ws_e03_sdt>"
+        "<Riesgopedido_ws_e03_sdt><RiePedID>2</RiePedID></Riesgopedido_ws_e03_sdt>"
+        "</R></Envelope>"
+    ).encode("utf-8")
+    result = parse_ws_e03_response(body)
+    assert result["riepedid"] == "1"
+    assert result["p_ok"] == "S"
+
+
+def test_parse_ws_e03_response_without_result():
+    assert parse_ws_e03_response(b"<Envelope><Body><Fault>error</Fault></Body></Envelope>") is None
+
+
+def test_parse_ws_e03_response_invalid_xml():
+    with pytest.raises(ET.ParseError):
+        parse_ws_e03_response(b"<html><body>Runtime Error")
+
+
+def test_snippet_reader_keeps_the_start():
+    body = _ws_e03_response()
+    reader = SnippetReader(io.BytesIO(body), limit=50)
+    assert parse_ws_e03_response(reader) == EXPECTED
+    assert reader.snippet == body[:50]
+    assert reader.snippet_text() == body[:50].decode("utf-8")
+
+
+def test_snippet_reader_limits():
+    reader = SnippetReader(io.BytesIO(b"abcdef"), limit=0)
+    assert reader.read(3) == b"abc"
+    assert reader.snippet == b""
+
+    reader = SnippetReader(io.BytesIO(b"abcdef"), limit=4)
+    assert reader.read(3) == b"abc"
+    assert reader.read() == b"def"
+    assert reader.snippet == b"abcd"
+
+    reader = SnippetReader(io.BytesIO("ñandú".encode("utf-8")), limit=2)
+    buffer = bytearray(10)
+    assert reader.readinto(buffer) == len("ñandú".encode("utf-8"))
+    assert reader.snippet_text() == "ñ"
+    assert reader.readable()
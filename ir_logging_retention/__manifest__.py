@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 {
     "name": "ir_logging_retention",
-    "summary": "Purge programado de ir.logging con retención por días",
-    "version": "18.0.1.0.1",
+    "summary": "Purge programado de ir.logging con retención por días, por origen y nivel",
+    "version": "18.0.1.2.0",
     "author": "Credikot / n8n & Odoo",
     "license": "LGPL-3",
     "depends": ["base"],
     "data": [
+        "security/ir.model.access.csv",
         "data/ir_cron.xml",
+        "views/ir_logging_retention_rule_views.xml",
         "views/res_config_settings_views.xml"
     ],
     "installable": True,
@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 from . import ir_logging_cleanup
+from . import ir_logging_retention_rule
 from . import res_config_settings
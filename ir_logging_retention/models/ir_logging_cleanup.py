@@ -1,85 +1,308 @@
 # -*- coding: utf-8 -*-
+import gzip
+import json
 import logging
+import os
+import time
+
 from dateutil.relativedelta import relativedelta
 from odoo import api, fields, models
+from odoo.tools import config
 
 _logger = logging.getLogger(__name__)
 
 PARAM_KEY = "credikot.ir_logging_retention_days"   # parámetro del sistema
+PARAM_MAX_SECONDS = "credikot.ir_logging_retention_max_seconds"
+PARAM_UNBOUNDED = "credikot.ir_logging_retention_unbounded"
+PARAM_BATCH_SIZE = "credikot.ir_logging_retention_batch_size"
+PARAM_CHECKPOINT = "credikot.ir_logging_retention_checkpoint"
+PARAM_ARCHIVE_DIR = "credikot.ir_logging_retention_archive_dir"
+
+DEFAULT_DAYS = 30
+DEFAULT_MAX_SECONDS = 600
+DEFAULT_BATCH_SIZE = 10000
+ARCHIVE_ITERSIZE = 2000
+ARCHIVE_COLUMNS = ("id", "create_date", "name", "type", "dbname", "level", "path", "func", "line", "message")
+
 
 class IrLoggingCleanup(models.AbstractModel):
     _name = "ir.logging.cleanup"
     _description = "Purge de ir.logging por retención (días)"
 
-    @api.model
-    def run_cleanup(self, dry_run=False, max_rows_per_batch=10000):
-        """Elimina registros de ir_logging con create_date < (now - N días).
-        - N leído de ir.config_parameter (PARAM_KEY).
-        - Borrado por lotes con LIMIT para evitar locks prolongados.
-        """
-        ICP = self.env["ir.config_parameter"].sudo()
+    # ============== Parámetros ==============
 
-        # Leer parámetro N (días). Default 30.
-        days_str = ICP.get_param(PARAM_KEY, default="30")
+    @api.model
+    def _get_int_param(self, key, default, minimum=0, maximum=None):
         try:
-            days = int(days_str)
+            value = int(self.env["ir.config_parameter"].sudo().get_param(key, default=str(default)))
         except Exception:
-            days = 30
+            value = default
+        value = max(minimum, value)
+        return min(value, maximum) if maximum is not None else value
 
-        # Normalizar (0 => deshabilita, tope 3650 días = ~10 años)
-        days = max(0, min(days, 3650))
+    @api.model
+    def _get_checkpoint(self):
+        raw = self.env["ir.config_parameter"].sudo().get_param(PARAM_CHECKPOINT) or "{}"
+        try:
+            checkpoint = json.loads(raw)
+        except ValueError:
+            checkpoint = {}
+        return checkpoint if isinstance(checkpoint, dict) else {}
+
+    @api.model
+    def _set_checkpoint(self, checkpoint):
+        self.env["ir.config_parameter"].sudo().set_param(PARAM_CHECKPOINT, json.dumps(checkpoint))
+
+    # ============== Rangos de ids ==============
+    #
+    # ir_logging no tiene índice sobre create_date, pero los ids crecen con el
+    # tiempo: el corte se busca por bisección sobre la PK (una lectura por
+    # índice por paso) y el borrado va por rangos de id, también por la PK.
+
+    @api.model
+    def _id_bounds(self):
+        self._cr.execute("SELECT min(id), max(id) FROM ir_logging")
+        return self._cr.fetchone()
 
-        if days <= 0:
+    @api.model
+    def _first_row_from(self, from_id):
+        """(id, create_date) de la primera fila con id >= ``from_id``, o None."""
+        self._cr.execute(
+            "SELECT id, create_date FROM ir_logging WHERE id >= %s ORDER BY id LIMIT 1",
+            (from_id,),
+        )
+        return self._cr.fetchone()
+
+    @api.model
+    def _find_cutoff_id(self, threshold_dt, lo, hi):
+        """Primer id en [lo, hi] cuya fila es de ``threshold_dt`` en adelante (hi + 1 si no hay)."""
+        hi += 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = self._first_row_from(mid)
+            if row is None or row[0] >= hi or row[1] >= threshold_dt:
+                hi = mid
+            else:
+                lo = row[0] + 1
+        return lo
+
+    # ============== Política de retención ==============
+    #
+    # Cada registro se rige por la primera regla activa que coincide (orden por
+    # secuencia); los que no coinciden con ninguna usan los días globales
+    # (PARAM_KEY). La política se traduce a expresiones CASE para que cada
+    # lote se resuelva con un solo DELETE.
+
+    @api.model
+    def _retention_policy(self, now):
+        """[(regla, condición, params, umbral o None, archivar)], la global al final (regla vacía)."""
+        Rule = self.env["ir.logging.retention.rule"].sudo()
+        policy = []
+        for rule in Rule.search([]):
+            condition, params = rule._sql_condition()
+            threshold = now - relativedelta(days=rule.retention_days) if rule.retention_days > 0 else None
+            policy.append((rule, condition, params, threshold, rule.archive))
+        days = self._get_int_param(PARAM_KEY, DEFAULT_DAYS, maximum=3650)
+        threshold = now - relativedelta(days=days) if days > 0 else None
+        policy.append((Rule, "TRUE", [], threshold, False))
+        return policy
+
+    @api.model
+    def _policy_case(self, policy, values, cast=""):
+        """``CASE WHEN <regla> THEN <valor> ... ELSE <valor global> END`` y sus parámetros."""
+        sql, params = ["CASE"], []
+        for (_rule, condition, condition_params, *_rest), value in zip(policy[:-1], values[:-1]):
+            sql.append(f"WHEN {condition} THEN %s{cast}")
+            params += condition_params + [value]
+        sql.append(f"ELSE %s{cast} END")
+        params.append(values[-1])
+        return " ".join(sql), params
+
+    # ============== Archivo ==============
+
+    @api.model
+    def _archive_dir(self):
+        default = os.path.join(config["data_dir"], "ir_logging_archive", self._cr.dbname)
+        return self.env["ir.config_parameter"].sudo().get_param(PARAM_ARCHIVE_DIR) or default
+
+    @api.model
+    def _archive_rows(self, archive, where, params, rule_sql, rule_params):
+        """
+        Escribe en ``archive`` (gzip de texto) las filas de ``where`` como JSONL.
+        Lee con un cursor del lado del servidor: nunca hay más de
+        ARCHIVE_ITERSIZE filas en memoria. Devuelve {índice de regla: filas escritas}.
+        """
+        written = {}
+        cursor = self._cr._cnx.cursor(name="ir_logging_retention_archive")
+        try:
+            cursor.itersize = ARCHIVE_ITERSIZE
+            cursor.execute(
+                f"SELECT {rule_sql}, {', '.join(ARCHIVE_COLUMNS)} FROM ir_logging WHERE {where} ORDER BY id",
+                rule_params + params,
+            )
+            for index, *row in cursor:
+                archive.write(json.dumps(dict(zip(ARCHIVE_COLUMNS, row)), default=str, ensure_ascii=False))
+                archive.write("\n")
+                written[index] = written.get(index, 0) + 1
+        finally:
+            cursor.close()
+        # Archivo en disco antes de confirmar el borrado del lote
+        archive.flush()
+        return written
+
+    # ============== Purge ==============
+
+    @api.model
+    def run_cleanup(self, dry_run=False, max_rows_per_batch=None, max_seconds=None, count=False):
+        """Elimina registros de ir_logging vencidos según las reglas de retención.
+        - Reglas por origen (name) y nivel en ir.logging.retention.rule; lo que no
+          coincide con ninguna usa N días de ir.config_parameter (PARAM_KEY).
+        - Con reglas que archivan, las filas vencidas se guardan antes en un
+          .jsonl.gz en el directorio de archivo (PARAM_ARCHIVE_DIR).
+        - Borra por rangos de id (bisección sobre create_date), con commit por lote.
+        - Corta al superar ``max_seconds`` (PARAM_MAX_SECONDS; sin tope con
+          PARAM_UNBOUNDED o ``max_seconds=0``) y guarda el avance en PARAM_CHECKPOINT:
+          la próxima llamada sigue desde ahí.
+        - El COUNT completo de candidatos sólo se hace con ``count=True``.
+        """
+        now = fields.Datetime.now()
+        policy = self._retention_policy(now)
+        thresholds = [entry[3] for entry in policy]
+        if not any(thresholds):
             _logger.info("ir_logging cleanup: retention=0 => SKIP")
             return {"status": "skipped", "reason": "retention=0"}
 
-        # Umbral de fecha/hora (UTC). Se borra TODO lo anterior a este instante.
-        threshold_dt = fields.Datetime.now() - relativedelta(days=days)
+        batch_size = max_rows_per_batch or self._get_int_param(PARAM_BATCH_SIZE, DEFAULT_BATCH_SIZE, minimum=1)
+        if max_seconds is None:
+            if self.env["ir.config_parameter"].sudo().get_param(PARAM_UNBOUNDED):
+                max_seconds = 0
+            else:
+                max_seconds = self._get_int_param(PARAM_MAX_SECONDS, DEFAULT_MAX_SECONDS) or DEFAULT_MAX_SECONDS
+
+        # Umbral más reciente (retención más corta): nada posterior vence en esta corrida.
+        # Por regla, NULL (conservar siempre) hace falsa la comparación.
+        threshold_dt = max(t for t in thresholds if t)
+        expiry_sql, expiry_params = self._policy_case(policy, thresholds, cast="::timestamp")
+        archiving = any(entry[4] for entry in policy)
+        archive_sql, archive_params = self._policy_case(policy, [entry[4] for entry in policy])
+        rule_sql, rule_params = self._policy_case(policy, list(range(len(policy))))
+
+        result = {
+            "status": "ok",
+            "threshold": str(threshold_dt),
+            "retention_days": self._get_int_param(PARAM_KEY, DEFAULT_DAYS, maximum=3650),
+            "rules": len(policy) - 1,
+            "deleted": 0,
+            "archived": 0,
+            "archive_file": False,
+            "batches": 0,
+            "seconds": 0.0,
+            "rows_per_second": 0.0,
+            "finished": True,
+        }
 
         cr = self._cr
-        # Contar candidatos (solo informativo)
-        cr.execute("SELECT count(1) FROM ir_logging WHERE create_date < %s", (threshold_dt,))
-        total_candidates = cr.fetchone()[0]
+        if count:
+            cr.execute(f"SELECT count(1) FROM ir_logging WHERE create_date < {expiry_sql}", expiry_params)
+            result["candidates"] = cr.fetchone()[0]
+
+        min_id, max_id = self._id_bounds()
+        if min_id is None:
+            return dict(result, status="dry_run" if dry_run else "empty")
+
+        started = time.monotonic()
+        cutoff_id = self._find_cutoff_id(threshold_dt, min_id, max_id)
+        # Una pasada cortada por tiempo sigue donde quedó; una completa vuelve a
+        # empezar desde el id más bajo (ahí quedan los registros de retención larga).
+        checkpoint = self._get_checkpoint()
+        start_id = min_id
+        if not checkpoint.get("finished", True) and min_id < checkpoint.get("next_id", 0) <= cutoff_id:
+            start_id = checkpoint["next_id"]
 
         if dry_run:
-            _logger.info("ir_logging cleanup (dry-run): %s candidatos (< %s)", total_candidates, threshold_dt)
-            return {"status": "dry_run", "threshold": str(threshold_dt), "candidates": total_candidates}
-
-        total_deleted = 0
-
-        # Borrado en lotes usando subquery con LIMIT
-        while True:
-            cr.execute("""
-                DELETE FROM ir_logging
-                WHERE id IN (
-                    SELECT id
-                    FROM ir_logging
-                    WHERE create_date < %s
-                    ORDER BY id
-                    LIMIT %s
-                )
-                RETURNING id
-            """, (threshold_dt, max_rows_per_batch))
-            deleted_ids = cr.fetchall()
-            batch_deleted = len(deleted_ids)
-            total_deleted += batch_deleted
+            _logger.info(
+                "ir_logging cleanup (dry-run): ids %s..%s (< %s), %s reglas%s",
+                start_id, cutoff_id - 1, threshold_dt, result["rules"],
+                f", {result['candidates']} candidatos" if count else "",
+            )
+            return dict(result, status="dry_run", id_range=[start_id, cutoff_id - 1], finished=start_id >= cutoff_id)
 
-            # Commit por lote grande para liberar locks
-            if batch_deleted >= max_rows_per_batch:
-                cr.commit()
+        commit = not self.env.registry.in_test_mode()
+        deleted_by_rule = [0] * len(policy)
+        archived_by_rule = [0] * len(policy)
+        archive = None
+        next_id = start_id
+        try:
+            while next_id < cutoff_id:
+                if max_seconds and time.monotonic() - started >= max_seconds:
+                    result["finished"] = False
+                    break
+                row = self._first_row_from(next_id)
+                if row is None or row[0] >= cutoff_id:
+                    next_id = cutoff_id
+                    break
+                # Salta los huecos de ids ya borrados
+                end_id = min(row[0] + batch_size, cutoff_id)
+                # La condición de fecha también cubre filas fuera de orden
+                where = f"id >= %s AND id < %s AND create_date < {expiry_sql}"
+                where_params = [row[0], end_id] + expiry_params
+                if archiving:
+                    if archive is None:
+                        archive_dir = self._archive_dir()
+                        os.makedirs(archive_dir, exist_ok=True)
+                        result["archive_file"] = os.path.join(
+                            archive_dir, f"ir_logging_{now.strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+                        )
+                        archive = gzip.open(result["archive_file"], "at", encoding="utf-8")
+                    batch_archived = self._archive_rows(
+                        archive, f"{where} AND {archive_sql}", where_params + archive_params, rule_sql, rule_params
+                    )
+                    for index, archived in batch_archived.items():
+                        archived_by_rule[index] += archived
+                cr.execute(
+                    f"WITH deleted AS (DELETE FROM ir_logging WHERE {where} RETURNING name, level)"
+                    f" SELECT {rule_sql}, count(*) FROM deleted GROUP BY 1",
+                    where_params + rule_params,
+                )
+                for index, deleted in cr.fetchall():
+                    deleted_by_rule[index] += deleted
+                result["batches"] += 1
+                next_id = end_id
+                # Commit por lote para liberar locks
+                if commit:
+                    cr.commit()
+        finally:
+            if archive is not None:
+                archive.close()
+                if not any(archived_by_rule):
+                    os.remove(result["archive_file"])
+                    result["archive_file"] = False
 
-            if batch_deleted < max_rows_per_batch:
-                break
+        result["deleted"] = sum(deleted_by_rule)
+        result["archived"] = sum(archived_by_rule)
+        result["seconds"] = round(time.monotonic() - started, 3)
+        if result["seconds"]:
+            result["rows_per_second"] = round(result["deleted"] / result["seconds"], 1)
+        result["id_range"] = [start_id, next_id - 1]
+        result["remaining_ids"] = max(0, cutoff_id - next_id)
+        for (rule, *_rest), deleted, archived in zip(policy[:-1], deleted_by_rule, archived_by_rule):
+            rule.write({"last_run_at": now, "last_deleted": deleted, "last_archived": archived})
+        # Un solo set_param por corrida (cada escritura de parámetros limpia los caches
+        # del registro); si la corrida se corta antes, lo ya borrado igual quedó confirmado.
+        self._set_checkpoint({
+            "next_id": next_id,
+            "cutoff_id": cutoff_id,
+            "threshold": str(threshold_dt),
+            "deleted": result["deleted"],
+            "archived": result["archived"],
+            "seconds": result["seconds"],
+            "rows_per_second": result["rows_per_second"],
+            "finished": result["finished"],
+        })
 
         _logger.info(
-            "ir_logging cleanup: eliminados %s de %s registros anteriores a %s (retención=%s días)",
-            total_deleted, total_candidates, threshold_dt, days
+            "ir_logging cleanup: eliminados %s registros (%s archivados) en %s lotes, %.1fs (%.0f filas/s)%s",
+            result["deleted"], result["archived"], result["batches"], result["seconds"], result["rows_per_second"],
+            "" if result["finished"] else f"; tiempo agotado, quedan ~{result['remaining_ids']} ids para la próxima corrida",
         )
-
-        return {
-            "status": "ok",
-            "deleted": total_deleted,
-            "candidates": total_candidates,
-            "threshold": str(threshold_dt),
-            "retention_days": days,
-        }
+        return result
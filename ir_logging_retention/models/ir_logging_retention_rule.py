@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+LOG_LEVELS = [
+    ("DEBUG", "DEBUG"),
+    ("INFO", "INFO"),
+    ("WARNING", "WARNING"),
+    ("ERROR", "ERROR"),
+    ("CRITICAL", "CRITICAL"),
+]
+
+
+class IrLoggingRetentionRule(models.Model):
+    _name = "ir.logging.retention.rule"
+    _description = "Regla de retención de ir.logging por origen y nivel"
+    _order = "sequence, id"
+
+    name = fields.Char(string="Descripción", required=True)
+    sequence = fields.Integer(default=10, help="Cada registro de log se rige por la primera regla que coincide.")
+    active = fields.Boolean(default=True)
+    logger_name = fields.Char(
+        string="Origen",
+        help="Campo name de ir.logging (p.ej. lineas_oferta_api). Admite % como comodín. Vacío = todos.",
+    )
+    level = fields.Selection(LOG_LEVELS, string="Nivel", help="Vacío = todos los niveles.")
+    retention_days = fields.Integer(string="Días a conservar", required=True, default=30, help="0 = conservar siempre.")
+    archive = fields.Boolean(
+        string="Archivar antes de borrar",
+        help="Guarda los registros vencidos en archivos JSONL comprimidos antes de borrarlos.",
+    )
+    last_run_at = fields.Datetime(string="Última corrida", readonly=True)
+    last_deleted = fields.Integer(string="Borrados (última corrida)", readonly=True)
+    last_archived = fields.Integer(string="Archivados (última corrida)", readonly=True)
+
+    _sql_constraints = [
+        ("retention_days_positive", "CHECK(retention_days >= 0)", "Los días a conservar no pueden ser negativos."),
+    ]
+
+    def _sql_condition(self):
+        """Condición SQL (sobre ir_logging) de los registros que rige la regla."""
+        self.ensure_one()
+        clauses, params = [], []
+        if (self.logger_name or "").strip():
+            clauses.append("name LIKE %s")
+            params.append(self.logger_name.strip())
+        if self.level:
+            clauses.append("level = %s")
+            params.append(self.level)
+        return " AND ".join(clauses) or "TRUE", params
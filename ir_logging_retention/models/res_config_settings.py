@@ -1,7 +1,15 @@
 # -*- coding: utf-8 -*-
 from odoo import fields, models
 
-PARAM_KEY = "credikot.ir_logging_retention_days"
+from .ir_logging_cleanup import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_SECONDS,
+    PARAM_ARCHIVE_DIR,
+    PARAM_BATCH_SIZE,
+    PARAM_KEY,
+    PARAM_MAX_SECONDS,
+    PARAM_UNBOUNDED,
+)
 
 class ResConfigSettings(models.TransientModel):
     _inherit = "res.config.settings"
@@ -12,3 +20,26 @@ class ResConfigSettings(models.TransientModel):
         default=30,
         help="Cantidad de días a conservar en ir.logging. 0 deshabilita el purge."
     )
+    ir_logging_retention_max_seconds = fields.Integer(
+        string="Tiempo máximo por corrida (s)",
+        config_parameter=PARAM_MAX_SECONDS,
+        default=DEFAULT_MAX_SECONDS,
+        help="El purge se corta al superar este tiempo y sigue en la próxima corrida. Debe ser mayor "
+             "que 0 (vacío o 0 vuelve al valor por defecto); para no cortar usar \"Sin límite de tiempo\"."
+    )
+    ir_logging_retention_unbounded = fields.Boolean(
+        string="Sin límite de tiempo",
+        config_parameter=PARAM_UNBOUNDED,
+        help="El purge corre hasta terminar, sin cortar por tiempo."
+    )
+    ir_logging_retention_batch_size = fields.Integer(
+        string="Ids por lote",
+        config_parameter=PARAM_BATCH_SIZE,
+        default=DEFAULT_BATCH_SIZE,
+        help="Ancho del rango de ids borrado (y confirmado) en cada lote."
+    )
+    ir_logging_retention_archive_dir = fields.Char(
+        string="Directorio de archivo",
+        config_parameter=PARAM_ARCHIVE_DIR,
+        help="Dónde se guardan los .jsonl.gz de las reglas que archivan. Vacío = <data_dir>/ir_logging_archive/<base>."
+    )
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+{
+    "name": "Integración Legacy (cliente HTTP compartido)",
+    "summary": "Sesión HTTP con pool y keep-alive compartida por las integraciones con los servicios legacy.",
+    "version": "18.0.1.3.0",
+    "author": "Credikot",
+    "website": "https://cooperativacredikot.com.ar",
+    "category": "Technical",
+    "license": "LGPL-3",
+    "depends": ["base", "crm"],
+    "data": [
+        "security/ir.model.access.csv",
+        "data/ir_cron.xml",
+        "views/integration_log_views.xml",
+        "views/integration_metric_views.xml",
+        "views/response_cache_views.xml",
+        "views/res_config_settings_views.xml",
+    ],
+    "installable": True,
+    "application": False,
+    "description": """
+Capa común para las llamadas a los servicios legacy (ServicioConsultas3_WS y SOAP GX).
+- Una sesión requests por worker, con pool de conexiones y keep-alive.
+- Política de reintentos con backoff y timeouts configurables por consulta.
+- Log propio de integraciones (integration.log), fuera de ir.logging: origen,
+  oportunidad, id de solicitud, endpoint, latencia y status HTTP, indexado por
+  (origen, oportunidad, fecha) y BRIN por fecha. Escritura diferida (un INSERT
+  por transacción) con legacy.log.sink.log() y purge diario por retención.
+- Métricas de cada llamada saliente (duración, bytes, resultado) por consulta u
+  operación SOAP, agregadas en intervalos de 5 minutos (integration.metric), con
+  vista gráfica y exportación Prometheus en /legacy_integration/metrics.
+- Caché de respuestas por (consulta, parámetro) con vigencia configurable y hash
+  del contenido (legacy.response.cache), con contadores de aciertos y descargas.
+""",
+}
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import hmac
+
+from odoo import http
+from odoo.http import request
+
+from ..models.integration_metric import TOKEN_PARAM
+
+
+class LegacyIntegrationMetrics(http.Controller):
+
+    @http.route("/legacy_integration/metrics", type="http", auth="none", methods=["GET"], csrf=False, save_session=False)
+    def prometheus_metrics(self, token=None, **kwargs):
+        """Métricas de llamadas legacy en formato Prometheus.
+
+        Requiere el token de ``legacy_integration.metrics.token`` en
+        ``Authorization: Bearer <token>`` o ``?token=``; sin token configurado
+        el endpoint queda deshabilitado.
+        """
+        if not request.db:
+            return request.not_found()
+        env = request.env(su=True)
+        expected = env["ir.config_parameter"].get_param(TOKEN_PARAM) or ""
+        auth = request.httprequest.headers.get("Authorization", "")
+        given = auth[7:].strip() if auth.lower().startswith("bearer ") else (token or "")
+        if not expected or not hmac.compare_digest(given.encode(), expected.encode()):
+            return request.make_response("forbidden\n", status=403, headers=[("Content-Type", "text/plain")])
+        body = env["integration.metric"]._prometheus_text()
+        return request.make_response(body, headers=[("Content-Type", "text/plain; version=0.0.4; charset=utf-8")])
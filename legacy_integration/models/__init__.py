@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from . import integration_log
+from . import integration_metric
+from . import legacy_client
+from . import log_sink
+from . import response_cache
+from . import sync_mixin
+from . import res_config_settings
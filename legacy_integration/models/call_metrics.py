@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Medición de las llamadas salientes a los servicios legacy.
+
+Cada POST se envuelve con :func:`timed_call`: mide la duración (incluidos los
+reintentos), los bytes enviados/recibidos y el resultado, y lo suma en un
+acumulador del proceso por (intervalo, endpoint, resultado). No usa el ORM,
+así que corre igual en los threads que hacen el I/O; el volcado a
+``integration.metric`` lo hace el thread del request al confirmar.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+BUCKET_SECONDS = 300
+# Límites del histograma de duración (segundos), como ``le`` de Prometheus
+DURATION_BOUNDS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+OUTCOMES = ("ok", "http_error", "timeout", "connection_error", "error")
+
+
+def _bucket_start(ts):
+    start = int(ts) - int(ts) % BUCKET_SECONDS
+    return datetime.fromtimestamp(start, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _payload_size(data):
+    if data is None:
+        return 0
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+
+def _response_size(response, stream):
+    if stream:
+        try:
+            return int(response.headers.get("Content-Length") or 0)
+        except ValueError:
+            return 0
+    return len(response.content or b"")
+
+
+def classify(response=None, exc=None):
+    if exc is not None:
+        if isinstance(exc, requests.Timeout):
+            return "timeout"
+        if isinstance(exc, requests.ConnectionError):
+            return "connection_error"
+        return "error"
+    return "ok" if response.status_code < 400 else "http_error"
+
+
+class _Sample:
+    __slots__ = ("count", "total_ms", "max_ms", "bytes_out", "bytes_in", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.histogram = [0] * len(DURATION_BOUNDS)
+
+
+class CallMetrics:
+    """Acumulador del proceso {(intervalo, endpoint, resultado): _Sample}, seguro entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, endpoint, outcome, seconds, bytes_out=0, bytes_in=0, ts=None):
+        key = (_bucket_start(time.time() if ts is None else ts), endpoint, outcome)
+        ms = seconds * 1000.0
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                sample = self._samples[key] = _Sample()
+            sample.count += 1
+            sample.total_ms += ms
+            if ms > sample.max_ms:
+                sample.max_ms = ms
+            sample.bytes_out += bytes_out
+            sample.bytes_in += bytes_in
+            for i, bound in enumerate(DURATION_BOUNDS):
+                if seconds <= bound:
+                    sample.histogram[i] += 1
+
+    def drain(self):
+        """Devuelve y vacía lo acumulado: [(intervalo, endpoint, resultado, _Sample)]."""
+        with self._lock:
+            samples, self._samples = self._samples, {}
+        return [key + (sample,) for key, sample in samples.items()]
+
+    def restore(self, rows):
+        """Devuelve al acumulador filas de un volcado que no se pudo confirmar."""
+        with self._lock:
+            for bucket, endpoint, outcome, sample in rows:
+                current = self._samples.get((bucket, endpoint, outcome))
+                if current is None:
+                    self._samples[(bucket, endpoint, outcome)] = sample
+                    continue
+                current.count += sample.count
+                current.total_ms += sample.total_ms
+                current.max_ms = max(current.max_ms, sample.max_ms)
+                current.bytes_out += sample.bytes_out
+                current.bytes_in += sample.bytes_in
+                current.histogram = [a + b for a, b in zip(current.histogram, sample.histogram)]
+
+    def __bool__(self):
+        return bool(self._samples)
+
+
+_METRICS_BY_DB = {}
+_METRICS_LOCK = threading.Lock()
+
+
+def metrics_for(dbname):
+    """Acumulador de la base ``dbname`` (un proceso puede atender varias bases)."""
+    metrics = _METRICS_BY_DB.get(dbname)
+    if metrics is None:
+        with _METRICS_LOCK:
+            metrics = _METRICS_BY_DB.setdefault(dbname, CallMetrics())
+    return metrics
+
+
+def timed_call(endpoint, func, metrics, data=None, stream=False):
+    """Ejecuta ``func()`` (un POST preparado) y registra su duración y resultado."""
+    started = time.perf_counter()
+    try:
+        response = func()
+    except Exception as exc:
+        metrics.record(endpoint, classify(exc=exc), time.perf_counter() - started, _payload_size(data))
+        raise
+    metrics.record(
+        endpoint,
+        classify(response),
+        time.perf_counter() - started,
+        _payload_size(data),
+        _response_size(response, stream),
+    )
+    return response
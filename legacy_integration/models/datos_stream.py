@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura incremental de las respuestas de ServicioConsultas3_WS.
+
+Las consultas devuelven ``{"DATOS": [...], ...}``. :class:`DatosStream` lee el
+cuerpo por bloques (``iter_content``), lo decodifica de a poco y entrega los
+ítems de ``DATOS`` de a uno, sin armar el texto completo ni el objeto JSON
+entero en memoria. Detecta las respuestas vacías y las páginas HTML de error
+antes de parsear y calcula el hash del cuerpo (``content_hash``) al leerlo.
+
+Los ítems se entregan a medida que se leen: un error de formato más adelante
+en el cuerpo se lanza durante la iteración, así que conviene terminar de
+iterar antes de modificar datos.
+"""
+import codecs
+import hashlib
+import json
+
+CHUNK_SIZE = 64 * 1024
+HEAD_SIZE = 500
+_BLANK = " \t\r\n"
+_LEADING = "\ufeff" + _BLANK
+
+
+class PayloadError(ValueError):
+    """La respuesta no es un objeto JSON con la lista ``DATOS``."""
+
+
+class EmptyPayloadError(PayloadError):
+    """La respuesta llegó vacía (o sólo con BOM/blancos)."""
+
+
+class HtmlPayloadError(PayloadError):
+    """La respuesta es HTML (página de error del servidor); ``snippet`` tiene el comienzo."""
+
+    def __init__(self, snippet):
+        super().__init__(f"La respuesta es HTML (posible error): {snippet}")
+        self.snippet = snippet
+
+
+class InvalidJsonError(PayloadError):
+    """El cuerpo no es JSON válido (o llegó truncado)."""
+
+
+class MissingDatosError(PayloadError):
+    """JSON válido sin la clave ``DATOS`` o con ``DATOS`` que no es una lista."""
+
+
+class DatosStream:
+    """
+    Iterador de los ítems de ``DATOS``.
+
+    - ``head``: primeros ``HEAD_SIZE`` caracteres del cuerpo (para logs), sin BOM.
+    - ``count``: ítems entregados hasta el momento.
+    - ``content_hash``: SHA-256 del cuerpo leído (completo al terminar de iterar).
+
+    Al terminar (o al cortar la iteración) cierra la respuesta, para devolver
+    la conexión al pool cuando se pidió con ``stream=True``.
+    """
+
+    def __init__(self, chunks, encoding="utf-8", close=None):
+        self._chunks = iter(chunks)
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._close = close
+        self._json = json.JSONDecoder()
+        self._sha = hashlib.sha256()
+        self._buf = ""
+        self._pos = 0
+        self._offset = 0
+        self._eof = False
+        self.head = ""
+        self.count = 0
+
+    @classmethod
+    def from_response(cls, response, chunk_size=CHUNK_SIZE):
+        # Misma codificación que ``response.text``; sin charset declarado, UTF-8 como ``response.json()``
+        return cls(response.iter_content(chunk_size), encoding=response.encoding, close=response.close)
+
+    @property
+    def content_hash(self):
+        return self._sha.hexdigest()
+
+    def __iter__(self):
+        try:
+            yield from self._items()
+        finally:
+            if self._close:
+                self._close()
+
+    # ============== Buffer ==============
+
+    def _fill(self):
+        """Agrega el próximo bloque al buffer; False si ya no hay más datos."""
+        if self._eof:
+            return False
+        if self._pos > CHUNK_SIZE:
+            self._offset += self._pos
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            self._sha.update(chunk)
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buf += text
+                return True
+        self._eof = True
+        self._buf += self._decoder.decode(b"", final=True)
+        return True
+
+    def _peek(self, blank=_BLANK):
+        """Salta ``blank`` y devuelve el próximo carácter ("" al final del cuerpo)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in blank:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            self._invalid(f"se esperaba '{char}'" + (f" y llegó '{found}'" if found else " y terminó la respuesta"))
+        self._pos += 1
+
+    def _invalid(self, msg):
+        raise InvalidJsonError(f"JSON inválido: {msg} (carácter {self._offset + self._pos})")
+
+    def _value(self):
+        """Decodifica el próximo valor JSON (salteando blancos)."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as exc:
+                if not self._fill():
+                    raise InvalidJsonError(
+                        f"JSON inválido: {exc.msg} (carácter {self._offset + exc.pos})"
+                    ) from None
+                continue
+            # Un número al final del buffer puede seguir en el próximo bloque
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    # ============== Parseo ==============
+
+    def _items(self):
+        first = self._peek(_LEADING)
+        while len(self._buf) - self._pos < HEAD_SIZE and self._fill():
+            pass
+        self.head = self._buf[self._pos:self._pos + HEAD_SIZE]
+        if not first:
+            raise EmptyPayloadError("La respuesta llegó vacía")
+        if first == "<":
+            raise HtmlPayloadError(self.head)
+        if first != "{":
+            self._value()
+            raise MissingDatosError("La respuesta no es un objeto JSON con DATOS")
+        self._pos += 1
+
+        found = False
+        if self._peek() == "}":
+            self._pos += 1
+        else:
+            while True:
+                if self._peek() != '"':
+                    self._invalid("se esperaba una clave")
+                key = self._value()
+                self._expect(":")
+                if key == "DATOS":
+                    if self._peek() != "[":
+                        self._value()
+                        raise MissingDatosError("DATOS no es una lista")
+                    self._pos += 1
+                    found = True
+                    yield from self._list_items()
+                else:
+                    self._value()
+                separator = self._peek()
+                self._pos += 1
+                if separator == "}":
+                    break
+                if separator != ",":
+                    self._pos -= 1
+                    self._invalid("se esperaba ',' o '}'")
+        if self._peek():
+            self._invalid("contenido después del objeto")
+        if not found:
+            raise MissingDatosError("Falta la clave DATOS")
+
+    def _list_items(self):
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            if not self._peek():
+                self._invalid("la lista DATOS terminó sin cerrar")
+            item = self._value()
+            self.count += 1
+            yield item
+            separator = self._peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                self._pos -= 1
+                self._invalid("se esperaba ',' o ']'")
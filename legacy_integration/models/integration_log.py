@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+RETENTION_PARAM = "legacy_integration.log.retention_days"
+DEFAULT_RETENTION_DAYS = 90
+KEEP_FOREVER_PARAM = "legacy_integration.log.keep_forever"
+PURGE_MAX_SECONDS_PARAM = "legacy_integration.log.purge_max_seconds"
+PURGE_UNBOUNDED_PARAM = "legacy_integration.log.purge_unbounded"
+DEFAULT_PURGE_MAX_SECONDS = 600
+PURGE_SLICE_HOURS = 1
+
+LEVEL_SELECTION = [
+    ("DEBUG", "DEBUG"),
+    ("INFO", "INFO"),
+    ("WARNING", "WARNING"),
+    ("ERROR", "ERROR"),
+    ("CRITICAL", "CRITICAL"),
+]
+
+
+class IntegrationLog(models.Model):
+    """
+    Log de las integraciones con los servicios legacy, separado de ir.logging.
+
+    Sólo se inserta (por SQL, desde ``legacy.log.sink``) y se purga por fecha;
+    no se edita. Índices:
+    - (source, lead_id, create_date): "llamadas de la integración X para el lead Y".
+    - lead_id parcial: todas las llamadas de un lead y el ``ON DELETE SET NULL``.
+    - BRIN sobre create_date: rangos de fechas y purge sin un índice btree grande
+      (las filas llegan en orden de fecha).
+    """
+
+    _name = "integration.log"
+    _description = "Log de integraciones legacy"
+    _log_access = False
+    _order = "create_date desc, id desc"
+    _rec_name = "source"
+
+    create_date = fields.Datetime(string="Fecha", readonly=True, default=fields.Datetime.now)
+    create_uid = fields.Many2one("res.users", string="Usuario", readonly=True)
+    source = fields.Char(string="Origen", required=True, readonly=True)
+    level = fields.Selection(LEVEL_SELECTION, string="Nivel", required=True, readonly=True, default="INFO")
+    message = fields.Text(string="Mensaje", readonly=True)
+    func = fields.Char(string="Función", readonly=True)
+    path = fields.Char(string="Módulo", readonly=True)
+    lead_id = fields.Many2one("crm.lead", string="Oportunidad", readonly=True, ondelete="set null")
+    request_ref = fields.Char(string="ID de solicitud", readonly=True)
+    endpoint = fields.Char(string="Endpoint", readonly=True)
+    latency_ms = fields.Integer(string="Latencia (ms)", readonly=True, aggregator="avg")
+    http_status = fields.Integer(string="HTTP", readonly=True, aggregator=None)
+
+    def init(self):
+        create_index(
+            self._cr, "integration_log_source_lead_date_idx", self._table, ["source", "lead_id", "create_date"]
+        )
+        create_index(
+            self._cr, "integration_log_lead_id_idx", self._table, ["lead_id"], where="lead_id IS NOT NULL"
+        )
+        create_index(
+            self._cr, "integration_log_request_ref_idx", self._table, ["request_ref"], where="request_ref IS NOT NULL"
+        )
+        create_index(self._cr, "integration_log_create_date_brin", self._table, ["create_date"], method="brin")
+
+    @api.model
+    def _cron_purge(self):
+        """
+        Borra los logs más viejos que ``legacy_integration.log.retention_days``, salvo
+        con ``legacy_integration.log.keep_forever``.
+
+        Borra por rangos de ``create_date`` de una hora, que resuelve el índice BRIN,
+        confirmando cada rango y con un tope de ``legacy_integration.log.purge_max_seconds``
+        por corrida, salvo con ``legacy_integration.log.purge_unbounded`` (lo que quede
+        sigue en la próxima). El comienzo sale de la fila de
+        menor id (las filas llegan en orden de fecha), con una hora de margen para las
+        que se confirmaron algo después de creadas.
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        if ICP.get_param(KEEP_FOREVER_PARAM):
+            return 0
+        raw = ICP.get_param(RETENTION_PARAM, DEFAULT_RETENTION_DAYS)
+        try:
+            days = max(0, int(raw))
+        except (TypeError, ValueError):
+            days = DEFAULT_RETENTION_DAYS
+        if not days:
+            return 0
+        max_seconds = 0
+        if not ICP.get_param(PURGE_UNBOUNDED_PARAM):
+            try:
+                max_seconds = int(ICP.get_param(PURGE_MAX_SECONDS_PARAM, DEFAULT_PURGE_MAX_SECONDS))
+            except (TypeError, ValueError):
+                max_seconds = DEFAULT_PURGE_MAX_SECONDS
+            if max_seconds <= 0:
+                max_seconds = DEFAULT_PURGE_MAX_SECONDS
+        threshold = fields.Datetime.now() - relativedelta(days=days)
+
+        self._cr.execute("SELECT create_date FROM integration_log ORDER BY id LIMIT 1")
+        row = self._cr.fetchone()
+        if not row or not row[0] or row[0] >= threshold:
+            return 0
+        step = relativedelta(hours=PURGE_SLICE_HOURS)
+        start = row[0] - step
+        started = time.monotonic()
+        total = 0
+        while start < threshold:
+            end = min(start + step, threshold)
+            self._cr.execute(
+                "DELETE FROM integration_log WHERE create_date >= %s AND create_date < %s", [start, end]
+            )
+            total += self._cr.rowcount
+            start = end
+            if not self.env.registry.in_test_mode():
+                self._cr.commit()
+            if max_seconds and time.monotonic() - started >= max_seconds:
+                _logger.info("integration.log: purge cortado por tiempo en %s (sigue en la próxima corrida)", start)
+                break
+        _logger.info("integration.log: %s registros anteriores a %s eliminados", total, start)
+        return total
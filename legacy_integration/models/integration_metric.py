@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+
+from .call_metrics import DURATION_BOUNDS, metrics_for
+
+_logger = logging.getLogger(__name__)
+
+RETENTION_PARAM = "legacy_integration.metrics.retention_days"
+KEEP_FOREVER_PARAM = "legacy_integration.metrics.keep_forever"
+TOKEN_PARAM = "legacy_integration.metrics.token"
+DEFAULT_RETENTION_DAYS = 30
+FLUSH_KEY = "legacy_integration.metrics_flush"
+UPSERT_CHUNK_SIZE = 500
+# Columnas del histograma, en el orden de DURATION_BOUNDS
+HISTOGRAM_FIELDS = ("le_100ms", "le_500ms", "le_1s", "le_2_5s", "le_5s", "le_10s")
+PROMETHEUS_WINDOW_MINUTES = 15
+
+
+def _prom_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class IntegrationMetric(models.Model):
+    """
+    Llamadas a los servicios legacy agregadas por intervalo de 5 minutos,
+    endpoint (consulta u operación SOAP) y resultado.
+
+    Las llamadas se miden en ``legacy.client`` y se acumulan en memoria del
+    proceso; al terminar la transacción que las hizo se suman acá con un
+    UPSERT por intervalo, en un cursor aparte. Si el volcado falla, lo
+    acumulado vuelve a memoria y sale con el siguiente.
+    """
+
+    _name = "integration.metric"
+    _description = "Métricas de llamadas a servicios legacy"
+    _log_access = False
+    _order = "bucket_start desc, endpoint, outcome"
+    _rec_name = "endpoint"
+
+    bucket_start = fields.Datetime(string="Intervalo", required=True, readonly=True)
+    endpoint = fields.Char(string="Endpoint", required=True, readonly=True)
+    outcome = fields.Selection(
+        [
+            ("ok", "OK"),
+            ("http_error", "Error HTTP"),
+            ("timeout", "Timeout"),
+            ("connection_error", "Error de conexión"),
+            ("error", "Otro error"),
+        ],
+        string="Resultado",
+        required=True,
+        readonly=True,
+    )
+    call_count = fields.Integer(string="Llamadas", readonly=True)
+    total_ms = fields.Float(string="Tiempo total (ms)", readonly=True)
+    avg_ms = fields.Float(string="Promedio (ms)", readonly=True, aggregator="avg")
+    max_ms = fields.Float(string="Máximo (ms)", readonly=True, aggregator="max")
+    bytes_out = fields.Integer(string="Bytes enviados", readonly=True)
+    bytes_in = fields.Integer(string="Bytes recibidos", readonly=True)
+    le_100ms = fields.Integer(string="≤ 0,1 s", readonly=True)
+    le_500ms = fields.Integer(string="≤ 0,5 s", readonly=True)
+    le_1s = fields.Integer(string="≤ 1 s", readonly=True)
+    le_2_5s = fields.Integer(string="≤ 2,5 s", readonly=True)
+    le_5s = fields.Integer(string="≤ 5 s", readonly=True)
+    le_10s = fields.Integer(string="≤ 10 s", readonly=True)
+
+    _sql_constraints = [
+        ("bucket_endpoint_outcome_uniq", "unique(bucket_start, endpoint, outcome)", "Intervalo duplicado."),
+    ]
+
+    # ============== Volcado ==============
+
+    @api.model
+    def _schedule_flush(self):
+        """
+        Vuelca lo acumulado al terminar la transacción actual (confirmada o no),
+        una vez por transacción y en un cursor propio: el volcado no alarga ni
+        hace fallar la transacción del usuario.
+        """
+        cr = self.env.cr
+        if not cr.postcommit.data.get(FLUSH_KEY):
+            cr.postcommit.data[FLUSH_KEY] = True
+            cr.postcommit.add(self._flush)
+            cr.postrollback.add(self._flush)
+
+    def _flush(self):
+        metrics = metrics_for(self.env.cr.dbname)
+        rows = metrics.drain()
+        if not rows:
+            return
+        # Orden fijo de las claves: dos workers que vuelcan intervalos en común
+        # toman los locks de las filas en el mismo orden
+        rows.sort(key=lambda row: row[:3])
+        columns = ("bucket_start", "endpoint", "outcome", "call_count", "total_ms", "avg_ms", "max_ms",
+                   "bytes_out", "bytes_in") + HISTOGRAM_FIELDS
+        accumulate = [col for col in columns[3:] if col not in ("avg_ms", "max_ms")]
+        updates = [f"{col} = m.{col} + EXCLUDED.{col}" for col in accumulate] + [
+            "max_ms = GREATEST(m.max_ms, EXCLUDED.max_ms)",
+            "avg_ms = (m.total_ms + EXCLUDED.total_ms) / NULLIF(m.call_count + EXCLUDED.call_count, 0)",
+        ]
+        values = [
+            (bucket, endpoint, outcome, s.count, s.total_ms, s.total_ms / s.count, s.max_ms,
+             s.bytes_out, s.bytes_in, *s.histogram)
+            for bucket, endpoint, outcome, s in rows
+        ]
+        try:
+            with self.env.registry.cursor() as cr:
+                for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+                    chunk = values[start:start + UPSERT_CHUNK_SIZE]
+                    cr.execute(
+                        f"INSERT INTO integration_metric AS m ({', '.join(columns)})"
+                        " VALUES " + ", ".join(["%s"] * len(chunk)) +
+                        " ON CONFLICT (bucket_start, endpoint, outcome) DO UPDATE SET " + ", ".join(updates),
+                        chunk,
+                    )
+        except Exception:
+            # Se reintenta con el próximo volcado; las métricas no hacen fallar al llamador
+            metrics.restore(rows)
+            _logger.warning("integration.metric: no se pudieron volcar %s intervalos", len(rows), exc_info=True)
+            return
+        _logger.debug("integration.metric: %s intervalos actualizados", len(rows))
+
+    # ============== Exportación ==============
+
+    @api.model
+    def _prometheus_text(self, window_minutes=PROMETHEUS_WINDOW_MINUTES):
+        """
+        Métricas en formato de texto de Prometheus:
+        - contadores e histograma acumulados sobre los intervalos conservados;
+        - promedio, máximo y tasa de error de los últimos ``window_minutes``.
+        """
+        self._flush()
+        cr = self.env.cr
+        histogram_sums = ", ".join(f"sum({col})" for col in HISTOGRAM_FIELDS)
+        cr.execute(
+            f"""
+            SELECT endpoint, outcome, sum(call_count), sum(total_ms), sum(bytes_out), sum(bytes_in), {histogram_sums}
+              FROM integration_metric
+             GROUP BY endpoint, outcome
+             ORDER BY endpoint, outcome
+            """
+        )
+        totals = cr.fetchall()
+        since = fields.Datetime.now() - relativedelta(minutes=window_minutes)
+        cr.execute(
+            """
+            SELECT endpoint,
+                   sum(total_ms) / NULLIF(sum(call_count), 0),
+                   max(max_ms),
+                   sum(call_count) FILTER (WHERE outcome <> 'ok')::float / NULLIF(sum(call_count), 0)
+              FROM integration_metric
+             WHERE bucket_start >= %s
+             GROUP BY endpoint
+             ORDER BY endpoint
+            """,
+            [since],
+        )
+        window = cr.fetchall()
+
+        lines = [
+            "# HELP legacy_integration_calls_total Llamadas a servicios legacy por endpoint y resultado.",
+            "# TYPE legacy_integration_calls_total counter",
+        ]
+        by_endpoint = {}
+        for endpoint, outcome, count, total_ms, bytes_out, bytes_in, *histogram in totals:
+            label = _prom_label(endpoint)
+            lines.append(f'legacy_integration_calls_total{{endpoint="{label}",outcome="{outcome}"}} {count}')
+            agg = by_endpoint.setdefault(endpoint, {"count": 0, "ms": 0.0, "out": 0, "in": 0, "hist": [0] * len(HISTOGRAM_FIELDS)})
+            agg["count"] += count
+            agg["ms"] += total_ms or 0.0
+            agg["out"] += bytes_out or 0
+            agg["in"] += bytes_in or 0
+            agg["hist"] = [a + (b or 0) for a, b in zip(agg["hist"], histogram)]
+
+        lines += [
+            "# HELP legacy_integration_call_duration_seconds Duración de las llamadas (incluye reintentos).",
+            "# TYPE legacy_integration_call_duration_seconds histogram",
+        ]
+        for endpoint, agg in by_endpoint.items():
+            label = _prom_label(endpoint)
+            for bound, value in zip(DURATION_BOUNDS, agg["hist"]):
+                lines.append(f'legacy_integration_call_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {value}')
+            lines.append(f'legacy_integration_call_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {agg["count"]}')
+            lines.append(f'legacy_integration_call_duration_seconds_sum{{endpoint="{label}"}} {agg["ms"] / 1000.0:.6f}')
+            lines.append(f'legacy_integration_call_duration_seconds_count{{endpoint="{label}"}} {agg["count"]}')
+
+        lines += [
+            "# HELP legacy_integration_call_bytes_total Bytes enviados y recibidos por endpoint.",
+            "# TYPE legacy_integration_call_bytes_total counter",
+        ]
+        for endpoint, agg in by_endpoint.items():
+            label = _prom_label(endpoint)
+            lines.append(f'legacy_integration_call_bytes_total{{endpoint="{label}",direction="out"}} {agg["out"]}')
+            lines.append(f'legacy_integration_call_bytes_total{{endpoint="{label}",direction="in"}} {agg["in"]}')
+
+        lines += [
+            f"# HELP legacy_integration_recent_avg_seconds Duración promedio en los últimos {window_minutes} minutos.",
+            "# TYPE legacy_integration_recent_avg_seconds gauge",
+        ]
+        lines += [
+            f'legacy_integration_recent_avg_seconds{{endpoint="{_prom_label(endpoint)}"}} {(avg_ms or 0.0) / 1000.0:.6f}'
+            for endpoint, avg_ms, _max_ms, _ratio in window
+        ]
+        lines += [
+            f"# HELP legacy_integration_recent_max_seconds Duración máxima en los últimos {window_minutes} minutos.",
+            "# TYPE legacy_integration_recent_max_seconds gauge",
+        ]
+        lines += [
+            f'legacy_integration_recent_max_seconds{{endpoint="{_prom_label(endpoint)}"}} {(max_ms or 0.0) / 1000.0:.6f}'
+            for endpoint, _avg_ms, max_ms, _ratio in window
+        ]
+        lines += [
+            f"# HELP legacy_integration_recent_error_ratio Proporción de llamadas fallidas en los últimos {window_minutes} minutos.",
+            "# TYPE legacy_integration_recent_error_ratio gauge",
+        ]
+        lines += [
+            f'legacy_integration_recent_error_ratio{{endpoint="{_prom_label(endpoint)}"}} {ratio or 0.0:.6f}'
+            for endpoint, _avg_ms, _max_ms, ratio in window
+        ]
+        return "\n".join(lines) + "\n"
+
+    # ============== Mantenimiento ==============
+
+    @api.model
+    def _cron_purge(self):
+        """
+        Borra los intervalos más viejos que ``legacy_integration.metrics.retention_days``,
+        salvo con ``legacy_integration.metrics.keep_forever``.
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        if ICP.get_param(KEEP_FOREVER_PARAM):
+            return 0
+        raw = ICP.get_param(RETENTION_PARAM, DEFAULT_RETENTION_DAYS)
+        try:
+            days = max(0, int(raw))
+        except (TypeError, ValueError):
+            days = DEFAULT_RETENTION_DAYS
+        if not days:
+            return 0
+        self._flush()
+        self.env.cr.execute(
+            "DELETE FROM integration_metric WHERE bucket_start < %s",
+            [fields.Datetime.now() - relativedelta(days=days)],
+        )
+        return self.env.cr.rowcount
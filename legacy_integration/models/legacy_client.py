@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from odoo import api, models
+
+from .call_metrics import metrics_for, timed_call
+
+_logger = logging.getLogger(__name__)
+
+CONSULTAS_ENDPOINT = "http://sms.cooperativacredikot.com.ar/ServicioConsultas3_WS.aspx"
+
+PARAM_PREFIX = "legacy_integration"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 2
+NO_RETRIES_PARAM = f"{PARAM_PREFIX}.http.no_retries"
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_QUERY_TIMEOUT = 30
+# Timeouts de lectura históricos de cada consulta (s); se pueden pisar con
+# legacy_integration.timeout.<query> en los parámetros del sistema.
+QUERY_TIMEOUTS = {
+    "lineasdeoferta": 30,
+    "odooalertas": 30,
+    "validacionescc": 60,
+}
+RETRY_STATUS_CODES = (502, 503, 504)
+
+# Sesiones por proceso (cada worker prefork tiene las suyas). La clave incluye
+# el pid para no reutilizar sockets heredados de un fork.
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _build_session(pool_size, max_retries, backoff_factor, idempotent):
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        # Las consultas son de solo lectura y se pueden repetir; las llamadas
+        # que modifican estado sólo se reintentan si no se llegó a conectar.
+        read=max_retries if idempotent else 0,
+        status=max_retries if idempotent else 0,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES if idempotent else (),
+        allowed_methods=frozenset(["GET", "POST"]) if idempotent else frozenset(),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                backoff_factor=DEFAULT_BACKOFF_FACTOR, idempotent=True):
+    """Devuelve la sesión compartida del worker para la configuración dada."""
+    key = (os.getpid(), pool_size, max_retries, backoff_factor, idempotent)
+    session = _SESSIONS.get(key)
+    if session is not None:
+        return session
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            # Si cambió la configuración o el pid, descartar las sesiones previas
+            # (las heredadas de otro proceso se cierran; las propias pueden
+            # seguir en uso por otro thread y se liberan al recolectarse).
+            for old_key in list(_SESSIONS):
+                if old_key[0] != key[0]:
+                    _SESSIONS.pop(old_key).close()
+                elif old_key[4] == idempotent:
+                    _SESSIONS.pop(old_key)
+            session = _build_session(pool_size, max_retries, backoff_factor, idempotent)
+            _SESSIONS[key] = session
+            _logger.info(
+                "Sesión HTTP legacy creada | pid=%s pool=%s retries=%s backoff=%s idempotent=%s",
+                *key,
+            )
+    return session
+
+
+def soap_endpoint_name(soap_action):
+    name = (soap_action or "soap").split("#", 1)[-1]
+    return name[:-len(".Execute")] if name.endswith(".Execute") else name
+
+
+class LegacyClient(models.AbstractModel):
+    _name = "legacy.client"
+    _description = "Cliente HTTP para servicios legacy"
+
+    def _get_int_param(self, key, default):
+        raw = self.env["ir.config_parameter"].sudo().get_param(key, default)
+        try:
+            return max(0, int(raw))
+        except (TypeError, ValueError):
+            return default
+
+    def _get_float_param(self, key, default):
+        raw = self.env["ir.config_parameter"].sudo().get_param(key, default)
+        try:
+            return max(0.0, float(raw))
+        except (TypeError, ValueError):
+            return default
+
+    @api.model
+    def _get_max_retries(self):
+        """Reintentos: 0 con ``legacy_integration.http.no_retries``, si no ``http.max_retries``."""
+        if self.env["ir.config_parameter"].sudo().get_param(NO_RETRIES_PARAM):
+            return 0
+        return self._get_int_param(f"{PARAM_PREFIX}.http.max_retries", DEFAULT_MAX_RETRIES)
+
+    @api.model
+    def _get_session(self, idempotent=True):
+        return get_session(
+            pool_size=self._get_int_param(f"{PARAM_PREFIX}.http.pool_size", DEFAULT_POOL_SIZE) or DEFAULT_POOL_SIZE,
+            max_retries=self._get_max_retries(),
+            backoff_factor=self._get_float_param(f"{PARAM_PREFIX}.http.backoff_factor", DEFAULT_BACKOFF_FACTOR),
+            idempotent=idempotent,
+        )
+
+    @api.model
+    def _get_timeout(self, query=None, read_timeout=None):
+        """Timeout (connect, read) para la consulta indicada."""
+        connect = self._get_int_param(f"{PARAM_PREFIX}.http.connect_timeout", DEFAULT_CONNECT_TIMEOUT)
+        if read_timeout is None:
+            default = QUERY_TIMEOUTS.get(query, DEFAULT_QUERY_TIMEOUT)
+            read_timeout = (
+                self._get_int_param(f"{PARAM_PREFIX}.timeout.{query}", default) if query else default
+            )
+        read_timeout = read_timeout or DEFAULT_QUERY_TIMEOUT
+        return (min(connect or DEFAULT_CONNECT_TIMEOUT, read_timeout), read_timeout)
+
+    @api.model
+    def _get_consultas_url(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+        return (ICP.get_param(f"{PARAM_PREFIX}.consultas.url") or CONSULTAS_ENDPOINT).strip()
+
+    @api.model
+    def consultas_headers(self, parametros):
+        """Headers que espera ServicioConsultas3_WS para una consulta."""
+        return {
+            "User-Agent": "Request-Promise",
+            "version": "QUERY",
+            "parametros": parametros,
+            "Content-Type": "application/json",
+        }
+
+    @api.model
+    def consultas_call(self, query, headers, data="", stream=False):
+        """Prepara el POST a ServicioConsultas3_WS como un callable.
+
+        Toda la configuración se resuelve acá (con el ORM); el callable
+        devuelto sólo hace I/O de red y se puede ejecutar en otro thread.
+        La llamada se mide en las métricas bajo el nombre de la consulta.
+        Con ``stream=True`` el cuerpo se lee después, p.ej. con
+        :class:`~.datos_stream.DatosStream` (que cierra la respuesta al terminar).
+        """
+        session = self._get_session(idempotent=True)
+        self.env["integration.metric"]._schedule_flush()
+        post = functools.partial(
+            session.post,
+            self._get_consultas_url(),
+            headers=headers,
+            data=data,
+            timeout=self._get_timeout(query),
+            stream=stream,
+        )
+        return functools.partial(
+            timed_call, query or "consultas", post, metrics_for(self.env.cr.dbname), data=data, stream=stream
+        )
+
+    @api.model
+    def consultas_post(self, query, headers, data="", prefetched=None, stream=False):
+        """POST a ServicioConsultas3_WS usando la sesión compartida del worker.
+
+        :param query: nombre de la consulta (@QUERY), define el timeout.
+        :param headers: headers armados con :meth:`consultas_headers`.
+        :param prefetched: ``Future`` de un :meth:`consultas_call` ya lanzado;
+            si viene, se devuelve su respuesta (o se relanza su excepción).
+        :param stream: no leer el cuerpo todavía (ver :meth:`consultas_call`).
+        """
+        if isinstance(prefetched, Future):
+            return prefetched.result()
+        return self.consultas_call(query, headers, data=data, stream=stream)()
+
+    @api.model
+    def soap_call(self, url, payload, soap_action, timeout=None, stream=False):
+        """Prepara un POST SOAP (servicios GX) como callable apto para threads.
+
+        Usa la sesión no idempotente: sólo se reintenta si no se llegó a conectar.
+        Con ``stream=True`` el cuerpo queda sin leer en ``response.raw`` (cerrar
+        la respuesta al terminar para devolver la conexión al pool).
+        La llamada se mide en las métricas bajo el nombre de la operación
+        (``GX#RiesgoPedido_WS_E03.Execute`` -> ``RiesgoPedido_WS_E03``).
+        """
+        url = (url or "").strip()
+        if "?" in url:
+            url = url.split("?", 1)[0]
+        headers = {
+            "Content-Type": "text/xml; charset=utf-8",
+            "SOAPAction": soap_action,
+            "User-Agent": "Odoo/18 SOAP Hook",
+        }
+        session = self._get_session(idempotent=False)
+        self.env["integration.metric"]._schedule_flush()
+        post = functools.partial(
+            session.post,
+            url,
+            data=payload,
+            headers=headers,
+            timeout=self._get_timeout(read_timeout=timeout),
+            stream=stream,
+        )
+        return functools.partial(
+            timed_call, soap_endpoint_name(soap_action), post, metrics_for(self.env.cr.dbname), data=payload, stream=stream
+        )
+
+    @api.model
+    def soap_post(self, url, payload, soap_action, timeout=None, stream=False):
+        """POST SOAP sobre la sesión compartida del worker."""
+        return self.soap_call(url, payload, soap_action, timeout=timeout, stream=stream)()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import functools
+import logging
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+MIN_LEVEL_PARAM = "legacy_integration.log.min_level"
+BUFFER_KEY = "legacy_integration.log_buffer"
+INSERT_CHUNK_SIZE = 500
+
+
+class LegacyLogSink(models.AbstractModel):
+    """
+    Los logs se acumulan por transacción y se insertan todos juntos al
+    terminarla, confirmada o no, en un cursor propio: los de una transacción
+    que se revierte (o de un savepoint revertido) también quedan.
+    """
+
+    _name = "legacy.log.sink"
+    _description = "Escritura diferida de logs de integración en integration.log"
+
+    @api.model
+    @tools.ormcache("enable_param")
+    def _is_log_enabled(self, enable_param):
+        ICP = self.env["ir.config_parameter"].sudo()
+        return ICP.get_param(enable_param, "True") in ("True", "1")
+
+    @api.model
+    @tools.ormcache("name")
+    def _get_min_level(self, name):
+        """Nivel mínimo a persistir: ``legacy_integration.log.<name>.min_level`` o el global."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        raw = ICP.get_param(f"legacy_integration.log.{name}.min_level") or ICP.get_param(MIN_LEVEL_PARAM, "DEBUG")
+        return LOG_LEVELS.get((raw or "").strip().upper(), logging.DEBUG)
+
+    @api.model
+    def log(self, name, level, message, func="", path="", enable_param=None, lead_id=None,
+            request_ref=None, endpoint=None, latency_ms=None, http_status=None, response=None):
+        """Encola un registro para integration.log; se inserta al terminar la transacción.
+
+        :param name: origen del log (campo ``source``).
+        :param enable_param: parámetro del sistema que habilita el log de ese origen.
+        :param lead_id: oportunidad a la que corresponde la llamada.
+        :param request_ref: id de la solicitud legacy (x_studio_solicitud / RiePedID).
+        :param response: ``requests.Response`` de la llamada; completa endpoint,
+            latencia y status HTTP si no se pasaron.
+        """
+        if enable_param and not self._is_log_enabled(enable_param):
+            return
+        level = (level or "INFO").upper()
+        if LOG_LEVELS.get(level, logging.INFO) < self._get_min_level(name):
+            return
+        if response is not None:
+            endpoint = endpoint or response.url
+            if latency_ms is None and response.elapsed is not None:
+                latency_ms = int(response.elapsed.total_seconds() * 1000)
+            http_status = http_status or response.status_code
+        cr = self.env.cr
+        buffer = cr.postcommit.data.get(BUFFER_KEY)
+        if buffer is None:
+            # Al confirmar se vacía ``postrollback`` y al revertir ``postcommit`` (con su
+            # ``data``): el buffer viaja en la función, que corre una sola vez
+            buffer = cr.postcommit.data[BUFFER_KEY] = []
+            flush = functools.partial(self._flush_log_buffer, buffer)
+            cr.postcommit.add(flush)
+            cr.postrollback.add(flush)
+        buffer.append((
+            fields.Datetime.now(),
+            self.env.uid,
+            name,
+            level if level in LOG_LEVELS else "INFO",
+            message or "",
+            func or "",
+            path or "",
+            lead_id or None,
+            str(request_ref) if request_ref else None,
+            endpoint or None,
+            latency_ms,
+            http_status or None,
+        ))
+
+    def _flush_log_buffer(self, rows):
+        if not rows:
+            return
+        try:
+            with self.env.registry.cursor() as cr:
+                lead_ids = {row[7] for row in rows if row[7]}
+                if lead_ids:
+                    # Un lead borrado (o creado en una transacción revertida) haría fallar la FK
+                    cr.execute("SELECT id FROM crm_lead WHERE id = ANY(%s)", [list(lead_ids)])
+                    missing = lead_ids - {row[0] for row in cr.fetchall()}
+                    if missing:
+                        rows = [row[:7] + (None,) + row[8:] if row[7] in missing else row for row in rows]
+                for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                    chunk = rows[start:start + INSERT_CHUNK_SIZE]
+                    cr.execute(
+                        "INSERT INTO integration_log"
+                        " (create_date, create_uid, source, level, message, func, path,"
+                        "  lead_id, request_ref, endpoint, latency_ms, http_status)"
+                        " VALUES " + ", ".join(["%s"] * len(chunk)),
+                        chunk,
+                    )
+        except Exception:
+            # Corre después del commit/rollback: un error acá no puede llegar al llamador
+            _logger.warning("integration.log: no se pudieron insertar %s registros", len(rows), exc_info=True)
+            return
+        _logger.debug("integration.log: %s registros insertados", len(rows))
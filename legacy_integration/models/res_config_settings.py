@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+from .legacy_client import (
+    CONSULTAS_ENDPOINT,
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POOL_SIZE,
+    NO_RETRIES_PARAM,
+)
+from .integration_log import (
+    DEFAULT_PURGE_MAX_SECONDS,
+    DEFAULT_RETENTION_DAYS,
+    KEEP_FOREVER_PARAM,
+    PURGE_MAX_SECONDS_PARAM,
+    PURGE_UNBOUNDED_PARAM,
+    RETENTION_PARAM,
+)
+from .integration_metric import DEFAULT_RETENTION_DAYS as DEFAULT_METRICS_RETENTION_DAYS
+from .integration_metric import KEEP_FOREVER_PARAM as METRICS_KEEP_FOREVER_PARAM
+from .integration_metric import RETENTION_PARAM as METRICS_RETENTION_PARAM
+from .integration_metric import TOKEN_PARAM
+from .log_sink import LOG_LEVELS, MIN_LEVEL_PARAM
+from .response_cache import DEFAULT_TTL_SECONDS, DISABLED_PARAM, TTL_PARAM
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    legacy_consultas_url = fields.Char(
+        string="URL ServicioConsultas3_WS",
+        config_parameter="legacy_integration.consultas.url",
+        default=CONSULTAS_ENDPOINT,
+    )
+    legacy_http_pool_size = fields.Integer(
+        string="Conexiones por worker",
+        config_parameter="legacy_integration.http.pool_size",
+        default=DEFAULT_POOL_SIZE,
+        help="Tamaño del pool de conexiones keep-alive por host y por worker.",
+    )
+    legacy_http_max_retries = fields.Integer(
+        string="Reintentos",
+        config_parameter="legacy_integration.http.max_retries",
+        default=DEFAULT_MAX_RETRIES,
+        help="Reintentos ante errores de conexión o 502/503/504. Debe ser mayor que 0 (vacío o 0 "
+             "vuelve al valor por defecto); para no reintentar usar \"Sin reintentos\".",
+    )
+    legacy_http_no_retries = fields.Boolean(
+        string="Sin reintentos",
+        config_parameter=NO_RETRIES_PARAM,
+        help="Cada llamada se hace una sola vez, sin reintentar ante errores.",
+    )
+    legacy_http_backoff_factor = fields.Float(
+        string="Backoff (s)",
+        config_parameter="legacy_integration.http.backoff_factor",
+        default=DEFAULT_BACKOFF_FACTOR,
+        help="Factor de espera exponencial entre reintentos.",
+    )
+    legacy_http_connect_timeout = fields.Integer(
+        string="Timeout de conexión (s)",
+        config_parameter="legacy_integration.http.connect_timeout",
+        default=DEFAULT_CONNECT_TIMEOUT,
+    )
+    legacy_timeout_lineasdeoferta = fields.Integer(
+        string="Timeout líneas de oferta (s)",
+        config_parameter="legacy_integration.timeout.lineasdeoferta",
+        default=30,
+    )
+    legacy_timeout_odooalertas = fields.Integer(
+        string="Timeout alertas (s)",
+        config_parameter="legacy_integration.timeout.odooalertas",
+        default=30,
+    )
+    legacy_log_min_level = fields.Selection(
+        selection=[(level, level) for level in LOG_LEVELS],
+        string="Nivel mínimo de log en BD",
+        config_parameter=MIN_LEVEL_PARAM,
+        default="DEBUG",
+        help="Los logs de integración con nivel inferior no se guardan.",
+    )
+    legacy_log_keep_forever = fields.Boolean(
+        string="Conservar siempre",
+        config_parameter=KEEP_FOREVER_PARAM,
+        help="No borrar nunca los logs de integración.",
+    )
+    legacy_log_retention_days = fields.Integer(
+        string="Días a conservar",
+        config_parameter=RETENTION_PARAM,
+        default=DEFAULT_RETENTION_DAYS,
+        help="Los logs de integración más viejos se borran una vez por día. Debe ser mayor que 0 "
+             "(vacío o 0 vuelve al valor por defecto); para no borrar usar \"Conservar siempre\".",
+    )
+    legacy_log_purge_unbounded = fields.Boolean(
+        string="Purga sin tope de tiempo",
+        config_parameter=PURGE_UNBOUNDED_PARAM,
+        help="El borrado diario corre hasta terminar, sin cortar por tiempo.",
+    )
+    legacy_log_purge_max_seconds = fields.Integer(
+        string="Tiempo máximo de purga (s)",
+        config_parameter=PURGE_MAX_SECONDS_PARAM,
+        default=DEFAULT_PURGE_MAX_SECONDS,
+        help="Tope por corrida del borrado diario; lo pendiente sigue en la próxima. Debe ser mayor "
+             "que 0 (vacío o 0 vuelve al valor por defecto); para no cortar usar \"Purga sin tope de tiempo\".",
+    )
+    legacy_timeout_validacionescc = fields.Integer(
+        string="Timeout validaciones de tarjeta (s)",
+        config_parameter="legacy_integration.timeout.validacionescc",
+        default=60,
+    )
+    legacy_metrics_retention_days = fields.Integer(
+        string="Días de métricas",
+        config_parameter=METRICS_RETENTION_PARAM,
+        default=DEFAULT_METRICS_RETENTION_DAYS,
+        help="Días de intervalos de métricas a conservar. Debe ser mayor que 0 (vacío o 0 vuelve "
+             "al valor por defecto); para no borrar usar \"Conservar métricas siempre\".",
+    )
+    legacy_metrics_keep_forever = fields.Boolean(
+        string="Conservar métricas siempre",
+        config_parameter=METRICS_KEEP_FOREVER_PARAM,
+        help="No borrar nunca los intervalos de métricas.",
+    )
+    legacy_metrics_token = fields.Char(
+        string="Token Prometheus",
+        config_parameter=TOKEN_PARAM,
+        help="Token para /legacy_integration/metrics (Authorization: Bearer o ?token=). Vacío = deshabilitado.",
+    )
+    legacy_cache_disabled = fields.Boolean(
+        string="Consultar siempre",
+        config_parameter=DISABLED_PARAM,
+        help="No usar la caché: cada sincronización vuelve a consultar.",
+    )
+    legacy_cache_ttl = fields.Integer(
+        string="Vigencia de respuestas (s)",
+        config_parameter=TTL_PARAM,
+        default=DEFAULT_TTL_SECONDS,
+        help="Segundos durante los que no se repite una consulta ya aplicada "
+             "(por consulta: legacy_integration.cache.ttl.<consulta>, donde 0 = siempre consultar). "
+             "Debe ser mayor que 0 (vacío o 0 vuelve al valor por defecto); para no usar la caché "
+             "marcar \"Consultar siempre\".",
+    )
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+
+TTL_PARAM = "legacy_integration.cache.ttl"
+DISABLED_PARAM = "legacy_integration.cache.disabled"
+DEFAULT_TTL_SECONDS = 300
+
+
+class LegacyResponseCache(models.Model):
+    """
+    Última respuesta conocida de cada consulta legacy, por (consulta, parámetro):
+    hash del cuerpo, cantidad de ítems y cuándo se descargó.
+
+    Permite a los consumidores:
+    - no repetir la llamada mientras la respuesta tenga menos de ``ttl`` segundos
+      y ya esté aplicada (acierto);
+    - no reescribir sus registros si la respuesta descargada es idéntica a la
+      última aplicada (comparando el hash).
+
+    Las filas y contadores se actualizan por SQL (UPSERT / incrementos) para no
+    pisarse entre workers.
+    """
+
+    _name = "legacy.response.cache"
+    _description = "Caché de respuestas de consultas legacy"
+    _log_access = False
+    _order = "fetched_at desc"
+    _rec_name = "query"
+
+    query = fields.Char(string="Consulta", required=True, readonly=True)
+    parameter = fields.Char(string="Parámetro", required=True, readonly=True)
+    content_hash = fields.Char(string="Hash", readonly=True)
+    item_count = fields.Integer(string="Ítems", readonly=True)
+    fetched_at = fields.Datetime(string="Descargada", readonly=True)
+    hit_count = fields.Integer(string="Aciertos", readonly=True, help="Llamadas evitadas por estar vigente la respuesta.")
+    miss_count = fields.Integer(string="Descargas", readonly=True)
+    unchanged_count = fields.Integer(
+        string="Sin cambios", readonly=True, help="Descargas cuyo contenido era igual al anterior."
+    )
+
+    _sql_constraints = [
+        ("query_parameter_uniq", "unique(query, parameter)", "Ya existe una entrada para la consulta y el parámetro."),
+    ]
+
+    @api.model
+    def _get_ttl(self, query):
+        """
+        Vigencia (s): ``legacy_integration.cache.ttl.<query>`` o el global; 0 = no usar la caché.
+        Con ``legacy_integration.cache.disabled`` es 0 para todas las consultas.
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        if ICP.get_param(DISABLED_PARAM):
+            return 0
+        raw = ICP.get_param(f"{TTL_PARAM}.{query}") or ICP.get_param(TTL_PARAM, DEFAULT_TTL_SECONDS)
+        try:
+            return max(0, int(raw))
+        except (TypeError, ValueError):
+            return DEFAULT_TTL_SECONDS
+
+    @api.model
+    def _fresh_hash(self, query, parameter):
+        """Hash de la última respuesta si sigue vigente, o None."""
+        ttl = self._get_ttl(query)
+        if not ttl:
+            return None
+        self.env.cr.execute(
+            "SELECT content_hash FROM legacy_response_cache WHERE query = %s AND parameter = %s AND fetched_at >= %s",
+            [query, str(parameter), fields.Datetime.now() - relativedelta(seconds=ttl)],
+        )
+        row = self.env.cr.fetchone()
+        return row[0] if row else None
+
+    @api.model
+    def _record_hit(self, query, parameter):
+        self.env.cr.execute(
+            "UPDATE legacy_response_cache SET hit_count = hit_count + 1 WHERE query = %s AND parameter = %s",
+            [query, str(parameter)],
+        )
+
+    @api.model
+    def _record_fetch(self, query, parameter, content_hash, item_count):
+        """Registra una descarga (cuenta como "sin cambios" si el hash es el de la anterior)."""
+        self.env.cr.execute(
+            """
+            INSERT INTO legacy_response_cache AS c
+                   (query, parameter, content_hash, item_count, fetched_at, hit_count, miss_count, unchanged_count)
+            VALUES (%s, %s, %s, %s, %s, 0, 1, 0)
+            ON CONFLICT (query, parameter) DO UPDATE
+               SET content_hash = EXCLUDED.content_hash,
+                   item_count = EXCLUDED.item_count,
+                   fetched_at = EXCLUDED.fetched_at,
+                   miss_count = c.miss_count + 1,
+                   unchanged_count = c.unchanged_count + (c.content_hash IS NOT DISTINCT FROM EXCLUDED.content_hash)::int
+            """,
+            [query, str(parameter), content_hash, item_count, fields.Datetime.now()],
+        )
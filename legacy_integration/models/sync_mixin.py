@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class LegacySyncMixin(models.AbstractModel):
+    """Utilidades comunes de los modelos que se sincronizan con los servicios legacy."""
+
+    _name = "legacy.sync.mixin"
+    _description = "Sincronización con servicios legacy"
+
+    def _get_changed_vals(self, vals):
+        """
+        Subconjunto de ``vals`` cuyos valores difieren del registro.
+
+        Los valores se normalizan como en la cache del ORM y los vacíos
+        ('' / False / None / 0 / recordset vacío) se consideran iguales: el API
+        manda '' o 0 donde Odoo guarda False, y eso no es un cambio.
+        """
+        self.ensure_one()
+        changed = {}
+        for fname, value in vals.items():
+            field = self._fields[fname]
+            try:
+                new_value = field.convert_to_record(field.convert_to_cache(value, self, validate=False), self)
+            except (TypeError, ValueError):
+                changed[fname] = value
+                continue
+            if (self[fname] or False) != (new_value or False):
+                changed[fname] = value
+        return changed
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la lectura incremental de DATOS (models/datos_stream.py), sin Odoo::
+
+    python3 -m pytest legacy_integration/tests
+"""
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "models"))
+
+from datos_stream import (  # noqa: E402
+    HEAD_SIZE,
+    DatosStream,
+    EmptyPayloadError,
+    HtmlPayloadError,
+    InvalidJsonError,
+    MissingDatosError,
+)
+
+ITEMS = [
+    {"IdSolicitud": 1, "Monto": 150000.5, "Nombre": "Peña, José"},
+    {"IdSolicitud": 2, "Monto": -12e3, "Activo": True, "Extra": None},
+    {"IdSolicitud": 3, "Lineas": [1, 2, {"x": "ñ"}], "Texto": "a \"b\" \\ c"},
+    12345678901234567890,
+    "suelto",
+]
+
+
+def _chunks(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def _read(body, size=None, encoding="utf-8"):
+    stream = DatosStream(_chunks(body, size) if size else [body], encoding=encoding)
+    return list(stream), stream
+
+
+@pytest.mark.parametrize("size", [None, 1, 2, 3, 7, 64])
+def test_items_in_any_chunking(size):
+    body = json.dumps({"OK": True, "DATOS": ITEMS, "MSG": "fin"}, ensure_ascii=False).encode("utf-8")
+    items, stream = _read(body, size)
+    assert items == ITEMS
+    assert stream.count == len(ITEMS)
+    assert stream.content_hash == hashlib.sha256(body).hexdigest()
+
+
+@pytest.mark.parametrize("size", [None, 1, 5])
+def test_whitespace_and_bom(size):
+    body = '\ufeff \n{ "DATOS" : [ 1 , 2.5 , "x" ] ,\n "MSG" : {} }\n '.encode("utf-8")
+    items, stream = _read(body, size)
+    assert items == [1, 2.5, "x"]
+    assert not stream.head.startswith("\ufeff")
+
+
+def test_empty_list_and_other_keys():
+    items, stream = _read(b'{"A": [1, {"DATOS": 1}], "DATOS": [], "B": null}')
+    assert items == []
+    assert stream.count == 0
+
+
+def test_number_split_across_chunks():
+    stream = DatosStream([b'{"DATOS": [12', b"34", b"5]}"])
+    assert list(stream) == [12345]
+
+
+def test_latin1_encoding():
+    body = '{"DATOS": ["canción"]}'.encode("latin-1")
+    items, _stream = _read(body, 3, encoding="latin-1")
+    assert items == ["canción"]
+
+
+def test_unknown_encoding_falls_back_to_utf8():
+    items, _stream = _read('{"DATOS": ["ñ"]}'.encode("utf-8"), encoding="no-such-codec")
+    assert items == ["ñ"]
+
+
+def test_head_is_limited():
+    body = json.dumps({"DATOS": list(range(1000))}).encode("utf-8")
+    _items, stream = _read(body, 10)
+    assert stream.head == body.decode("utf-8")[:HEAD_SIZE]
+
+
+@pytest.mark.parametrize("body", [b"", b"   ", "\ufeff\n".encode("utf-8")])
+def test_empty_payload(body):
+    with pytest.raises(EmptyPayloadError):
+        _read(body)
+
+
+def test_html_payload():
+    with pytest.raises(HtmlPayloadError) as info:
+        _read(b"\r\n<!DOCTYPE html><html><body>Runtime Error</body></html>", 4)
+    assert info.value.snippet.startswith("<!DOCTYPE html>")
+
+
+@pytest.mark.parametrize("body", [
+    b"[1, 2]",
+    b'"texto"',
+    b'{"MSG": "sin datos"}',
+    b"{}",
+    b'{"DATOS": {"a": 1}}',
+    b'{"DATOS": null}',
+])
+def test_missing_datos(body):
+    with pytest.raises(MissingDatosError):
+        _read(body)
+
+
+@pytest.mark.parametrize("body", [
+    b'{"DATOS": [1, 2',
+    b'{"DATOS": [1, 2,',
+    b'{"DATOS": [1 2]}',
+    b'{"DATOS": [1], "MSG"}',
+    b'{"DATOS": [1]} basura',
+    b'{"DATOS": [1]',
+    b'{DATOS: [1]}',
+    b'{"DATOS": [tru]}',
+])
+def test_invalid_json(body):
+    with pytest.raises(InvalidJsonError):
+        _read(body, 2)
+
+
+def test_items_arrive_before_a_later_error():
+    stream = DatosStream([b'{"DATOS": [1, 2, ', b"oops]}"])
+    received = []
+    with pytest.raises(InvalidJsonError):
+        for item in stream:
+            received.append(item)
+    assert received == [1, 2]
+
+
+def test_closes_response_when_done_or_interrupted():
+    closed = []
+    stream = DatosStream([b'{"DATOS": [1, 2, 3]}'], close=lambda: closed.append(True))
+    assert list(stream) == [1, 2, 3]
+    assert closed == [True]
+
+    closed.clear()
+    stream = DatosStream([b'{"DATOS": [1, 2, 3]}'], close=lambda: closed.append(True))
+    iterator = iter(stream)
+    next(iterator)
+    iterator.close()
+    assert closed == [True]
+
+    closed.clear()
+    with pytest.raises(HtmlPayloadError):
+        list(DatosStream([b"<html/>"], close=lambda: closed.append(True)))
+    assert closed == [True]
+
+
+def test_large_body_compacts_buffer():
+    items = [{"IdSolicitud": i, "Texto": "x" * 50} for i in range(5000)]
+    body = json.dumps({"DATOS": items}).encode("utf-8")
+    received, stream = _read(body, 4096)
+    assert received == items
+    assert stream.content_hash == hashlib.sha256(body).hexdigest()
+
+
+def test_from_response():
+    class Response:
+        encoding = None
+        closed = False
+
+        def iter_content(self, chunk_size):
+            return iter(_chunks(b'{"DATOS": ["a", "b"]}', 4))
+
+        def close(self):
+            self.closed = True
+
+    response = Response()
+    assert list(DatosStream.from_response(response)) == ["a", "b"]
+    assert response.closed
@@ -3,7 +3,7 @@
 # ============================================
 {
     'name': 'Líneas de Oferta',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.1.0',
     'category': 'Sales/CRM',
     'summary': 'Gestión de líneas de oferta para oportunidades CRM',
     'description': """
@@ -12,9 +12,10 @@
         - Selección única de oferta
         - Sincronización automática
     """,
-    'depends': ['crm', 'crm_contact_referents', 'card_validation'],
+    'depends': ['crm', 'crm_contact_referents', 'card_validation', 'legacy_integration'],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/lineas_oferta_views.xml',
         'views/cliente_alerta_views.xml',
     ],
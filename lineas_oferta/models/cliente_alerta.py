@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models
+from odoo import api, fields, models
 
 
 class ClienteAlerta(models.Model):
     _name = "cliente.alerta"
+    _inherit = ["legacy.sync.mixin"]
     _description = "Alertas de Cliente"
     _order = "fecha desc, id desc"
 
@@ -37,3 +38,82 @@ class ClienteAlerta(models.Model):
             "Ya existe una alerta con el mismo tipo y fecha para esta oportunidad.",
         ),
     ]
+
+    # ============== Cambios manuales ==============
+    # La sincronización omite la conciliación si la respuesta del API es la ya
+    # aplicada (crm.lead.cliente_alerta_sync_hash); cualquier alta, cambio o baja
+    # hecha fuera de la sincronización invalida ese hash para que la próxima
+    # sincronización vuelva a conciliar.
+
+    def _invalidate_lead_sync_hash(self, leads=None):
+        if self.env.context.get('cliente_alerta_sync'):
+            return
+        leads = (leads if leads is not None else self.lead_id).filtered('cliente_alerta_sync_hash')
+        if leads:
+            leads.sudo().write({'cliente_alerta_sync_hash': False})
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        alerts = super().create(vals_list)
+        alerts._invalidate_lead_sync_hash()
+        return alerts
+
+    def write(self, vals):
+        leads = self.lead_id
+        res = super().write(vals)
+        self._invalidate_lead_sync_hash(leads | self.lead_id)
+        return res
+
+    def unlink(self):
+        leads = self.lead_id
+        res = super().unlink()
+        self.browse()._invalidate_lead_sync_hash(leads.exists())
+        return res
+
+    # ============== Sincronización ==============
+
+    @api.model
+    def _reconcile_lead_alerts(self, lead, vals_list):
+        """
+        Concilia las alertas de ``lead`` con los valores recibidos del API, por la
+        clave de ``uniq_alerta_lead`` (lead_id, tipo, fecha): las nuevas se crean en
+        bloque, de las existentes solo se escriben los campos que cambiaron (un
+        ``write`` por diff igual) y las que ya no vienen se eliminan juntas.
+        Devuelve los contadores {'created', 'updated', 'unchanged', 'deleted'}.
+        """
+        stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+        existing = self.search([('lead_id', '=', lead.id)])
+        index = {(alert.tipo, fields.Date.to_string(alert.fecha)): alert for alert in existing}
+        # Si el API repite tipo y fecha, prevalece el último ítem
+        incoming = {}
+        for vals in vals_list:
+            incoming[(vals['tipo'], fields.Date.to_string(fields.Date.to_date(vals['fecha'])))] = vals
+
+        to_create = []
+        write_groups = {}
+        for key, vals in incoming.items():
+            alert = index.get(key)
+            if not alert:
+                to_create.append(vals)
+                continue
+            update_vals = {k: v for k, v in vals.items() if k not in ('lead_id', 'tipo', 'fecha')}
+            changed = alert._get_changed_vals(update_vals)
+            if changed:
+                write_groups.setdefault(tuple(sorted(changed.items())), []).append(alert.id)
+            else:
+                stats['unchanged'] += 1
+
+        alerts_to_delete = existing.filtered(
+            lambda a: (a.tipo, fields.Date.to_string(a.fecha)) not in incoming
+        )
+        if alerts_to_delete:
+            stats['deleted'] = len(alerts_to_delete)
+            alerts_to_delete.unlink()
+
+        for group_key, alert_ids in write_groups.items():
+            self.browse(alert_ids).write(dict(group_key))
+            stats['updated'] += len(alert_ids)
+
+        if to_create:
+            stats['created'] = len(self.create(to_create))
+        return stats
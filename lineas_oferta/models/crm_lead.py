@@ -1,35 +1,49 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 
 from odoo import models, fields, api, _
 from odoo.tools.safe_eval import safe_eval
 from odoo.exceptions import UserError
+from odoo.addons.legacy_integration.models.datos_stream import (
+    DatosStream,
+    EmptyPayloadError,
+    HtmlPayloadError,
+    InvalidJsonError,
+    MissingDatosError,
+    PayloadError,
+)
 import requests
 import json
 import logging
+import time
 
 _logger = logging.getLogger(__name__)
 
+BATCH_SYNC_SIZE = 100
+BATCH_SYNC_WORKERS = 8
+LOG_SNIPPET_ITEMS = 20
+
 
 class CrmLead(models.Model):
     _inherit = 'crm.lead'
     
-    def _log_db_lineas_oferta(self, level: str, message: str, func: str = ""):
-        """Persiste en ir.logging para el menú de líneas de oferta - SIEMPRE ejecuta sin validaciones."""
+    def _log_db_lineas_oferta(self, level: str, message: str, func: str = "", **call):
+        """Encola el log en integration.log (se inserta al terminar la transacción).
+
+        ``call`` son los datos estructurados de la llamada (``request_ref``,
+        ``response``...), ver ``legacy.log.sink.log``.
+        """
         try:
-            vals = {
-                "name": "lineas_oferta_api",
-                "type": "server",
-                "dbname": self.env.cr.dbname,
-                "level": (level or "INFO").upper(),
-                "message": message or "",
-                "path": __name__,
-                "line": "0",
-                "func": func or "_log_db_lineas_oferta",
-            }
-            _logger.info(f"Creando log en ir.logging con valores: {vals}")
-            log_record = self.env["ir.logging"].sudo().create(vals)
-            _logger.info(f"Log creado exitosamente con ID: {log_record.id}")
-            
+            self.env["legacy.log.sink"].log(
+                "lineas_oferta_api",
+                level,
+                message,
+                func=func or "_log_db_lineas_oferta",
+                path=__name__,
+                lead_id=self.id if len(self) == 1 else None,
+                **call,
+            )
         except Exception as e:
             _logger.error(f"Error al crear log en BD: {str(e)}")
             import traceback
@@ -57,6 +71,14 @@ class CrmLead(models.Model):
         compute='_compute_cliente_alerta_count'
     )
 
+    cliente_alerta_sync_hash = fields.Char(
+        string='Hash última sincronización de alertas',
+        copy=False,
+        readonly=True,
+        help='CUIT y hash de la respuesta de alertas aplicada por última vez; '
+             'si la respuesta no cambió, no se reescriben las alertas.',
+    )
+
     partner_birthdate = fields.Date(
         string='Fecha de Nacimiento',
         compute='_compute_partner_birthdate',
@@ -115,10 +137,20 @@ class CrmLead(models.Model):
             return False
         return f"{digits[:2]}-{digits[2:10]}-{digits[10:]}"
 
-    def _sync_lineas_oferta_records(self):
+    def _lineas_oferta_request(self):
+        """Consulta legacy (query, headers) de líneas de oferta, o None si falta la solicitud."""
+        self.ensure_one()
+        solicitud_id = getattr(self, 'x_studio_solicitud', False)
+        if not solicitud_id:
+            return None
+        client = self.env['legacy.client']
+        return 'lineasdeoferta', client.consultas_headers(f'@QUERY=lineasdeoferta;@riepedid={solicitud_id}')
+
+    def _sync_lineas_oferta_records(self, prefetched=None):
         """
         Invoca el API de líneas de oferta y sincroniza los registros locales.
         Devuelve la cantidad de líneas recibidas desde el servicio externo.
+        Si se recibe ``prefetched`` (Future del POST ya lanzado) no se repite la llamada.
         """
         self.ensure_one()
         
@@ -128,7 +160,7 @@ class CrmLead(models.Model):
         
         # Log de prueba para verificar que funciona
         _logger.info('Logging de prueba - esto debería aparecer en el log del servidor')
-        self._log_db_lineas_oferta("INFO", "Log de prueba - esto debería aparecer en ir.logging", "test_log")
+        self._log_db_lineas_oferta("INFO", "Log de prueba - esto debería aparecer en Logs de integración", "test_log")
         
         # Verificar que existe x_studio_solicitud
         if not hasattr(self, 'x_studio_solicitud') or not self.x_studio_solicitud:
@@ -146,13 +178,9 @@ class CrmLead(models.Model):
             self._log_db_lineas_oferta("INFO", "=== INICIANDO BLOQUE TRY ===", "action_actualizar_lineas_oferta")
             
             # Configurar la petición a la API (POST con headers como en el curl)
-            url = "http://sms.cooperativacredikot.com.ar/ServicioConsultas3_WS.aspx"
-            headers = {
-                'User-Agent': 'Request-Promise',
-                'version': 'QUERY',
-                'parametros': f'@QUERY=lineasdeoferta;@riepedid={solicitud_id}',
-                'Content-Type': 'application/json'
-            }
+            client = self.env['legacy.client']
+            url = client._get_consultas_url()
+            query, headers = self._lineas_oferta_request()
             # Para POST, no necesitamos params, solo headers y data vacío
             data = ''
             
@@ -169,144 +197,23 @@ class CrmLead(models.Model):
             _logger.info("Iniciando petición HTTP POST")
             
             try:
-                response = requests.post(url, headers=headers, data=data, timeout=30)
-                self._log_db_lineas_oferta("INFO", f"Petición HTTP POST completada. Status: {response.status_code}", "action_actualizar_lineas_oferta")
+                response = client.consultas_post(query, headers, data=data, prefetched=prefetched, stream=True)
+                self._log_db_lineas_oferta(
+                    "INFO", f"Petición HTTP POST completada. Status: {response.status_code}", "action_actualizar_lineas_oferta",
+                    request_ref=solicitud_id, response=response,
+                )
                 _logger.info(f"Petición HTTP POST completada. Status: {response.status_code}")
             except Exception as http_error:
                 self._log_db_lineas_oferta("ERROR", f"Error en petición HTTP POST: {str(http_error)}", "action_actualizar_lineas_oferta")
                 _logger.error(f"Error en petición HTTP POST: {str(http_error)}")
                 raise
             
-            response.raise_for_status()
-            self._log_db_lineas_oferta("INFO", "Status HTTP verificado exitosamente", "action_actualizar_lineas_oferta")
-            
-            # Log de la respuesta raw
-            self._log_db_lineas_oferta("DEBUG", f"Status Code: {response.status_code}", "action_actualizar_lineas_oferta")
-            self._log_db_lineas_oferta("DEBUG", f"Content-Type: {response.headers.get('content-type', 'No especificado')}", "action_actualizar_lineas_oferta")
-            self._log_db_lineas_oferta("DEBUG", f"Response text (primeros 500 chars): {response.text[:500]}", "action_actualizar_lineas_oferta")
-            
-            # Validaciones previas al parseo
-            raw_text = (response.text or "").lstrip("\ufeff\n\r\t ")
-            if not raw_text.strip():
-                self._log_db_lineas_oferta("ERROR", "Respuesta vacía de la API", "action_actualizar_lineas_oferta")
-                raise UserError(_('La API respondió vacío'))
-            if raw_text[:1] == '<':
-                # Probable HTML de error
-                snippet = raw_text[:500]
-                self._log_db_lineas_oferta("ERROR", f"La API retornó HTML (posible error). Snippet: {snippet}", "action_actualizar_lineas_oferta")
-                raise UserError(_('La API retornó HTML (posible error). Ver logs'))
-
-            # Parsear respuesta JSON
-            try:
-                response_data = response.json()
-                self._log_db_lineas_oferta("DEBUG", f"JSON parseado exitosamente: {type(response_data)}", "action_actualizar_lineas_oferta")
-            except ValueError as json_error:
-                self._log_db_lineas_oferta("ERROR", f"Error JSON directo: {str(json_error)}", "action_actualizar_lineas_oferta")
-                # Respuestas que llegan como texto JSON embebido
-                try:
-                    response_data = json.loads(raw_text)
-                    self._log_db_lineas_oferta("DEBUG", f"JSON parseado desde text exitosamente: {type(response_data)}", "action_actualizar_lineas_oferta")
-                except Exception as text_error:
-                    self._log_db_lineas_oferta("ERROR", f"Error JSON desde text: {str(text_error)}", "action_actualizar_lineas_oferta")
-                    raise UserError(_('La respuesta de la API no es un JSON válido: %s') % str(text_error))
-            
-            # La API retorna {"DATOS": [...]}
-            if not isinstance(response_data, dict) or 'DATOS' not in response_data:
-                raise UserError(_('La respuesta de la API no tiene el formato esperado (falta DATOS)'))
-            
-            data = response_data['DATOS']
-            if not isinstance(data, list):
-                raise UserError(_('La respuesta de la API no contiene una lista de datos'))
-            
-            _logger.info(f'API respondió con {len(data)} registros')
-            self._log_db_lineas_oferta("INFO", f"API respondió con {len(data)} registros", "action_actualizar_lineas_oferta")
-            
-            # Log de la respuesta completa
-            response_snippet = json.dumps(data, indent=2)[:1000]  # Primeros 1000 caracteres
-            self._log_db_lineas_oferta("DEBUG", f"Respuesta API (snippet): {response_snippet}", "action_actualizar_lineas_oferta")
-            
-            # Obtener IDs actuales en la base de datos
+            data = self._parse_lineas_oferta_response(response)
             existing_lines = self.env['lineas.oferta'].sudo().search([
                 ('lead_id', '=', self.id)
             ])
-            
-            # Crear conjunto de claves compuestas de la respuesta API
-            api_keys = set()
-            lines_to_create = []
-            selected_records = self.env['lineas.oferta']
-            
-            for item in data:
-                rie_ped_id = int(item.get('RiePedID', 0))
-                rie_ped_ren = int(item.get('RiePedRptaLinRRen', 0))
-                api_keys.add((rie_ped_id, rie_ped_ren))
-                
-                # Log detallado del parsing
-                self._log_db_lineas_oferta("DEBUG", f"Parseando registro: ID={rie_ped_id}, Ren={rie_ped_ren}, Selección={item.get('RiePedRptaLinRSeleccion')}", "action_actualizar_lineas_oferta")
-                
-                # Preparar valores para crear/actualizar
-                vals = {
-                    'lead_id': self.id,
-                    'rie_ped_id': rie_ped_id,
-                    'rie_ped_rpta_lin_r_ren': rie_ped_ren,
-                    'rie_ped_rpta_lin_r_auditor': item.get('RiePedRptaLinRAuditor'),
-                    'rie_ped_rpta_lin_r_lin_cred': int(item.get('RiePedRptaLinRLinCred', 0)),
-                    'rie_ped_rpta_lin_r_lin_cred_des': item.get('RiePedRptaLinRLinCredDes', ''),
-                    'rie_ped_rpta_lin_r_tasa': float(item.get('RiePedRptaLinRTasa', 0)),
-                    'rie_ped_rpta_lin_r_capital': float(item.get('RiePedRptaLinRCapital', 0)),
-                    'rie_ped_rpta_lin_r_capital_en_mano': float(item.get('RiePedRptaLinRCapitalEnMano', 0)),
-                    'rie_ped_rpta_lin_r_capital_neto_ren': float(item.get('RiePedRptaLinRCapitalNetoRen', 0)),
-                    'rie_ped_rpta_lin_r_cuotas': int(item.get('RiePedRptaLinRCuotas', 0)),
-                    'rie_ped_rpta_lin_r_imp_cuota': float(item.get('RiePedRptaLinRImpCuota', 0)),
-                    'rie_ped_rpta_lin_r_lin_cred_ren': int(item.get('RiePedRptaLinRLinCredRen', 0)),
-                    'rie_ped_rpta_lin_r_rima_id_des': item.get('RiePedRptaLinRRimaID_Des', ''),
-                    'rie_ped_rpta_lin_r_tir': float(item.get('RiePedRptaLinRTIR', 0)),
-                    'rie_ped_rpta_lin_r_tea': float(item.get('RiePedRptaLinRTEA', 0)),
-                    'rie_ped_rpta_lin_r_tem': float(item.get('RiePedRptaLinRTEM', 0)),
-                    'rie_ped_rpta_lin_r_servicio': float(item.get('RiePedRptaLinRServicio', 0)),
-                    'rie_ped_rpta_lin_r_gastos': float(item.get('RiePedRptaLinRGastos', 0)),
-                }
-                selection_raw = (item.get('RiePedRptaLinRSeleccion') or "").strip().upper()
-                selection_value = 'S' if selection_raw == 'S' else 'N'
-                vals['rie_ped_rpta_lin_r_seleccion'] = selection_value
-                vals['is_selected'] = selection_value == 'S'
-                
-                # Buscar si existe
-                existing = existing_lines.filtered(
-                    lambda l: l.rie_ped_id == rie_ped_id and 
-                             l.rie_ped_rpta_lin_r_ren == rie_ped_ren
-                )
-                
-                if existing:
-                    update_vals = vals.copy()
-                    update_vals.pop('lead_id', None)
-                    existing.sudo().write(update_vals)
-                    if selection_value == 'S':
-                        selected_records = (selected_records | existing)
-                else:
-                    # Crear nuevo
-                    lines_to_create.append(vals)
-            
-            # Crear nuevas líneas
-            if lines_to_create:
-                new_lines = self.env['lineas.oferta'].sudo().create(lines_to_create)
-                selected_records = (selected_records | new_lines.filtered(lambda l: l.is_selected))
-            
-            # Eliminar líneas que no están en la respuesta de la API
-            lines_to_delete = existing_lines.filtered(
-                lambda l: (l.rie_ped_id, l.rie_ped_rpta_lin_r_ren) not in api_keys
-            )
-            if lines_to_delete:
-                lines_to_delete.sudo().unlink()
-            for record in selected_records:
-                try:
-                    record._apply_selected_offer_values_to_lead()
-                except Exception as exc:
-                    self._log_db_lineas_oferta(
-                        "ERROR",
-                        f"No se pudo aplicar valores de oferta seleccionada (id={record.id}): {exc}",
-                        "action_actualizar_lineas_oferta",
-                    )
-                    _logger.exception("Error aplicando oferta seleccionada al lead %s", self.id)
+            self._apply_lineas_oferta_data(data, existing_lines)
+
             success_msg = f"Se actualizaron {len(data)} líneas de oferta correctamente"
             _logger.info(success_msg)
             self._log_db_lineas_oferta("INFO", success_msg, "action_actualizar_lineas_oferta")
@@ -329,6 +236,238 @@ class CrmLead(models.Model):
             self._log_db_lineas_oferta("ERROR", f"Traceback: {traceback.format_exc()}", "action_actualizar_lineas_oferta")
             raise UserError(_('Error al procesar los datos: %s') % str(e))
 
+    def _parse_lineas_oferta_response(self, response, verbose=True):
+        """
+        Valida la respuesta HTTP del API de líneas de oferta y devuelve la lista DATOS.
+        Lanza UserError (o HTTPError) con los mismos mensajes que la sincronización individual.
+        """
+        self.ensure_one()
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        if verbose:
+            self._log_db_lineas_oferta("INFO", "Status HTTP verificado exitosamente", "action_actualizar_lineas_oferta")
+
+            # Log de la respuesta raw
+            self._log_db_lineas_oferta("DEBUG", f"Status Code: {response.status_code}", "action_actualizar_lineas_oferta")
+            self._log_db_lineas_oferta("DEBUG", f"Content-Type: {response.headers.get('content-type', 'No especificado')}", "action_actualizar_lineas_oferta")
+
+        # El cuerpo se lee por bloques; vacío/HTML se detectan antes de parsear
+        datos = DatosStream.from_response(response)
+        try:
+            data = list(datos)
+        except EmptyPayloadError:
+            self._log_db_lineas_oferta("ERROR", "Respuesta vacía de la API", "action_actualizar_lineas_oferta")
+            raise UserError(_('La API respondió vacío'))
+        except HtmlPayloadError as html_error:
+            self._log_db_lineas_oferta("ERROR", f"La API retornó HTML (posible error). Snippet: {html_error.snippet}", "action_actualizar_lineas_oferta")
+            raise UserError(_('La API retornó HTML (posible error). Ver logs'))
+        except InvalidJsonError as json_error:
+            self._log_db_lineas_oferta("ERROR", f"Error JSON: {json_error}. Inicio de la respuesta: {datos.head}", "action_actualizar_lineas_oferta")
+            raise UserError(_('La respuesta de la API no es un JSON válido: %s') % str(json_error))
+        except MissingDatosError:
+            # La API retorna {"DATOS": [...]}
+            raise UserError(_('La respuesta de la API no tiene el formato esperado (falta DATOS)'))
+
+        _logger.info(f'API respondió con {len(data)} registros')
+        if verbose:
+            self._log_db_lineas_oferta("DEBUG", f"Response text (primeros 500 chars): {datos.head}", "action_actualizar_lineas_oferta")
+            self._log_db_lineas_oferta("INFO", f"API respondió con {len(data)} registros", "action_actualizar_lineas_oferta")
+
+            # Log de los primeros registros (sin serializar la respuesta completa)
+            response_snippet = json.dumps(data[:LOG_SNIPPET_ITEMS], indent=2)[:1000]  # Primeros 1000 caracteres
+            self._log_db_lineas_oferta("DEBUG", f"Respuesta API (snippet): {response_snippet}", "action_actualizar_lineas_oferta")
+
+        return data
+
+    def _prepare_lineas_oferta_vals(self, item):
+        """Valores de ``lineas.oferta`` para un ítem DATOS del API."""
+        self.ensure_one()
+        vals = {
+            'lead_id': self.id,
+            'rie_ped_id': int(item.get('RiePedID', 0)),
+            'rie_ped_rpta_lin_r_ren': int(item.get('RiePedRptaLinRRen', 0)),
+            'rie_ped_rpta_lin_r_auditor': item.get('RiePedRptaLinRAuditor'),
+            'rie_ped_rpta_lin_r_lin_cred': int(item.get('RiePedRptaLinRLinCred', 0)),
+            'rie_ped_rpta_lin_r_lin_cred_des': item.get('RiePedRptaLinRLinCredDes', ''),
+            'rie_ped_rpta_lin_r_tasa': float(item.get('RiePedRptaLinRTasa', 0)),
+            'rie_ped_rpta_lin_r_capital': float(item.get('RiePedRptaLinRCapital', 0)),
+            'rie_ped_rpta_lin_r_capital_en_mano': float(item.get('RiePedRptaLinRCapitalEnMano', 0)),
+            'rie_ped_rpta_lin_r_capital_neto_ren': float(item.get('RiePedRptaLinRCapitalNetoRen', 0)),
+            'rie_ped_rpta_lin_r_cuotas': int(item.get('RiePedRptaLinRCuotas', 0)),
+            'rie_ped_rpta_lin_r_imp_cuota': float(item.get('RiePedRptaLinRImpCuota', 0)),
+            'rie_ped_rpta_lin_r_lin_cred_ren': int(item.get('RiePedRptaLinRLinCredRen', 0)),
+            'rie_ped_rpta_lin_r_rima_id_des': item.get('RiePedRptaLinRRimaID_Des', ''),
+            'rie_ped_rpta_lin_r_tir': float(item.get('RiePedRptaLinRTIR', 0)),
+            'rie_ped_rpta_lin_r_tea': float(item.get('RiePedRptaLinRTEA', 0)),
+            'rie_ped_rpta_lin_r_tem': float(item.get('RiePedRptaLinRTEM', 0)),
+            'rie_ped_rpta_lin_r_servicio': float(item.get('RiePedRptaLinRServicio', 0)),
+            'rie_ped_rpta_lin_r_gastos': float(item.get('RiePedRptaLinRGastos', 0)),
+        }
+        selection_raw = (item.get('RiePedRptaLinRSeleccion') or "").strip().upper()
+        selection_value = 'S' if selection_raw == 'S' else 'N'
+        vals['rie_ped_rpta_lin_r_seleccion'] = selection_value
+        vals['is_selected'] = selection_value == 'S'
+        return vals
+
+    def _apply_lineas_oferta_data(self, data, existing_lines, verbose=True):
+        """
+        Sincroniza ``existing_lines`` (líneas actuales del lead) con los ítems DATOS del API.
+        Devuelve los contadores de la conciliación
+        {'received', 'created', 'updated', 'unchanged', 'deleted'}.
+        """
+        self.ensure_one()
+
+        vals_list = []
+        for item in data:
+            vals = self._prepare_lineas_oferta_vals(item)
+            # Log detallado del parsing
+            if verbose:
+                self._log_db_lineas_oferta("DEBUG", f"Parseando registro: ID={vals['rie_ped_id']}, Ren={vals['rie_ped_rpta_lin_r_ren']}, Selección={item.get('RiePedRptaLinRSeleccion')}", "action_actualizar_lineas_oferta")
+            vals_list.append(vals)
+
+        stats, selected_records = self.env['lineas.oferta'].sudo()._reconcile_lead_lines(
+            self, vals_list, existing_lines
+        )
+        stats['received'] = len(data)
+
+        for record in selected_records:
+            try:
+                record._apply_selected_offer_values_to_lead()
+            except Exception as exc:
+                self._log_db_lineas_oferta(
+                    "ERROR",
+                    f"No se pudo aplicar valores de oferta seleccionada (id={record.id}): {exc}",
+                    "action_actualizar_lineas_oferta",
+                )
+                _logger.exception("Error aplicando oferta seleccionada al lead %s", self.id)
+        if verbose:
+            self._log_db_lineas_oferta(
+                "INFO",
+                "Conciliación líneas de oferta | creadas={created} actualizadas={updated} "
+                "sin cambios={unchanged} eliminadas={deleted}".format(**stats),
+                "action_actualizar_lineas_oferta",
+            )
+        return stats
+
+    def _sync_lineas_oferta_batch(self, max_workers=None):
+        """
+        Sincroniza las líneas de oferta de todas las oportunidades del recordset.
+        Los POST se hacen en paralelo (como mucho ``max_workers`` a la vez), las líneas
+        existentes se leen con una sola búsqueda y cada lead se aplica en su savepoint.
+        Devuelve los contadores {'synced', 'failed', 'skipped', 'lines'} más los de
+        la conciliación sumados {'created', 'updated', 'unchanged', 'deleted'}.
+        """
+        stats = dict.fromkeys(
+            ('synced', 'failed', 'skipped', 'lines', 'created', 'updated', 'unchanged', 'deleted'), 0
+        )
+        client = self.env['legacy.client']
+        calls = {}
+        for lead in self:
+            legacy_request = lead._lineas_oferta_request()
+            if legacy_request:
+                calls[lead.id] = client.consultas_call(*legacy_request)
+            else:
+                stats['skipped'] += 1
+        if not calls:
+            return stats
+
+        max_workers = max(1, min(max_workers or BATCH_SYNC_WORKERS, len(calls)))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lineas_oferta_batch')
+        try:
+            futures = {lead_id: executor.submit(call) for lead_id, call in calls.items()}
+        finally:
+            executor.shutdown(wait=False)
+
+        leads = self.browse(list(calls))
+        offer_env = self.env['lineas.oferta'].sudo()
+        existing_ids_by_lead = defaultdict(list)
+        for line in offer_env.search([('lead_id', 'in', leads.ids)]):
+            existing_ids_by_lead[line.lead_id.id].append(line.id)
+
+        for lead in leads:
+            try:
+                with self.env.cr.savepoint():
+                    response = futures[lead.id].result()
+                    data = lead._parse_lineas_oferta_response(response, verbose=False)
+                    lead_stats = lead._apply_lineas_oferta_data(
+                        data, offer_env.browse(existing_ids_by_lead[lead.id]), verbose=False
+                    )
+                for key in ('created', 'updated', 'unchanged', 'deleted'):
+                    stats[key] += lead_stats[key]
+                stats['lines'] += lead_stats['received']
+                stats['synced'] += 1
+            except Exception as exc:
+                stats['failed'] += 1
+                message = exc.args[0] if isinstance(exc, UserError) and exc.args else str(exc)
+                lead._log_db_lineas_oferta(
+                    "WARNING",
+                    f"Sync batch: error en lead_id={lead.id} solicitud={lead.x_studio_solicitud}: {message}",
+                    "_sync_lineas_oferta_batch",
+                )
+                _logger.warning("Sync batch de líneas de oferta falló para lead_id=%s: %s", lead.id, message)
+        return stats
+
+    @api.model
+    def _lineas_oferta_batch_domain(self):
+        """Oportunidades abiertas con solicitud legacy."""
+        return [
+            ('type', '=', 'opportunity'),
+            ('active', '=', True),
+            ('x_studio_solicitud', '!=', False),
+            ('stage_id.is_won', '=', False),
+        ]
+
+    @api.model
+    def _cron_sync_lineas_oferta(self, batch_size=BATCH_SYNC_SIZE, max_workers=BATCH_SYNC_WORKERS, limit=None):
+        """
+        Refresco nocturno de líneas de oferta de las oportunidades abiertas.
+        Procesa lotes de ``batch_size`` leads y confirma la transacción después de cada lote.
+        """
+        lead_ids = self.search(self._lineas_oferta_batch_domain(), order='id', limit=limit).ids
+        totals = {}
+        started = time.monotonic()
+        for offset in range(0, len(lead_ids), batch_size):
+            batch = self.browse(lead_ids[offset:offset + batch_size])
+            stats = batch._sync_lineas_oferta_batch(max_workers=max_workers)
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+            # Liberar memoria del cache entre lotes
+            self.env.invalidate_all()
+        message = (
+            f"Cron líneas de oferta: {len(lead_ids)} leads en {time.monotonic() - started:.1f}s | "
+            f"ok={totals.get('synced', 0)} errores={totals.get('failed', 0)} omitidos={totals.get('skipped', 0)} "
+            f"líneas={totals.get('lines', 0)} creadas={totals.get('created', 0)} actualizadas={totals.get('updated', 0)} "
+            f"sin cambios={totals.get('unchanged', 0)} eliminadas={totals.get('deleted', 0)}"
+        )
+        _logger.info(message)
+        self._log_db_lineas_oferta("INFO", message, "_cron_sync_lineas_oferta")
+        return totals
+
+    def action_actualizar_lineas_oferta_batch(self):
+        """Acción de lista: refresca las líneas de oferta de las oportunidades seleccionadas."""
+        stats = self._sync_lineas_oferta_batch()
+        message = _(
+            "Ofertas actualizadas en %(synced)d oportunidades (%(lines)d líneas). "
+            "Errores: %(failed)d. Sin solicitud: %(skipped)d."
+        ) % stats
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Éxito') if not stats['failed'] else _('Aviso'),
+                'message': message,
+                'type': 'success' if not stats['failed'] else 'warning',
+                'sticky': False,
+                'next': {'type': 'ir.actions.client', 'tag': 'reload'},
+            }
+        }
+
     def action_actualizar_lineas_oferta(self):
         """
         Llamar a la API y actualizar las líneas de oferta junto con las alertas,
@@ -348,9 +487,12 @@ class CrmLead(models.Model):
                 return exc.args[0]
             return str(exc)
 
+        # Los POST se lanzan juntos; las escrituras siguen siendo secuenciales
+        prefetched = self._prefetch_legacy_syncs() if self._legacy_concurrent_sync_enabled() else {}
+
         try:
             with self.env.cr.savepoint():
-                offer_count = self._sync_lineas_oferta_records()
+                offer_count = self._sync_lineas_oferta_records(prefetched=prefetched.get('offers'))
         except Exception as exc:
             offer_error = _exception_to_message(exc)
             log_level = "WARNING" if isinstance(exc, UserError) else "ERROR"
@@ -362,7 +504,7 @@ class CrmLead(models.Model):
 
         try:
             with self.env.cr.savepoint():
-                alert_count = self.action_actualizar_alertas()
+                alert_count = self.action_actualizar_alertas(prefetched=prefetched.get('alerts'))
         except Exception as exc:
             alert_error = _exception_to_message(exc)
             log_level = "WARNING" if isinstance(exc, UserError) else "ERROR"
@@ -376,7 +518,7 @@ class CrmLead(models.Model):
             with self.env.cr.savepoint():
                 if hasattr(self, "action_actualizar_validaciones_tarjeta"):
                     self._log_db_lineas_oferta("INFO", "Iniciando sincronización de validaciones de tarjeta [validaciones]", "action_actualizar_lineas_oferta")
-                    card_count = self.action_actualizar_validaciones_tarjeta()
+                    card_count = self.action_actualizar_validaciones_tarjeta(prefetched=prefetched.get('cards'))
                     self._log_db_lineas_oferta("INFO", f"Validaciones de tarjeta actualizadas [validaciones]: {card_count}", "action_actualizar_lineas_oferta")
                 else:
                     self._log_db_lineas_oferta("WARNING", "Función action_actualizar_validaciones_tarjeta no disponible (salteada).", "action_actualizar_lineas_oferta")
@@ -424,10 +566,47 @@ class CrmLead(models.Model):
             }
         }
 
-    def action_actualizar_alertas(self):
+    def _legacy_concurrent_sync_enabled(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return ICP.get_param('lineas_oferta.concurrent_sync', 'True') in ('True', '1')
+
+    def _prefetch_legacy_syncs(self):
         """
-        Invoca el API de alertas legacy y sincroniza registros locales.
+        Lanza en paralelo los POST de ofertas, alertas y validaciones de tarjeta.
+        Devuelve {clave: Future}; las consultas que no se pueden armar (falta
+        solicitud/CUIT) se omiten y la sincronización correspondiente reporta el error.
+        Cada thread lee el cuerpo completo (sin ``stream``): las descargas se solapan
+        y la conexión vuelve al pool aunque la respuesta nunca se use.
         """
+        self.ensure_one()
+        builders = {
+            'offers': '_lineas_oferta_request',
+            'alerts': '_cliente_alertas_request',
+            'cards': '_card_validation_request',
+        }
+        client = self.env['legacy.client']
+        calls = {}
+        for key, method in builders.items():
+            if not hasattr(self, method):
+                continue
+            try:
+                legacy_request = getattr(self, method)()
+            except UserError:
+                legacy_request = None
+            if key == 'alerts' and legacy_request and self._cliente_alertas_cache_hit(legacy_request[0]):
+                # Alertas vigentes y ya aplicadas: action_actualizar_alertas no consulta
+                legacy_request = None
+            if legacy_request:
+                calls[key] = client.consultas_call(*legacy_request)
+        if not calls:
+            return {}
+        executor = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix='legacy_sync')
+        try:
+            return {key: executor.submit(call) for key, call in calls.items()}
+        finally:
+            executor.shutdown(wait=False)
+
+    def _cliente_alertas_vat_cuit(self):
         self.ensure_one()
         vat_raw = (self.partner_id.vat or "").strip()
         if not vat_raw:
@@ -436,14 +615,43 @@ class CrmLead(models.Model):
         vat_cuit = self._format_vat_as_cuit(vat_raw)
         if not vat_cuit:
             raise UserError(_('El CUIT/CUIL debe tener 11 dígitos para consultar alertas.'))
+        return vat_cuit
 
-        url = "http://sms.cooperativacredikot.com.ar/ServicioConsultas3_WS.aspx"
-        headers = {
-            'User-Agent': 'Request-Promise',
-            'version': 'QUERY',
-            'parametros': f"@QUERY=odooalertas;@clicuil='{vat_cuit}'",
-            'Content-Type': 'application/json'
-        }
+    def _cliente_alertas_request(self):
+        """Consulta legacy (query, headers) de alertas para el CUIT del contacto."""
+        vat_cuit = self._cliente_alertas_vat_cuit()
+        client = self.env['legacy.client']
+        return 'odooalertas', client.consultas_headers(f"@QUERY=odooalertas;@clicuil='{vat_cuit}'")
+
+    def _cliente_alertas_sync_key(self, vat_cuit, content_hash):
+        return f"{vat_cuit}:{content_hash}"
+
+    def _cliente_alertas_cache_hit(self, query):
+        """True si la última respuesta de alertas del CUIT sigue vigente y es la aplicada a este lead."""
+        self.ensure_one()
+        vat_cuit = self._cliente_alertas_vat_cuit()
+        content_hash = self.env['legacy.response.cache']._fresh_hash(query, vat_cuit)
+        return bool(content_hash) and self.cliente_alerta_sync_hash == self._cliente_alertas_sync_key(vat_cuit, content_hash)
+
+    def action_actualizar_alertas(self, prefetched=None):
+        """
+        Invoca el API de alertas legacy y sincroniza registros locales.
+        No consulta si la última respuesta del CUIT sigue vigente (ver
+        ``legacy_integration.cache.ttl``) y ya está aplicada, y no reescribe
+        las alertas si la respuesta descargada es igual a la aplicada.
+        """
+        self.ensure_one()
+        vat_cuit = self._cliente_alertas_vat_cuit()
+        client = self.env['legacy.client']
+        query, headers = self._cliente_alertas_request()
+        cache = self.env['legacy.response.cache']
+
+        if prefetched is None and self._cliente_alertas_cache_hit(query):
+            cache._record_hit(query, vat_cuit)
+            msg = f"Alertas vigentes en caché para CUIT {vat_cuit}: no se consulta el API"
+            self._log_db_lineas_oferta("INFO", msg, "action_actualizar_alertas")
+            _logger.info(msg)
+            return self.cliente_alerta_count
 
         self._log_db_lineas_oferta("INFO", f"Sync alertas | CUIT={vat_cuit}", "action_actualizar_alertas")
         self._log_db_lineas_oferta("INFO", f"Headers alertas: {headers}", "action_actualizar_alertas")
@@ -451,88 +659,100 @@ class CrmLead(models.Model):
         _logger.info("Headers alertas: %s", headers)
 
         try:
-            response = requests.post(url, headers=headers, data='', timeout=30)
+            response = client.consultas_post(query, headers, prefetched=prefetched, stream=True)
             response.raise_for_status()
         except requests.RequestException as exc:
+            if exc.response is not None:
+                exc.response.close()
             msg = f"Error al invocar API de alertas: {exc}"
-            self._log_db_lineas_oferta("ERROR", msg, "action_actualizar_alertas")
+            self._log_db_lineas_oferta(
+                "ERROR", msg, "action_actualizar_alertas", request_ref=vat_cuit, response=getattr(exc, 'response', None)
+            )
             raise UserError(_('No se pudo conectar con el API de alertas (%s).') % exc) from exc
-
-        raw_text = (response.text or "").lstrip("\ufeff\r\n\t ")
-        if not raw_text:
-            msg = f"La respuesta del API de alertas llegó vacía. parametros={headers.get('parametros')}"
-            self._log_db_lineas_oferta("ERROR", msg, "action_actualizar_alertas")
-            raise UserError(_('El API de alertas respondió vacío (parametros=%(params)s).') % {'params': headers.get('parametros')})
-
+        self._log_db_lineas_oferta(
+            "INFO", f"API de alertas respondió {response.status_code}", "action_actualizar_alertas",
+            request_ref=vat_cuit, response=response,
+        )
+
+        params = headers.get('parametros')
+        datos = DatosStream.from_response(response)
+        alert_vals = []
         try:
-            payload = response.json()
-        except ValueError:
-            try:
-                payload = json.loads(raw_text)
-            except Exception as exc:
-                msg = f"Respuesta del API de alertas no es JSON válido: {exc}. parametros={headers.get('parametros')}"
-                self._log_db_lineas_oferta("ERROR", msg, "action_actualizar_alertas")
-                raise UserError(_('El API de alertas devolvió un formato inválido (parametros=%(params)s): %(err)s') % {
-                    'params': headers.get('parametros'),
-                    'err': exc,
-                }) from exc
-
-        data = payload.get('DATOS') if isinstance(payload, dict) else None
-        if not isinstance(data, list):
-            msg = f"El API de alertas no retornó la clave DATOS con una lista. parametros={headers.get('parametros')}"
-            self._log_db_lineas_oferta("ERROR", msg, "action_actualizar_alertas")
-            raise UserError(_('El API de alertas no devolvió datos válidos (parametros=%(params)s).') % {
-                'params': headers.get('parametros'),
-            })
-
-        alert_env = self.env['cliente.alerta'].sudo()
-        alert_env.search([('lead_id', '=', self.id)]).unlink()
-
-        to_create = []
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-            tipo = (
-                item.get('TIPO')
-                or item.get('Tipo')
-                or item.get('tipo')
-                or _('Alerta')
-            )
-            fecha_val = (
-                item.get('FECHA')
-                or item.get('Fecha')
-                or item.get('fecha')
-                or ""
-            )
-            fecha_date = self._parse_alert_date(fecha_val)
-            if not fecha_date:
-                self._log_db_lineas_oferta(
-                    "WARNING",
-                    f"No se pudo interpretar la fecha '{fecha_val}' en alerta VAT={vat_clean}. Se usa la fecha actual.",
-                    "action_actualizar_alertas",
+            for item in datos:
+                if not isinstance(item, dict):
+                    continue
+                tipo = (
+                    item.get('TIPO')
+                    or item.get('Tipo')
+                    or item.get('tipo')
+                    or _('Alerta')
                 )
-                today_str = fields.Date.context_today(self)
-                fecha_date = fields.Date.from_string(today_str) if isinstance(today_str, str) else today_str
-
-            fecha_str = fields.Date.to_string(fecha_date)
+                fecha_val = (
+                    item.get('FECHA')
+                    or item.get('Fecha')
+                    or item.get('fecha')
+                    or ""
+                )
+                fecha_date = self._parse_alert_date(fecha_val)
+                if not fecha_date:
+                    self._log_db_lineas_oferta(
+                        "WARNING",
+                        f"No se pudo interpretar la fecha '{fecha_val}' en alerta VAT={vat_cuit}. Se usa la fecha actual.",
+                        "action_actualizar_alertas",
+                    )
+                    today_str = fields.Date.context_today(self)
+                    fecha_date = fields.Date.from_string(today_str) if isinstance(today_str, str) else today_str
 
-            to_create.append({
-                'lead_id': self.id,
-                'vat': vat_cuit,
-                'tipo': tipo,
-                'fecha': fecha_str,
-                'rec_importe_rechazado': float(item.get('recimprech') or 0.0),
-                'rec_observaciones': item.get('recobs') or '',
-            })
+                fecha_str = fields.Date.to_string(fecha_date)
 
-        if to_create:
-            alert_env.create(to_create)
+                alert_vals.append({
+                    'lead_id': self.id,
+                    'vat': vat_cuit,
+                    'tipo': tipo,
+                    'fecha': fecha_str,
+                    'rec_importe_rechazado': float(item.get('recimprech') or 0.0),
+                    'rec_observaciones': item.get('recobs') or '',
+                })
+        except EmptyPayloadError as exc:
+            msg = f"La respuesta del API de alertas llegó vacía. parametros={params}"
+            self._log_db_lineas_oferta("ERROR", msg, "action_actualizar_alertas")
+            raise UserError(_('El API de alertas respondió vacío (parametros=%(params)s).') % {'params': params}) from exc
+        except MissingDatosError as exc:
+            msg = f"El API de alertas no retornó la clave DATOS con una lista. parametros={params}"
+            self._log_db_lineas_oferta("ERROR", msg, "action_actualizar_alertas")
+            raise UserError(_('El API de alertas no devolvió datos válidos (parametros=%(params)s).') % {
+                'params': params,
+            }) from exc
+        except PayloadError as exc:
+            msg = f"Respuesta del API de alertas no es JSON válido: {exc}. parametros={params}"
+            self._log_db_lineas_oferta("ERROR", msg, "action_actualizar_alertas")
+            raise UserError(_('El API de alertas devolvió un formato inválido (parametros=%(params)s): %(err)s') % {
+                'params': params,
+                'err': exc,
+            }) from exc
+
+        cache._record_fetch(query, vat_cuit, datos.content_hash, datos.count)
+        sync_key = self._cliente_alertas_sync_key(vat_cuit, datos.content_hash)
+        if self.cliente_alerta_sync_hash == sync_key:
+            msg = f"Alertas sin cambios: {len(alert_vals)} registros para CUIT {vat_cuit}"
+            self._log_db_lineas_oferta("INFO", msg, "action_actualizar_alertas")
+            _logger.info(msg)
+            return len(alert_vals)
+
+        # Recién con la respuesta completa leída se concilian las alertas del lead
+        stats = self.env['cliente.alerta'].sudo().with_context(cliente_alerta_sync=True)._reconcile_lead_alerts(
+            self, alert_vals
+        )
+        self.sudo().cliente_alerta_sync_hash = sync_key
 
         self._invalidate_cache(['cliente_alerta_ids', 'cliente_alerta_count'])
-        msg = f"Alertas sincronizadas: {len(to_create)} registros para CUIT {vat_cuit}"
+        msg = (
+            f"Alertas sincronizadas: {len(alert_vals)} registros para CUIT {vat_cuit} | "
+            "creadas={created} actualizadas={updated} sin cambios={unchanged} eliminadas={deleted}".format(**stats)
+        )
         self._log_db_lineas_oferta("INFO", msg, "action_actualizar_alertas")
         _logger.info(msg)
-        return len(to_create)
+        return len(alert_vals)
 
     def action_view_cliente_alertas(self):
         """
@@ -638,7 +858,7 @@ class CrmLead(models.Model):
             'tag': 'display_notification',
             'params': {
                 'title': _('Prueba completada'),
-                'message': _('Revisa ir.logging para ver los logs de prueba'),
+                'message': _('Revisa Logs de integración para ver los logs de prueba'),
                 'type': 'success',
                 'sticky': False,
             }
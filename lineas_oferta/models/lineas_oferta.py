@@ -12,6 +12,7 @@ _logger = logging.getLogger(__name__)
 
 class LineasOferta(models.Model):
     _name = 'lineas.oferta'
+    _inherit = ['legacy.sync.mixin']
     _description = 'Líneas de Oferta'
     _rec_name = 'display_name'
     _order = 'rie_ped_rpta_lin_r_capital desc, rie_ped_id, rie_ped_rpta_lin_r_ren'
@@ -295,6 +296,62 @@ class LineasOferta(models.Model):
                     record._apply_selected_offer_values_to_lead()
         return result
 
+    @api.model
+    def _reconcile_lead_lines(self, lead, vals_list, existing_lines):
+        """
+        Concilia las líneas de ``lead`` con los valores recibidos del API.
+
+        Las líneas existentes se indexan por (rie_ped_id, rie_ped_rpta_lin_r_ren); de cada
+        coincidencia solo se escriben los campos que cambiaron, y los registros con el mismo
+        diff se actualizan con un único ``write``. Las claves nuevas se crean en bloque y las
+        que ya no vienen se eliminan.
+        Devuelve (contadores, líneas seleccionadas).
+        """
+        stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+        index = {
+            (line.rie_ped_id, line.rie_ped_rpta_lin_r_ren): line
+            for line in existing_lines
+        }
+        # Si el API repite una clave, prevalece el último ítem
+        incoming = {}
+        for vals in vals_list:
+            incoming[(vals['rie_ped_id'], vals['rie_ped_rpta_lin_r_ren'])] = vals
+
+        to_create = []
+        write_groups = {}
+        selected_records = self.browse()
+        for key, vals in incoming.items():
+            line = index.get(key)
+            if not line:
+                to_create.append(vals)
+                continue
+            update_vals = {k: v for k, v in vals.items() if k != 'lead_id'}
+            changed = line._get_changed_vals(update_vals)
+            if changed:
+                group_key = tuple(sorted(changed.items()))
+                write_groups.setdefault(group_key, []).append(line.id)
+            else:
+                stats['unchanged'] += 1
+            if vals.get('rie_ped_rpta_lin_r_seleccion') == 'S':
+                selected_records |= line
+
+        for group_key, line_ids in write_groups.items():
+            self.browse(line_ids).write(dict(group_key))
+            stats['updated'] += len(line_ids)
+
+        if to_create:
+            new_lines = self.create(to_create)
+            stats['created'] = len(new_lines)
+            selected_records |= new_lines.filtered(lambda l: l.is_selected)
+
+        lines_to_delete = existing_lines.filtered(
+            lambda l: (l.rie_ped_id, l.rie_ped_rpta_lin_r_ren) not in incoming
+        )
+        if lines_to_delete:
+            stats['deleted'] = len(lines_to_delete)
+            lines_to_delete.unlink()
+        return stats, selected_records
+
     def action_toggle_selection(self):
         """
         Alternar selección desde la interfaz (botón). Guarda inmediatamente
@@ -322,5 +379,10 @@ class LineasOferta(models.Model):
             values['x_studio_cant_cuotas'] = self.rie_ped_rpta_lin_r_cuotas
         if self.rie_ped_rpta_lin_r_imp_cuota:
             values['x_studio_monto_cuotas'] = self.rie_ped_rpta_lin_r_imp_cuota
+        lead = self.lead_id
+        values = {
+            fname: value for fname, value in values.items()
+            if fname not in lead._fields or lead[fname] != value
+        }
         if values:
-            self.lead_id.write(values)
+            lead.write(values)